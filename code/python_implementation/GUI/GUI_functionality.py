@@ -1,11 +1,10 @@
+import json
 import os
+import queue
 import re
-import time
 import threading
-import queue
 import tkinter as tk
 from tkinter import messagebox, scrolledtext, filedialog
-from PIL import Image, ImageTk
 
 
 # Import the separated file picker
@@ -14,11 +13,29 @@ try:
 except ImportError:
     from file_picker import open_file_picker  # type: ignore
 
+# Import the background image decoder
+try:
+    from GUI.image_loader import ImageLoader, decode_image
+except ImportError:
+    from image_loader import ImageLoader, decode_image  # type: ignore
+
+# Import the batched log pump shared with ExecutionDisplay
+try:
+    from GUI.log_pump import LogPump
+except ImportError:
+    from log_pump import LogPump  # type: ignore
+
+# Import the per-file, per-stage progress view
+try:
+    from GUI.progress_view import ProgressView
+except ImportError:
+    from progress_view import ProgressView  # type: ignore
+
 # Import code execution helper
 try:
-    from GUI.code_execution import run_rythm_detection
+    from GUI.code_execution import AnalysisWorker, run_rythm_detection
 except ImportError:
-    from code_execution import run_rythm_detection  # type: ignore
+    from code_execution import AnalysisWorker, run_rythm_detection  # type: ignore
 
 
 class GUIController:
@@ -26,7 +43,8 @@ class GUIController:
         self.root = root
         self.audio_extensions = audio_extensions
         self.current_dir = os.getcwd()
-        self.detection_proc = None  # track spawned process
+        self.detection_proc = None  # track the running job
+        self.worker = AnalysisWorker()  # long-lived analysis process, reused across runs
 
         # Track selections
         self.track1_path: str | None = None
@@ -40,18 +58,32 @@ class GUIController:
 
         # Embedded log
         self.log_text: scrolledtext.ScrolledText | None = None
-        self._log_queue: "queue.Queue[tuple[str, str]]" = queue.Queue()
-        self._log_after_id: str | None = None
+        self._log_pump: LogPump | None = None
 
         # Results (images) area
         self.results_frame: tk.Frame | None = None
-        self._image_refs: list[ImageTk.PhotoImage] = []
-        self._run_start_time: float | None = None
+        # Per-card widgets and state, by image path; images are decoded off the Tk thread
+        self._cards: dict[str, dict] = {}
+        self._image_loader = ImageLoader()
+        self._image_poll_id: str | None = None
         self._workdir: str | None = None
         self._last_image_paths: list[str] = []
 
+        # Artifacts announced by the current run (filled by the stdout reader thread)
+        self._run_images: list[str] = []
+        self._run_manifest: str | None = None
+        self._stream_threads: list[threading.Thread] = []
+
+        # Structured progress events ("PROGRESS: {json}" stdout lines), applied on the Tk thread
+        self.progress_view: ProgressView | None = None
+        self._progress_queue: "queue.Queue[dict]" = queue.Queue()
+        self._progress_poll_id: str | None = None
+        self._run_active = False
+
         # Pattern to detect "SAVED: /path/to/image.png" lines from the process output
         self._saved_line_re = re.compile(r"^\s*SAVED:\s*(?P<path>.+\.(?:png|jpg|jpeg|bmp))\s*$", re.IGNORECASE)
+        # Pattern to detect the "MANIFEST: /path/to/run.json" line printed at the end of a run
+        self._manifest_line_re = re.compile(r"^\s*MANIFEST:\s*(?P<path>.+\.json)\s*$", re.IGNORECASE)
 
     def build_ui(self) -> None:
         self.root.title("Rhythm Detector - File Selector")
@@ -99,6 +131,10 @@ class GUIController:
         )
         tk.Button(row2, text="Choose...", command=self.select_track2).pack(side=tk.RIGHT)
 
+        # Per-file, per-stage progress of the current run
+        self.progress_view = ProgressView(self.root)
+        self.progress_view.frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
         # Embedded Execution Log
         log_frame = tk.LabelFrame(self.root, text="Execution Log", padx=10, pady=10)
         log_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
@@ -107,6 +143,7 @@ class GUIController:
         self.log_text.tag_configure("stdout", foreground="#154360")
         self.log_text.tag_configure("stderr", foreground="#7D1E1E")
         self.log_text.tag_configure("status", foreground="#555555")
+        self._log_pump = LogPump(self.log_text)
 
         # Results (images) gallery below the log
         results_outer = tk.LabelFrame(self.root, text="Results", padx=10, pady=10)
@@ -144,63 +181,106 @@ class GUIController:
 
     def start(self) -> None:
         self.build_ui()
+        # Start the worker now so its imports are paid while tracks are being chosen
+        try:
+            self.worker.start()
+        except Exception as e:
+            self._append_log(f"[could not start the analysis worker: {e}]\n", "stderr")
 
     # -----------------------
     # Logging (embedded)
     # -----------------------
     def _append_log(self, text: str, tag: str | None = None) -> None:
-        if self.log_text is None:
-            return
-        if tag:
-            self.log_text.insert(tk.END, text, tag)
-        else:
-            self.log_text.insert(tk.END, text)
-        self.log_text.see(tk.END)
+        if self._log_pump is not None:
+            self._log_pump.write(text, tag)
 
     def _enqueue_log(self, text: str, tag: str) -> None:
-        self._log_queue.put((text, tag))
+        if self._log_pump is not None:
+            self._log_pump.put(text, tag)
+
+    def _start_log_pump_if_needed(self) -> None:
+        if self._log_pump is not None:
+            self._log_pump.start()
 
-    def _drain_log_queue(self) -> None:
+    def _clear_progress(self) -> None:
         try:
             while True:
-                text, tag = self._log_queue.get_nowait()
-                self._append_log(text, tag)
+                self._progress_queue.get_nowait()
         except queue.Empty:
             pass
-        finally:
-            if self.root.winfo_exists():
-                self._log_after_id = self.root.after(50, self._drain_log_queue)
+        if self.progress_view is not None:
+            self.progress_view.clear()
 
-    def _start_log_pump_if_needed(self) -> None:
-        if self._log_after_id is None and self.root.winfo_exists():
-            self._drain_log_queue()
+    def _clear_log(self) -> None:
+        if self._log_pump is not None:
+            self._log_pump.clear()
 
     def _reader_loop(self, fp, tag: str) -> None:
         try:
             for line in iter(fp.readline, ""):
+                if tag == "stdout":
+                    if line.startswith("PROGRESS:"):
+                        self._note_progress(line)
+                        continue
+                    self._note_artifact(line)
                 self._enqueue_log(line, tag)
         except Exception as e:
             self._enqueue_log(f"[reader error: {e}]\n", "stderr")
 
+    def _note_artifact(self, line: str) -> None:
+        match = self._saved_line_re.match(line)
+        if match:
+            self._run_images.append(match.group("path"))
+            return
+        match = self._manifest_line_re.match(line)
+        if match:
+            self._run_manifest = match.group("path")
+
+    def _note_progress(self, line: str) -> None:
+        try:
+            self._progress_queue.put(json.loads(line[len("PROGRESS:"):]))
+        except ValueError:
+            self._enqueue_log(line, "stdout")
+
+    def _poll_progress(self) -> None:
+        self._progress_poll_id = None
+        try:
+            while True:
+                event = self._progress_queue.get_nowait()
+                if self.progress_view is not None:
+                    self.progress_view.update(event)
+        except queue.Empty:
+            pass
+        if self._run_active and self.root.winfo_exists():
+            self._progress_poll_id = self.root.after(100, self._poll_progress)
+
     def _start_stream_readers(self, proc) -> None:
-        if getattr(proc, "stdout", None) is not None:
-            threading.Thread(target=self._reader_loop, args=(proc.stdout, "stdout"), daemon=True).start()
-        if getattr(proc, "stderr", None) is not None:
-            threading.Thread(target=self._reader_loop, args=(proc.stderr, "stderr"), daemon=True).start()
+        self._stream_threads = []
+        for name in ("stdout", "stderr"):
+            if getattr(proc, name, None) is not None:
+                reader = threading.Thread(target=self._reader_loop, args=(getattr(proc, name), name), daemon=True)
+                self._stream_threads.append(reader)
+                reader.start()
 
         def wait_and_mark():
             try:
                 code = proc.wait()
-                self._enqueue_log(f"\n[process exited with code {code}]\n", "status")
-                # After completion, collect and show images created during this run
-                if self._run_start_time is not None:
-                    images = self._collect_result_images(self._run_start_time)
-                    self.root.after(0, lambda: self._display_images(images))
+                # Let the readers consume the last lines (SAVED:/MANIFEST:) before collecting
+                for reader in self._stream_threads:
+                    reader.join(timeout=5)
+                self._run_active = False  # the progress poll applies what is left and stops
+                self._enqueue_log(f"\n[run finished with code {code}]\n", "status")
+                # After completion, show the images this run reported
+                images = self._collect_result_images()
+                self.root.after(0, lambda: self._display_images(images))
             except Exception as e:
                 self._enqueue_log(f"\n[process wait error: {e}]\n", "stderr")
 
         threading.Thread(target=wait_and_mark, daemon=True).start()
         self._start_log_pump_if_needed()
+        self._run_active = True
+        if self._progress_poll_id is None:
+            self._poll_progress()
 
     # -----------------------
     # Track selection
@@ -248,18 +328,19 @@ class GUIController:
             return
         try:
             # Clear previous log and results
-            if self.log_text is not None:
-                self.log_text.delete("1.0", tk.END)
-                self._append_log("Process started...\n", "status")
+            self._clear_log()
+            self._append_log("Process started...\n", "status")
             self._clear_results()
 
-            # Record start time and working directory
-            self._run_start_time = time.time()
+            # Reset the run's reported artifacts and record the working directory
+            self._run_images = []
+            self._run_manifest = None
+            self._clear_progress()
             # Same workdir as the detection script runs in (parent folder of GUI)
             self._workdir = os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
 
-            # Launch process
-            proc = run_rythm_detection([self.track1_path, self.track2_path])
+            # Submit the run to the persistent worker (restarted if it died)
+            proc = run_rythm_detection([self.track1_path, self.track2_path], worker=self.worker)
             self.detection_proc = proc
 
             # Hook up streaming
@@ -276,8 +357,8 @@ class GUIController:
         self.track2_var.set("Not selected")
         if self.status_var:
             self.status_var.set("Selection cleared.")
-        if self.log_text is not None:
-            self.log_text.delete("1.0", tk.END)
+        self._clear_log()
+        self._clear_progress()
         self._clear_results()
 
     def on_close(self) -> None:
@@ -297,13 +378,21 @@ class GUIController:
                                 pass
                 except Exception:
                     pass
+            try:
+                self.worker.stop()
+            except Exception:
+                pass
         finally:
-            if self._log_after_id is not None:
-                try:
-                    self.root.after_cancel(self._log_after_id)
-                except Exception:
-                    pass
-                self._log_after_id = None
+            if self._log_pump is not None:
+                self._log_pump.stop()
+            for after_id in (self._image_poll_id, self._progress_poll_id):
+                if after_id is not None:
+                    try:
+                        self.root.after_cancel(after_id)
+                    except Exception:
+                        pass
+            self._image_poll_id = None
+            self._progress_poll_id = None
             self.root.destroy()
 
     # -----------------------
@@ -314,80 +403,86 @@ class GUIController:
             return
         for child in list(self.results_frame.children.values()):
             child.destroy()
-        self._image_refs.clear()
+        self._cards.clear()
         self._last_image_paths = []
 
-    def _collect_result_images(self, since_time: float) -> list[str]:
-        if not self._workdir:
-            return []
-        exts = {".png", ".jpg", ".jpeg", ".bmp"}
-        found: list[tuple[float, str]] = []
-
-        # Search the working directory and an optional 'results' subfolder
-        search_roots = [self._workdir]
-        results_dir = os.path.join(self._workdir, "results")
-        if os.path.isdir(results_dir):
-            search_roots.append(results_dir)
-
-        for root_dir in search_roots:
+    def _collect_result_images(self) -> list[str]:
+        """
+        Images produced by the last run, from its SAVED: lines plus the artifacts listed in its
+        manifest (which also covers plots finished by background workers). No directory scan.
+        """
+        found: list[str] = list(self._run_images)
+        if self._run_manifest:
             try:
-                for dirpath, _, filenames in os.walk(root_dir):
-                    for name in filenames:
-                        if os.path.splitext(name)[1].lower() in exts:
-                            full = os.path.join(dirpath, name)
-                            try:
-                                mtime = os.path.getmtime(full)
-                                if mtime >= since_time - 1.0:  # small slack
-                                    found.append((mtime, full))
-                            except OSError:
-                                pass
-            except Exception:
-                pass
-
-        found.sort(key=lambda t: t[0])
-        return [p for _, p in found]
+                with open(self._run_manifest, "r", encoding="utf-8") as fp:
+                    manifest = json.load(fp)
+                for entry in manifest.get("files", []):
+                    found.extend(path for path in (entry.get("artifacts") or {}).values() if path)
+            except (OSError, ValueError) as e:
+                self._enqueue_log(f"[could not read run manifest {self._run_manifest}: {e}]\n", "stderr")
+        # De-duplicate (keeping the reported order) and skip images deleted since
+        return [p for p in dict.fromkeys(os.path.normpath(p) for p in found) if os.path.isfile(p)]
 
     def _append_image_card(self, path: str) -> None:
         """
-        Append a single image card to the results area (used for live 'SAVED:' lines).
+        Append a single image card to the results area. The card shows a placeholder until the
+        background loader hands over its thumbnail; "Expand" loads the full-resolution image.
         """
         if self.results_frame is None:
             return
-        try:
-            img = Image.open(path)
-            # Handle transparency
-            if img.mode in ("RGBA", "LA"):
-                bg = Image.new("RGBA", img.size, (255, 255, 255, 255))
-                bg.paste(img, (0, 0), img)
-                img = bg.convert("RGB")
-            elif img.mode not in ("RGB", "L"):
-                img = img.convert("RGB")
+        self._last_image_paths.append(path)
 
-            max_width = 1500
-            if img.width > max_width:
-                scale = max_width / float(img.width)
-                img = img.resize((int(img.width * scale), int(img.height * scale)), Image.LANCZOS)
+        item = tk.Frame(self.results_frame, padx=4, pady=4, bg="white")
+        item.pack(fill=tk.X, anchor="w")
 
-            photo = ImageTk.PhotoImage(img)
-            self._image_refs.append(photo)
-            self._last_image_paths.append(path)
+        top_row = tk.Frame(item, bg="white")
+        top_row.pack(fill=tk.X, pady=(4, 2))
 
-            item = tk.Frame(self.results_frame, padx=4, pady=4, bg="white")
-            item.pack(fill=tk.X, anchor="w")
+        caption_text = os.path.relpath(path, self._workdir or os.getcwd())
+        tk.Label(top_row, text=caption_text, anchor="w", bg="white").pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Button(top_row, text="Save PNG", command=lambda p=path: self._save_single_image_png(p)).pack(side=tk.RIGHT)
+        expand_btn = tk.Button(top_row, text="Expand", command=lambda p=path: self._toggle_card(p))
+        expand_btn.pack(side=tk.RIGHT, padx=(0, 6))
 
-            top_row = tk.Frame(item, bg="white")
-            top_row.pack(fill=tk.X, pady=(4, 2))
+        lbl = tk.Label(item, text="Loading image...", fg="#555555", bg="white", anchor="w")
+        lbl.pack(anchor="w")
 
-            caption_text = os.path.relpath(path, self._workdir or os.getcwd())
-            tk.Label(top_row, text=caption_text, anchor="w", bg="white").pack(side=tk.LEFT, fill=tk.X, expand=True)
-            tk.Button(top_row, text="Save PNG", command=lambda p=path: self._save_single_image_png(p)).pack(side=tk.RIGHT)
+        self._cards[path] = {"label": lbl, "button": expand_btn, "expanded": False}
+        self._request_image(path, full=False)
 
-            lbl = tk.Label(item, image=photo, bg="white")
-            lbl.pack(anchor="w")
+    def _request_image(self, path: str, full: bool) -> None:
+        self._image_loader.request(path, full=full)
+        if self._image_poll_id is None and self.root.winfo_exists():
+            self._image_poll_id = self.root.after(30, self._poll_images)
 
-        except Exception as e:
-            err = tk.Label(self.results_frame, text=f"Failed to load image: {path} ({e})", fg="#7D1E1E", anchor="w")
-            err.pack(fill=tk.X, pady=4)
+    def _poll_images(self) -> None:
+        """
+        Tk-thread half of the image loading: wrap finished decodes in PhotoImages.
+        """
+        self._image_poll_id = None
+        # PIL is imported on first use so that it stays out of the GUI's first paint
+        from PIL import ImageTk
+        for path, full, image, error in self._image_loader.poll():
+            card = self._cards.get(path)
+            if card is None or card["expanded"] != full or not card["label"].winfo_exists():
+                continue  # the card was cleared or toggled while this image was decoding
+            if error is not None:
+                card["label"].configure(image="", text=f"Failed to load image: {path} ({error})", fg="#7D1E1E")
+                continue
+            photo = ImageTk.PhotoImage(image)
+            card["label"].configure(image=photo, text="")
+            card["photo"] = photo  # keep a reference, or Tk drops the image
+        if self._image_loader.pending and self.root.winfo_exists():
+            self._image_poll_id = self.root.after(30, self._poll_images)
+
+    def _toggle_card(self, path: str) -> None:
+        card = self._cards.get(path)
+        if card is None:
+            return
+        card["expanded"] = not card["expanded"]
+        card["button"].configure(text="Collapse" if card["expanded"] else "Expand")
+        # The thumbnail comes back from the loader's cache; the full image is decoded on demand
+        self._request_image(path, full=card["expanded"])
 
     def _display_images(self, image_paths: list[str]) -> None:
         """
@@ -430,13 +525,7 @@ class GUIController:
                 return
 
             # Load and convert as needed (handle transparency like in display)
-            img = Image.open(src_path)
-            if img.mode in ("RGBA", "LA"):
-                bg = Image.new("RGBA", img.size, (255, 255, 255, 255))
-                bg.paste(img, (0, 0), img)
-                img = bg.convert("RGB")
-            elif img.mode not in ("RGB", "L"):
-                img = img.convert("RGB")
+            img = decode_image(src_path)
 
             # Save as PNG
             img.save(target, format="PNG")
@@ -460,13 +549,7 @@ class GUIController:
         errors: list[str] = []
         for src_path in self._last_image_paths:
             try:
-                img = Image.open(src_path)
-                if img.mode in ("RGBA", "LA"):
-                    bg = Image.new("RGBA", img.size, (255, 255, 255, 255))
-                    bg.paste(img, (0, 0), img)
-                    img = bg.convert("RGB")
-                elif img.mode not in ("RGB", "L"):
-                    img = img.convert("RGB")
+                img = decode_image(src_path)
                 target = os.path.join(folder, self._default_png_name(src_path))
                 img.save(target, format="PNG")
                 saved += 1
@@ -1,34 +1,48 @@
-# file: code/python_implementation/GUI/code_execution.py
+import json
 import os
+import queue
 import subprocess
 import sys
+import threading
 from typing import Sequence
 
-def run_rythm_detection(file_paths: Sequence[str]) -> subprocess.Popen:
+JOB_DONE_PREFIX = "JOB_DONE:"
+
+
+def _script_path() -> str:
+    # Resolve the path to rythm_detection.py relative to this file
+    script_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "rythm_detection.py"))
+    if not os.path.isfile(script_path):
+        raise FileNotFoundError(f"Could not find rythm_detection.py at: {script_path}")
+    return script_path
+
+
+def run_rythm_detection(file_paths: Sequence[str], worker: "AnalysisWorker | None" = None):
     """
-    Launch rythm_detection.py in a separate process, passing exactly two file paths.
+    Run rythm_detection.py on exactly two file paths.
+
+    Without a worker, launches a fresh interpreter for this run. With a worker, submits the run
+    to its long-lived process (warm imports and caches) instead.
     Returns:
-        subprocess.Popen: the spawned process handle with stdout/stderr pipes
+        subprocess.Popen | AnalysisJob: a handle with stdout/stderr text streams, poll() and wait()
     Raises:
         ValueError: if file_paths length is not 2
         FileNotFoundError: if script cannot be found
-        RuntimeError: if process fails to start
+        RuntimeError: if process fails to start (or the worker is busy)
     """
     if len(file_paths) != 2:
         raise ValueError("Exactly 2 file paths are required.")
 
-    # Resolve the path to rythm_detection.py relative to this file
-    script_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "rythm_detection.py"))
-    if not os.path.isfile(script_path):
-        raise FileNotFoundError(f"Could not find rythm_detection.py at: {script_path}")
-
-    # Ensure absolute paths for audio files
+    # Ensure absolute paths for audio files; ask for PROGRESS: events for the progress view
     arg_files = [os.path.abspath(p) for p in file_paths]
+    if worker is not None:
+        return worker.submit([*arg_files, "--progress"])
 
+    script_path = _script_path()
     try:
         # Pipe stdout/stderr so the GUI can display logs
         proc = subprocess.Popen(
-            [sys.executable, script_path, *arg_files],
+            [sys.executable, script_path, *arg_files, "--progress"],
             cwd=os.path.dirname(script_path),
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -37,4 +51,184 @@ def run_rythm_detection(file_paths: Sequence[str]) -> subprocess.Popen:
         )
         return proc
     except Exception as e:
-        raise RuntimeError(f"Failed to start rythm_detection.py: {e}") from e
\ No newline at end of file
+        raise RuntimeError(f"Failed to start rythm_detection.py: {e}") from e
+
+
+class _LineStream:
+    """
+    Read side of one job's stdout or stderr: readline() blocks for the next line and returns ""
+    once the job's output has ended, like a pipe at EOF.
+    """
+
+    def __init__(self) -> None:
+        self._lines: "queue.Queue[str]" = queue.Queue()
+        self._closed = False
+
+    def put(self, line: str) -> None:
+        self._lines.put(line)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._lines.put("")
+
+    def readline(self) -> str:
+        line = self._lines.get()
+        if line == "":
+            self._lines.put("")  # keep returning EOF
+        return line
+
+    def __iter__(self):
+        return iter(self.readline, "")
+
+
+class AnalysisJob:
+    """
+    One run submitted to an AnalysisWorker, with the subset of the subprocess.Popen interface the
+    GUI uses (stdout, stderr, poll, wait, returncode, terminate, kill).
+    """
+
+    def __init__(self, worker: "AnalysisWorker", args: list[str]) -> None:
+        self.worker = worker
+        self.args = args
+        self.stdout = _LineStream()
+        self.stderr = _LineStream()
+        self.returncode: int | None = None
+        self._proc: subprocess.Popen | None = None  # worker process running this job
+        self._ended: set[str] = set()
+        self._done = threading.Event()
+
+    def _end_stream(self, name: str, code: int | None) -> None:
+        getattr(self, name).close()
+        self._ended.add(name)
+        if code is not None and self.returncode is None:
+            self.returncode = code
+        if self._ended >= {"stdout", "stderr"}:
+            self._done.set()
+
+    def poll(self) -> int | None:
+        return self.returncode if self._done.is_set() else None
+
+    def wait(self, timeout: float | None = None) -> int:
+        if not self._done.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def terminate(self) -> None:
+        # A running job cannot be interrupted in place: stop the worker (it restarts on the next run)
+        if not self._done.is_set():
+            self.worker.stop(kill=True)
+
+    def kill(self) -> None:
+        self.terminate()
+
+
+class AnalysisWorker:
+    """
+    Long-lived `rythm_detection.py --serve` process that runs one job at a time.
+
+    The worker keeps numpy/scipy/matplotlib imported and the in-process spectrum and filter caches
+    warm between runs. Crash isolation is kept: if the worker dies, the running job ends with the
+    worker's exit code and the next submit() starts a fresh worker.
+    """
+
+    def __init__(self) -> None:
+        self._proc: subprocess.Popen | None = None
+        self._job: AnalysisJob | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Starts the worker if it is not running (e.g. at GUI startup, to pay the imports early).
+        """
+        with self._lock:
+            self._ensure_running()
+
+    def _ensure_running(self) -> subprocess.Popen:
+        if self._proc is not None and self._proc.poll() is None:
+            return self._proc
+        script_path = _script_path()
+        try:
+            proc = subprocess.Popen(
+                [sys.executable, script_path, "--serve"],
+                cwd=os.path.dirname(script_path),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to start rythm_detection.py: {e}") from e
+        self._proc = proc
+        for name in ("stdout", "stderr"):
+            threading.Thread(target=self._pump, args=(proc, name), daemon=True).start()
+        return proc
+
+    def submit(self, args: Sequence[str]) -> AnalysisJob:
+        with self._lock:
+            if self._job is not None and self._job.poll() is None:
+                raise RuntimeError("The analysis worker is still running the previous job.")
+            for attempt in range(2):
+                proc = self._ensure_running()
+                job = AnalysisJob(self, list(args))
+                job._proc = proc
+                self._job = job
+                try:
+                    proc.stdin.write(json.dumps(job.args) + "\n")
+                    proc.stdin.flush()
+                    return job
+                except (OSError, ValueError):
+                    # The worker died between runs; restart it once and resend
+                    self._job = None
+                    self._reap(proc)
+            raise RuntimeError("Failed to send the job to the analysis worker.")
+
+    def _pump(self, proc: subprocess.Popen, name: str) -> None:
+        """
+        Routes one of the worker's output streams to the current job until the worker exits.
+        """
+        for line in iter(getattr(proc, name).readline, ""):
+            job = self._job
+            if job is None or job._proc is not proc or name in job._ended:
+                continue  # worker output between jobs (startup/shutdown logging)
+            if line.startswith(JOB_DONE_PREFIX):
+                try:
+                    code = int(json.loads(line[len(JOB_DONE_PREFIX):])["code"])
+                except (ValueError, KeyError, TypeError):
+                    code = 1
+                job._end_stream(name, code)
+            else:
+                getattr(job, name).put(line)
+        # The worker exited: end the job it was running (if any) with its exit code
+        code = self._reap(proc)
+        job = self._job
+        if job is not None and job._proc is proc and name not in job._ended:
+            if name == "stderr":
+                job.stderr.put(f"[analysis worker exited with code {code}; it restarts on the next run]\n")
+            job._end_stream(name, code if code else 1)
+
+    @staticmethod
+    def _reap(proc: subprocess.Popen) -> int | None:
+        try:
+            return proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            return proc.wait()
+
+    def stop(self, timeout: float = 3.0, kill: bool = False) -> None:
+        """
+        Stops the worker: closes its input so it exits after the current job, waiting up to
+        timeout seconds before killing it (or kills it right away with kill=True).
+        """
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            return
+        if not kill:
+            try:
+                proc.stdin.close()
+                proc.wait(timeout=timeout)
+                return
+            except Exception:
+                pass
+        proc.kill()
@@ -1,9 +1,13 @@
 # file: code/python_implementation/GUI/execution_display.py
 import threading
-import queue
 import tkinter as tk
 from tkinter import scrolledtext
 
+try:
+    from GUI.log_pump import LogPump
+except ImportError:
+    from log_pump import LogPump  # type: ignore
+
 class ExecutionDisplay:
     def __init__(self, parent: tk.Tk | tk.Toplevel, title: str = "Execution Log") -> None:
         self.parent = parent
@@ -21,8 +25,7 @@ class ExecutionDisplay:
         self.text.tag_configure("status", foreground="#555555")
 
         # Internal
-        self._queue: "queue.Queue[tuple[str, str]]" = queue.Queue()
-        self._after_id: str | None = None
+        self._pump = LogPump(self.text)
         self._reader_threads: list[threading.Thread] = []
         self._attached_proc = None
 
@@ -30,7 +33,7 @@ class ExecutionDisplay:
         self.tl.protocol("WM_DELETE_WINDOW", self._on_close)
 
     def clear(self) -> None:
-        self.text.delete("1.0", tk.END)
+        self._pump.clear()
 
     def _on_close(self) -> None:
         # Only close the window; process lifecycle is handled by the controller
@@ -41,15 +44,10 @@ class ExecutionDisplay:
 
     def _stop_readers(self) -> None:
         # Reader threads will naturally exit once streams close; nothing special to stop
-        if self._after_id is not None:
-            try:
-                self.tl.after_cancel(self._after_id)
-            except Exception:
-                pass
-            self._after_id = None
+        self._pump.stop()
 
     def _enqueue_line(self, line: str, tag: str) -> None:
-        self._queue.put((line, tag))
+        self._pump.put(line, tag)
 
     def _reader(self, fp, tag: str) -> None:
         try:
@@ -58,26 +56,13 @@ class ExecutionDisplay:
         except Exception as e:
             self._enqueue_line(f"[reader error: {e}]\n", "stderr")
 
-    def _drain_queue(self) -> None:
-        try:
-            while True:
-                line, tag = self._queue.get_nowait()
-                self.text.insert(tk.END, line, tag)
-                self.text.see(tk.END)
-        except queue.Empty:
-            pass
-        finally:
-            if self.tl.winfo_exists():
-                self._after_id = self.tl.after(50, self._drain_queue)
-
     def attach_process(self, proc) -> None:
         """
         Attach a subprocess.Popen-like object that has stdout/stderr as text streams.
         """
         self._attached_proc = proc
         self.clear()
-        self.text.insert(tk.END, "Process started...\n", "status")
-        self.text.see(tk.END)
+        self._pump.write("Process started...\n", "status")
 
         # Start reader threads for stdout and stderr
         self._reader_threads = []
@@ -91,7 +76,7 @@ class ExecutionDisplay:
             t_err.start()
 
         # Start UI queue pump
-        self._drain_queue()
+        self._pump.start()
 
         # Also watch for process completion to append status
         def wait_and_mark():
@@ -0,0 +1,113 @@
+# code/python_implementation/GUI/image_loader.py
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+# Width of the result thumbnails; the full-resolution image is only decoded on expand
+THUMBNAIL_WIDTH = 900
+
+
+def flatten_to_rgb(img):
+    """
+    Composite transparent images onto white and convert to RGB (L stays grayscale).
+    """
+    from PIL import Image
+    if img.mode in ("RGBA", "LA"):
+        bg = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        bg.paste(img, (0, 0), img)
+        return bg.convert("RGB")
+    if img.mode not in ("RGB", "L"):
+        return img.convert("RGB")
+    return img
+
+
+def decode_image(path: str, max_width: int | None = None):
+    """
+    Decode an image file, flattened to RGB and (if max_width is given) downscaled to it.
+    """
+    # PIL is imported on first use so that it stays out of the GUI's first paint
+    from PIL import Image
+    with Image.open(path) as src:
+        src.load()
+        img = flatten_to_rgb(src)
+        if img is src:
+            img = src.copy()
+    if max_width is not None and img.width > max_width:
+        # thumbnail() first reduces by an integer factor, then LANCZOS-resamples the rest
+        img.thumbnail((max_width, img.height), Image.LANCZOS)
+    return img
+
+
+class ImageLoader:
+    """
+    Decodes and resizes images on a background thread, so the Tk thread only builds the final
+    PhotoImage.
+
+    request() queues a decode; poll() (called from the Tk thread) returns the finished ones as
+    (path, full, image, error) tuples. Thumbnails are kept in an LRU cache keyed by
+    (path, mtime, width) and bounded by their decoded size, so re-showing a result (or
+    collapsing an expanded card) does not decode it again. Full-resolution images are not cached.
+    """
+
+    def __init__(self, thumbnail_width: int = THUMBNAIL_WIDTH, cache_bytes: int = 64 * 1024 * 1024) -> None:
+        self.thumbnail_width = thumbnail_width
+        self.cache_bytes = cache_bytes
+        self._cache: "OrderedDict[tuple, object]" = OrderedDict()
+        self._cache_nbytes = 0
+        self._requests: "queue.Queue[tuple[str, bool]]" = queue.Queue()
+        self._results: "queue.Queue[tuple]" = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def pending(self) -> int:
+        """
+        Requests not yet returned by poll().
+        """
+        return self._pending
+
+    def request(self, path: str, full: bool = False) -> None:
+        with self._lock:
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="image-loader", daemon=True)
+                self._thread.start()
+        self._requests.put((path, full))
+
+    def poll(self) -> list[tuple]:
+        done = []
+        try:
+            while True:
+                done.append(self._results.get_nowait())
+        except queue.Empty:
+            pass
+        with self._lock:
+            self._pending -= len(done)
+        return done
+
+    def _run(self) -> None:
+        while True:
+            path, full = self._requests.get()
+            try:
+                image = decode_image(path) if full else self._thumbnail(path)
+                self._results.put((path, full, image, None))
+            except Exception as e:
+                self._results.put((path, full, None, e))
+
+    def _thumbnail(self, path: str):
+        key = (os.path.abspath(path), os.stat(path).st_mtime_ns, self.thumbnail_width)
+        image = self._cache.get(key)
+        if image is not None:
+            self._cache.move_to_end(key)
+            return image
+        image = decode_image(path, self.thumbnail_width)
+        nbytes = image.width * image.height * len(image.getbands())
+        if nbytes <= self.cache_bytes:
+            while self._cache and self._cache_nbytes + nbytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_nbytes -= evicted.width * evicted.height * len(evicted.getbands())
+            self._cache[key] = image
+            self._cache_nbytes += nbytes
+        return image
@@ -0,0 +1,130 @@
+# code/python_implementation/GUI/log_pump.py
+import re
+import threading
+import tkinter as tk
+
+# Lines the pump may drop under load (the detector logs as "<time> [LEVEL] message")
+VERBOSE_LINE_RE = re.compile(r"\[DEBUG\]")
+
+
+class LogPump:
+    """
+    Moves log lines from reader threads into a Text widget, batched and bounded.
+
+    Reader threads call put(); every interval_ms the Tk thread inserts everything pending with
+    one Text.insert (consecutive lines with the same tag merged), trims the widget to the last
+    max_lines lines and scrolls once.
+
+    When the producer outruns the UI, the pending buffer is bounded too: past half of
+    max_pending, verbose (DEBUG) lines are dropped; at max_pending, put() blocks the reader
+    thread (and so, through the pipe, the process writing the log) until the UI catches up.
+    A line that still does not fit after put_timeout seconds is dropped. Dropped lines are
+    counted and reported in the widget.
+    """
+
+    def __init__(self, text: tk.Text, interval_ms: int = 50, max_lines: int = 5000, max_pending: int = 20000,
+                 put_timeout: float = 5.0, verbose_re: re.Pattern | None = VERBOSE_LINE_RE) -> None:
+        self.text = text
+        self.interval_ms = interval_ms
+        self.max_lines = max_lines
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.verbose_re = verbose_re
+        self._pending: list[tuple[str, str | None]] = []
+        self._dropped = 0
+        self._cond = threading.Condition()
+        self._after_id: str | None = None
+
+    def put(self, text: str, tag: str | None = None) -> None:
+        """
+        Queue a line (thread-safe). May block a reader thread while the UI is behind.
+        """
+        with self._cond:
+            if len(self._pending) >= self.max_pending // 2 and self.verbose_re is not None \
+                    and self.verbose_re.search(text):
+                self._dropped += 1
+                return
+            if len(self._pending) >= self.max_pending:
+                # Never block the Tk thread itself: it is the one that drains the buffer
+                if threading.current_thread() is threading.main_thread() or not self._cond.wait_for(
+                        lambda: len(self._pending) < self.max_pending, timeout=self.put_timeout):
+                    self._dropped += 1
+                    return
+            self._pending.append((text, tag))
+
+    def write(self, text: str, tag: str | None = None) -> None:
+        """
+        Insert directly (Tk thread only), keeping the scrollback bound.
+        """
+        self._insert([(text, tag)], 0)
+
+    def start(self) -> None:
+        """
+        Start the periodic drain (idempotent).
+        """
+        if self._after_id is None and self.text.winfo_exists():
+            self._tick()
+
+    def stop(self) -> None:
+        if self._after_id is not None:
+            try:
+                self.text.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def clear(self) -> None:
+        """
+        Drop pending lines and empty the widget.
+        """
+        with self._cond:
+            self._pending = []
+            self._dropped = 0
+            self._cond.notify_all()
+        self.text.delete("1.0", tk.END)
+
+    def flush(self) -> None:
+        """
+        Insert everything pending now (Tk thread only).
+        """
+        with self._cond:
+            batch, self._pending = self._pending, []
+            dropped, self._dropped = self._dropped, 0
+            self._cond.notify_all()
+        if batch or dropped:
+            self._insert(batch, dropped)
+
+    def _tick(self) -> None:
+        self._after_id = None
+        try:
+            self.flush()
+        finally:
+            if self.text.winfo_exists():
+                self._after_id = self.text.after(self.interval_ms, self._tick)
+
+    def _insert(self, batch: list[tuple[str, str | None]], dropped: int) -> None:
+        # Lines beyond the scrollback limit would be trimmed right away; skip them up front
+        if len(batch) > self.max_lines:
+            dropped += len(batch) - self.max_lines
+            batch = batch[-self.max_lines:]
+        if dropped:
+            batch = [(f"[{dropped} log line(s) dropped to keep the UI responsive]\n", "status")] + batch
+
+        # One insert for the whole batch: text1, tags1, text2, tags2, ... (same-tag runs merged)
+        args: list = []
+        run: list[str] = []
+        run_tag = None
+        for text, tag in batch:
+            if run and tag != run_tag:
+                args += ["".join(run), run_tag or ()]
+                run = []
+            run.append(text)
+            run_tag = tag
+        if run:
+            args += ["".join(run), run_tag or ()]
+        self.text.insert(tk.END, *args)
+
+        last_line = int(self.text.index("end-1c").split(".")[0])
+        if last_line > self.max_lines:
+            self.text.delete("1.0", f"{last_line - self.max_lines + 1}.0")
+        self.text.see(tk.END)
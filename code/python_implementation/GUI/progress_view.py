@@ -0,0 +1,93 @@
+# code/python_implementation/GUI/progress_view.py
+import os
+import tkinter as tk
+from tkinter import ttk
+
+# Stages of the PROGRESS: events (see progress_module.STAGES) and their column titles
+STAGES = ("decode", "filterbank", "onsets", "tempo_search", "plots")
+STAGE_TITLES = {
+    "decode": "Decode",
+    "filterbank": "Filterbank",
+    "onsets": "Envelope / diff-rect",
+    "tempo_search": "Comb filters",
+    "plots": "Plots",
+}
+# A streaming run decodes, filters and extracts onsets in one interleaved pass
+STREAM_STAGES = ("decode", "filterbank", "onsets")
+
+
+class ProgressView:
+    """
+    Per-file, per-stage progress of a run: one row per file with a bar per stage and a status
+    column (current stage, percent, elapsed time and a linear ETA for the stage).
+    """
+
+    def __init__(self, parent: tk.Misc) -> None:
+        self.frame = tk.LabelFrame(parent, text="Progress", padx=10, pady=6)
+        self._rows: dict[str, dict] = {}
+        font_small = ("TkDefaultFont", 9)
+        tk.Label(self.frame, text="File", font=font_small, anchor="w").grid(row=0, column=0, sticky="w")
+        for col, stage in enumerate(STAGES, start=1):
+            tk.Label(self.frame, text=STAGE_TITLES[stage], font=font_small).grid(row=0, column=col, padx=4)
+        tk.Label(self.frame, text="Status", font=font_small, anchor="w").grid(row=0, column=len(STAGES) + 1,
+                                                                              sticky="w")
+        self.frame.grid_columnconfigure(len(STAGES) + 1, weight=1)
+
+    def clear(self) -> None:
+        for row in self._rows.values():
+            for widget in row["widgets"]:
+                widget.destroy()
+        self._rows.clear()
+
+    def _row(self, filename: str) -> dict:
+        row = self._rows.get(filename)
+        if row is not None:
+            return row
+        grid_row = len(self._rows) + 1
+        name = tk.Label(self.frame, text=os.path.basename(filename), anchor="w", width=28)
+        name.grid(row=grid_row, column=0, sticky="w")
+        bars = {}
+        for col, stage in enumerate(STAGES, start=1):
+            bars[stage] = ttk.Progressbar(self.frame, mode="determinate", maximum=100, length=110)
+            bars[stage].grid(row=grid_row, column=col, padx=4, pady=2)
+        status = tk.Label(self.frame, text="Waiting...", anchor="w", fg="#555555")
+        status.grid(row=grid_row, column=len(STAGES) + 1, sticky="w")
+        row = {"bars": bars, "status": status, "widgets": [name, status, *bars.values()]}
+        self._rows[filename] = row
+        return row
+
+    def update(self, event: dict) -> None:
+        """
+        Apply one PROGRESS: event ({"file", "stage", "fraction", "elapsed", ...details}).
+        """
+        filename, stage = event.get("file"), event.get("stage")
+        if not filename or not stage:
+            return
+        row = self._row(filename)
+        fraction = float(event.get("fraction", 0.0))
+
+        if stage == "done":
+            if event.get("cached"):
+                for name in ("decode", "filterbank", "onsets", "tempo_search"):
+                    row["bars"][name]["value"] = 100
+            if not event.get("ok", True):
+                row["status"].configure(text="Failed", fg="#7D1E1E")
+            elif event.get("tempo") is not None:
+                note = " (cached)" if event.get("cached") else ""
+                row["status"].configure(text=f"Done: {float(event['tempo']):.2f} BPM{note}", fg="#154360")
+            return
+
+        for name in (STREAM_STAGES if stage == "stream" else (stage,)):
+            if name in row["bars"]:
+                row["bars"][name]["value"] = fraction * 100.0
+        if stage == "plots" and fraction >= 1.0 and row["status"].cget("text").startswith("Done"):
+            return  # background plots finishing after the file's result keep the result shown
+
+        elapsed = float(event.get("elapsed", 0.0))
+        text = f"{STAGE_TITLES.get(stage, stage.capitalize())}"
+        if event.get("bands"):
+            text += f" (band {event.get('band')}/{event['bands']})"
+        text += f": {fraction * 100.0:.0f}%, {elapsed:.1f} s"
+        if 0.0 < fraction < 1.0:
+            text += f", ~{elapsed * (1.0 - fraction) / fraction:.0f} s left"
+        row["status"].configure(text=text, fg="#555555")
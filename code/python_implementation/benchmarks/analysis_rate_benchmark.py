@@ -0,0 +1,52 @@
+# analysis_rate_benchmark.py
+#
+# Compares analysis at the file's native rate against the downsampled analysis rate
+# (--analysis-rate, default 11025 Hz): detected tempo, agreement and throughput.
+#
+# Usage (from code/python_implementation):
+#   python benchmarks/analysis_rate_benchmark.py <files/dirs/globs> [--analysis-rate HZ] [analysis options]
+
+import os
+import sys
+import numpy as np
+import logging
+
+from bench_utils import measure, parse_benchmark_args
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANALYSIS_RATE = 11025
+
+
+def main(argv=None):
+    args, file_paths = parse_benchmark_args(argv)
+    if not file_paths:
+        logger.error("No audio files found in the given inputs.")
+        return 2
+    rate = args.analysis_rate or DEFAULT_ANALYSIS_RATE
+
+    print(f"{'file':<32} {'fs':>6} {'tempo':>8} {'tempo@' + str(rate):>11} {'delta':>7} "
+          f"{'x rt':>7} {'x rt@' + str(rate):>10} {'speedup':>8}")
+    deltas, native_wall, reduced_wall, audio_seconds = [], 0.0, 0.0, 0.0
+    for filename in file_paths:
+        native = measure(filename, args, analysis_rate=None)
+        reduced = measure(filename, args, analysis_rate=rate)
+        delta = reduced["tempo"] - native["tempo"]
+        deltas.append(abs(delta))
+        native_wall += native["seconds"]
+        reduced_wall += reduced["seconds"]
+        audio_seconds += native["duration"]
+        print(f"{os.path.basename(filename)[:32]:<32} {native['fs'] or 0:6d} {native['tempo']:8.2f} "
+              f"{reduced['tempo']:11.2f} {delta:+7.2f} {native['duration'] / native['seconds']:7.1f} "
+              f"{reduced['duration'] / reduced['seconds']:10.1f} {native['seconds'] / reduced['seconds']:7.2f}x",
+              flush=True)
+
+    agree = int(np.sum(np.asarray(deltas) <= args.bpm_step))
+    print(f"files={len(file_paths)} agreement (|delta| <= {args.bpm_step:g} BPM)={agree}/{len(file_paths)} "
+          f"max |delta|={np.nanmax(deltas):.3f} BPM throughput={audio_seconds / native_wall:.1f}x -> "
+          f"{audio_seconds / reduced_wall:.1f}x realtime ({native_wall / reduced_wall:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# bench_utils.py
+#
+# Shared helpers of the benchmark scripts: parse rythm_detection's options, then run
+# analyze_in_memory (or analyze_streaming) under different settings and measure tempo,
+# peak memory and time.
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import tracemalloc
+import numpy as np
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rythm_detection import (_resolve_tempo_defaults, analyze_in_memory, analyze_streaming, build_arg_parser,
+                             expand_inputs)
+from spectrum_cache_module import SPECTRUM_CACHE, configure_spectrum_cache
+# rythm_detection imports the pipeline stages on first use; load them up front so that the
+# first measured file is not charged for the imports
+import comb_filter_module, diff_rect_module, envelope_module, filterbank_module, streaming_module  # noqa: F401,E401
+
+logger = logging.getLogger(__name__)
+
+
+def parse_benchmark_args(argv=None):
+    """
+    Parses rythm_detection's command line (inputs + analysis options).
+
+    Returns:
+        (argparse.Namespace, list[str]): Parsed options and the expanded input files.
+    """
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+    # rythm_detection configures INFO logging on import, which makes basicConfig a no-op
+    logging.getLogger().setLevel(logging.WARNING)
+    args = build_arg_parser().parse_args(argv)
+    _resolve_tempo_defaults(args)
+    configure_spectrum_cache(int(args.spectrum_cache_mb * 1024 * 1024))
+    return args, expand_inputs(args.files, args.file_list)
+
+
+def measure(filename, args, trace_memory=True, keep_analysis=False, **overrides):
+    """
+    Analyzes one file with args updated by overrides, starting from an empty spectrum cache
+    so every setting pays for (and is charged the memory of) its own cached spectra.
+
+    With trace_memory=False the run is not slowed down by tracemalloc (peak_mb is then nan);
+    with keep_analysis the result also holds the tempo_range and per_band_energies.
+
+    Returns:
+        dict: tempo (BPM, nan on failure), peak_mb (traced, including the spectrum cache), cache_mb
+        (spectrum cache held at the end of the run), seconds (wall), duration (audio s), fs,
+        timings (seconds per pipeline stage).
+    """
+    run_args = argparse.Namespace(**{**vars(args), **overrides})
+    analyze = analyze_streaming if run_args.stream else analyze_in_memory
+    SPECTRUM_CACHE.clear()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    analysis = analyze(filename, run_args)
+    seconds = time.perf_counter() - start
+    peak = float("nan")
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    result = {"tempo": float("nan"), "peak_mb": peak / 1e6, "cache_mb": SPECTRUM_CACHE.nbytes / 1e6,
+              "seconds": seconds, "duration": 0.0, "fs": None, "timings": {}}
+    if analysis is not None:
+        total = np.sum(analysis["per_band_energies"], axis=0)
+        result.update(tempo=float(analysis["tempo_range"][int(np.argmax(total))]),
+                      duration=analysis["duration"], fs=analysis["fs"], timings=analysis["timings"])
+        if keep_analysis:
+            result.update(tempo_range=np.asarray(analysis["tempo_range"], dtype=float),
+                          per_band_energies=np.asarray(analysis["per_band_energies"], dtype=float))
+    return result
+
+
+def measure_isolated(filename, args, **overrides):
+    """
+    measure() in a fresh forked process, so the result also carries rss_mb: the peak resident
+    memory of that process, i.e. everything the run held, caches and allocator overhead too,
+    which tracemalloc does not see; rss_base_mb is the process's resident memory before the run
+    (interpreter and imports).
+    """
+    context = multiprocessing.get_context("fork")
+    with context.Pool(1) as pool:
+        return pool.apply(_measure_with_rss, (filename, args), overrides)
+
+
+def _measure_with_rss(filename, args, **overrides):
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KiB on Linux
+    result = measure(filename, args, **overrides)
+    result.update(rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, rss_base_mb=base)
+    return result
@@ -0,0 +1,132 @@
+# matlab_reference.py
+#
+# Straight numpy port of the MATLAB reference implementation (code/matlab_reference_codes:
+# filterbank.m, hwindow.m, diffrect.m, timecomb.m and the recursive search of control.m),
+# kept as an independent yardstick for the Python pipeline. It follows the MATLAB code
+# step by step, including its circular (unpadded) convolutions, its band edges and the
+# index arithmetic of the mirrored half of the spectrum; signals are (samples, bands)
+# arrays like the MATLAB matrices. Only the comb sweep is restructured: the band power
+# spectra are added once instead of once per tempo, and the comb's |DFT|^2 is evaluated in
+# closed form instead of with one FFT per tempo (same sums, different rounding).
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+BANDLIMITS = (0, 200, 400, 800, 1600, 3200)
+MAXFREQ = 4096
+# (acc, half width of the range around the previous level's tempo) of control.m's recursion
+SEARCH_LEVELS = ((0.5, 2.0), (0.1, 0.5), (0.01, 0.1))
+
+
+def filterbank(sig, bandlimits=BANDLIMITS, maxfreq=MAXFREQ):
+    """
+    filterbank.m: splits a time signal into band spectra (one column per band).
+    """
+    dft = np.fft.fft(np.asarray(sig, dtype=float))
+    n = dft.size
+    nbands = len(bandlimits)
+    # 1-based MATLAB bounds, converted below
+    bl = [int(np.floor(bandlimits[i] / maxfreq * n / 2)) + 1 for i in range(nbands)]
+    br = [int(np.floor(bandlimits[i + 1] / maxfreq * n / 2)) for i in range(nbands - 1)] + [n // 2]
+
+    output = np.zeros((n, nbands), dtype=complex)
+    for i in range(nbands):
+        output[bl[i] - 1:br[i], i] = dft[bl[i] - 1:br[i]]
+        output[n - br[i]:n + 1 - bl[i], i] = dft[n - br[i]:n + 1 - bl[i]]
+    output[0, 0] = 0
+    return output
+
+
+def hwindow(sig, winlength=0.4, bandlimits=BANDLIMITS, maxfreq=MAXFREQ):
+    """
+    hwindow.m: full-wave rectifies each band and smooths it with a half-Hanning window
+    (circular convolution through the FFT). Returns the time signals, one column per band.
+    """
+    n = sig.shape[0]
+    hannlen = winlength * 2 * maxfreq
+    if hannlen > n:
+        raise ValueError(f"Signal too short for the window: {n} samples < {hannlen:g}")
+    hann = np.zeros(n)
+    a = np.arange(1, int(np.floor(hannlen)) + 1)
+    hann[a - 1] = np.cos(a * np.pi / hannlen / 2) ** 2
+
+    wave = np.abs(np.real(np.fft.ifft(sig, axis=0)))
+    freq = np.fft.fft(wave, axis=0)
+    return np.real(np.fft.ifft(freq * np.fft.fft(hann)[:, None], axis=0))
+
+
+def diffrect(sig, nbands=6):
+    """
+    diffrect.m: half-wave rectified first difference of each band (from the 5th sample on).
+    """
+    output = np.zeros((sig.shape[0], nbands))
+    output[4:] = np.maximum(np.diff(sig[3:, :nbands], axis=0), 0.0)
+    return output
+
+
+def comb_energies(sig, tempos, maxfreq=MAXFREQ, npulses=3):
+    """
+    Comb energies of timecomb.m at each tempo, summed over bands.
+
+    Parameters:
+        sig (np.ndarray): Output of diffrect, (samples, bands).
+        tempos (np.ndarray): Tempos in BPM.
+        maxfreq (float): Half the sampling rate.
+        npulses (int): Pulses per comb filter.
+
+    Returns:
+        np.ndarray: Energy at each tempo.
+    """
+    n = sig.shape[0]
+    power = np.sum(np.abs(np.fft.fft(sig, axis=0)) ** 2, axis=1)
+    k = np.arange(n)
+    energies = np.empty(len(tempos))
+    for idx, bpm in enumerate(tempos):
+        nstep = int(np.floor(120 / bpm * maxfreq))
+        # |fft(fil)|^2 of npulses unit pulses nstep apart: sum over pulse pairs of cos(2 pi k d nstep / n)
+        comb_power = np.full(n, float(npulses))
+        for d in range(1, npulses):
+            comb_power += 2.0 * (npulses - d) * np.cos(2.0 * np.pi * ((k * (d * nstep)) % n) / n)
+        energies[idx] = np.dot(comb_power, power)
+    return energies
+
+
+def timecomb(sig, acc=1.0, minbpm=60.0, maxbpm=240.0, maxfreq=MAXFREQ):
+    """
+    timecomb.m: tempo (BPM) with the highest comb energy on minbpm:acc:maxbpm.
+
+    Returns:
+        (float, np.ndarray, np.ndarray): The tempo, the swept tempos and their energies.
+    """
+    # MATLAB's colon range includes maxbpm when it falls on the grid
+    tempos = minbpm + acc * np.arange(int(np.floor((maxbpm - minbpm) / acc + 1e-9)) + 1)
+    energies = comb_energies(sig, tempos, maxfreq)
+    return float(tempos[int(np.argmax(energies))]), tempos, energies
+
+
+def onset_bands(signal, fs, winlength=0.4, bandlimits=BANDLIMITS):
+    """
+    filterbank -> hwindow -> diffrect of a mono signal sampled at fs (maxfreq = fs / 2).
+    """
+    maxfreq = fs / 2.0
+    bands = filterbank(signal, bandlimits, maxfreq)
+    return diffrect(hwindow(bands, winlength, bandlimits, maxfreq), len(bandlimits))
+
+
+def reference_tempo(signal, fs, minbpm=60.0, maxbpm=240.0, coarse_acc=2.0, winlength=0.4,
+                    bandlimits=BANDLIMITS):
+    """
+    Tempo of a mono signal with control.m's recursive search: a coarse sweep, then finer
+    sweeps around the previous level's tempo.
+
+    Returns:
+        float: Tempo in BPM.
+    """
+    onsets = onset_bands(signal, fs, winlength, bandlimits)
+    tempo, _, _ = timecomb(onsets, coarse_acc, minbpm, maxbpm, fs / 2.0)
+    for acc, half_width in SEARCH_LEVELS:
+        tempo, _, _ = timecomb(onsets, acc, tempo - half_width, tempo + half_width, fs / 2.0)
+    logger.debug("reference_tempo: %.2f BPM (fs=%d, samples=%d)", tempo, fs, len(signal))
+    return tempo
@@ -0,0 +1,108 @@
+# online_benchmark.py
+#
+# Regression check of the online mode (rythm_detection.py --online): streams synthetic click
+# and drum tracks of known tempo as raw s16le PCM through the CLI with each given
+# --num-impulses, and checks that every run exits cleanly, prints tempo updates and settles on
+# the track's tempo (its last update within --tempo-tolerance BPM). A crash or a wrong final
+# tempo is reported as a FAILURE and exits with 1.
+#
+# Usage (from code/python_implementation):
+#   python benchmarks/online_benchmark.py [--num-impulses-list 2,3,4] [--seconds S] [--tempo-tolerance BPM]
+#       [rythm_detection online options, e.g. --update-ms 1000 --window-seconds 8]
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import logging
+from scipy.io import wavfile
+
+from synthetic_tracks import render_track
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPO_LINE = re.compile(r"^Tempo: (?P<tempo>[-+0-9.naN]+) BPM")
+# (kind, bpm, fs) of each case
+CASES = [("click", 128.0, 22050), ("drum", 97.0, 22050)]
+
+
+def parse_online_args(argv=None):
+    """
+    Splits the check's own options from the rythm_detection options passed to every run.
+    """
+    parser = argparse.ArgumentParser(description="Regression check of the online tempo mode.", add_help=False)
+    parser.add_argument("--num-impulses-list", default="2,3,4",
+                        help="Comma-separated --num-impulses values to run (non-default ones included on purpose).")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Length of the synthetic tracks.")
+    parser.add_argument("--tempo-tolerance", type=float, default=1.0,
+                        help="Max |last update - true tempo| BPM counted as settled.")
+    parser.add_argument("--tracks-dir", default=os.path.join(tempfile.gettempdir(), "rythm_synthetic_tracks"),
+                        help="Where the rendered tracks are kept (shared with pipeline_benchmark.py).")
+    return parser.parse_known_args(argv)
+
+
+def pcm_path(tracks_dir, kind, bpm, fs, seconds):
+    """
+    Raw s16le mono PCM of a synthetic track (rendered on first use).
+    """
+    stem = os.path.join(tracks_dir, f"{kind}_{bpm:g}bpm_{fs}hz_{seconds:g}s")
+    if not os.path.isfile(stem + ".s16le"):
+        if not os.path.isfile(stem + ".wav"):
+            render_track(stem + ".wav", kind, bpm, fs, seconds)
+        _, frames = wavfile.read(stem + ".wav")
+        np.asarray(frames, dtype="<i2").tofile(stem + ".s16le")
+    return stem + ".s16le"
+
+
+def run_online(path, fs, num_impulses, extra_args):
+    """
+    Runs the online CLI on one PCM file; returns (exit code, tempo updates, seconds, stderr tail).
+    """
+    cmd = [sys.executable, os.path.join(ROOT, "rythm_detection.py"), "--online", path, "--sample-rate", str(fs),
+           "--num-impulses", str(num_impulses)] + extra_args
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    tempos = [float(m.group("tempo")) for m in map(TEMPO_LINE.match, proc.stdout.splitlines()) if m]
+    return proc.returncode, tempos, seconds, proc.stderr.strip().splitlines()[-1:]
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+    check_args, extra_args = parse_online_args(argv)
+    impulses = [int(value) for value in check_args.num_impulses_list.split(",") if value.strip()]
+
+    print(f"{'case':<26} {'impulses':>8} {'updates':>7} {'last':>8} {'err':>6} {'seconds':>8}  status")
+    failures = []
+    for kind, bpm, fs in CASES:
+        path = pcm_path(check_args.tracks_dir, kind, bpm, fs, check_args.seconds)
+        name = f"{kind}_{bpm:g}bpm_{fs}hz"
+        for num_impulses in impulses:
+            code, tempos, seconds, stderr_tail = run_online(path, fs, num_impulses, extra_args)
+            last = tempos[-1] if tempos else float("nan")
+            error = abs(last - bpm) if np.isfinite(last) else float("inf")
+            if code != 0:
+                status = f"FAILURE: exit code {code} ({' '.join(stderr_tail)})"
+            elif not tempos:
+                status = "FAILURE: no tempo updates"
+            elif error > check_args.tempo_tolerance:
+                status = f"FAILURE: settled on {last:.2f} BPM"
+            else:
+                status = "ok"
+            if status != "ok":
+                failures.append(f"{name} --num-impulses {num_impulses}: {status}")
+            print(f"{name:<26} {num_impulses:>8d} {len(tempos):>7d} {last:8.2f} {error:6.2f} {seconds:8.2f}  {status}",
+                  flush=True)
+
+    for failure in failures:
+        logger.error("ONLINE %s", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
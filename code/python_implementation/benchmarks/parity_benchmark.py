@@ -0,0 +1,238 @@
+# parity_benchmark.py
+#
+# Cross-engine numerical parity harness. Runs every engine combination of the pipeline
+# (filterbank engine x tempo engine x search, plus the streaming path) and the numpy port
+# of the MATLAB reference (matlab_reference.py) on a shared corpus, and compares each one
+# with a reference combination (by default the fft filterbank / fft comb / grid path):
+#   - agreement of the peak tempo (within --tempo-tolerance BPM),
+#   - Pearson correlation of the total (all-band) energy curves on their common tempos,
+#   - speedup (total wall time of the reference over that of the combination).
+# A combination that disagrees on any file, or whose correlation falls below the minimum, is
+# reported as a MISMATCH and the harness exits with 1, so a fast path can only become a
+# default once it is shown to pick the same tempos. Non-finite energies (e.g. an unstable
+# filter) never count as agreement.
+#
+# The MATLAB port runs at its own rate with its own band edges, so its curves only roughly
+# follow the pipeline's (--matlab-min-correlation), and its comb search is prone to octave
+# errors: for it a tempo at twice or half the reference's counts as agreement ("octave").
+#
+# The corpus is the synthetic suite of pipeline_benchmark.py unless files are given.
+#
+# Usage (from code/python_implementation):
+#   python benchmarks/parity_benchmark.py [files/dirs/globs] [--combos GLOB[,GLOB...]] [--reference COMBO]
+#       [--no-matlab] [rythm_detection analysis options]
+# e.g.
+#   python benchmarks/parity_benchmark.py --reference fft/fft/grid --combos "*/autocorr/*"
+#   python benchmarks/parity_benchmark.py ../music_files --analysis-rate 11025
+
+import argparse
+import fnmatch
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import logging
+
+from bench_utils import measure, parse_benchmark_args
+from pipeline_benchmark import QUICK_SUITE, case_name
+from synthetic_tracks import render_track
+import matlab_reference
+
+from filterbank_module import read_audio, resample_to_rate
+
+logger = logging.getLogger(__name__)
+
+FILTERBANKS = ("iir", "fft", "multirate")
+TEMPO_ENGINES = ("fft", "autocorr")
+SEARCHES = ("grid", "hierarchical")
+# filterbank/tempo_engine/search; the streaming path has its own block-wise filterbank and
+# always sweeps running autocorrelations
+COMBOS = [f"{fb}/{engine}/{search}" for fb in FILTERBANKS for engine in TEMPO_ENGINES for search in SEARCHES] \
+    + [f"stream/autocorr/{search}" for search in SEARCHES]
+MATLAB = "matlab"
+
+
+def combo_overrides(combo, args, coarse_step):
+    filterbank, engine, search = combo.split("/")
+    overrides = {"tempo_engine": engine, "search": search, "stream": filterbank == "stream"}
+    if filterbank != "stream":
+        overrides["filterbank"] = filterbank
+    if search == "hierarchical":
+        overrides["bpm_step"] = coarse_step
+    return overrides
+
+
+def curve_correlation(tempos_a, energies_a, tempos_b, energies_b):
+    """
+    Pearson correlation of two energy curves on the tempos they share (nan if fewer than
+    3 shared tempos, a flat curve or non-finite energies).
+    """
+    _, idx_a, idx_b = np.intersect1d(np.round(tempos_a, 6), np.round(tempos_b, 6), return_indices=True)
+    if idx_a.size < 3:
+        return float("nan")
+    a, b = energies_a[idx_a], energies_b[idx_b]
+    if not (np.all(np.isfinite(a)) and np.all(np.isfinite(b))) or np.ptp(a) == 0 or np.ptp(b) == 0:
+        return float("nan")
+    return float(np.corrcoef(a, b)[0, 1])
+
+
+def run_matlab_reference(filename, args, rate, coarse_step):
+    """
+    Tempo (control.m's recursive search) and total energy curve on the run's tempo grid of the
+    MATLAB port, with the audio resampled to rate (MATLAB's 2 * maxfreq). Only the decode and
+    the tempo search are timed, not the curve computed for the comparison.
+    """
+    start = time.perf_counter()
+    signal, fs = read_audio(filename, downmix=True)
+    signal, fs = resample_to_rate(signal, fs, rate)
+    tempo = matlab_reference.reference_tempo(signal, fs, minbpm=args.min_bpm, maxbpm=args.max_bpm,
+                                             coarse_acc=coarse_step, winlength=args.window_length)
+    seconds = time.perf_counter() - start
+    onsets = matlab_reference.onset_bands(signal, fs, args.window_length)
+    tempo_range = np.arange(args.min_bpm, args.max_bpm, args.bpm_step, dtype=float)
+    return {"tempo": tempo, "seconds": seconds, "tempo_range": tempo_range,
+            "total": matlab_reference.comb_energies(onsets, tempo_range, fs / 2.0, args.num_impulses)}
+
+
+def tempo_agreement(tempo, reference, tolerance, octaves=False):
+    """
+    "exact" if tempo is within tolerance of reference, "octave" if (with octaves) twice or half
+    of it is, else None.
+    """
+    if not (np.isfinite(tempo) and np.isfinite(reference)):
+        return None
+    if abs(tempo - reference) <= tolerance:
+        return "exact"
+    if octaves and min(abs(2.0 * tempo - reference), abs(tempo - 2.0 * reference)) <= 2.0 * tolerance:
+        return "octave"
+    return None
+
+
+def parse_parity_args(argv=None):
+    """
+    Splits the harness's own options from rythm_detection's inputs and analysis options.
+    """
+    parser = argparse.ArgumentParser(description="Cross-engine numerical parity harness.", add_help=False)
+    parser.add_argument("--combos", default="*",
+                        help="Comma-separated globs of the combinations to run (filterbank/tempo_engine/search; "
+                             f"available: {', '.join(COMBOS)}).")
+    parser.add_argument("--reference", default="fft/fft/grid", choices=COMBOS,
+                        help="Combination every other one is compared with.")
+    parser.add_argument("--no-matlab", action="store_true", help="Skip the MATLAB reference port.")
+    parser.add_argument("--matlab-rate", type=int, default=8192,
+                        help="Sampling rate of the MATLAB reference (2 * maxfreq of the MATLAB code).")
+    parser.add_argument("--coarse-step", type=float, default=2.0,
+                        help="Coarse step (BPM) of the hierarchical combinations and of the MATLAB search.")
+    parser.add_argument("--tracks-dir", default=os.path.join(tempfile.gettempdir(), "rythm_synthetic_tracks"),
+                        help="Where the synthetic corpus is kept (shared with pipeline_benchmark.py).")
+    parser.add_argument("--tempo-tolerance", type=float, default=None,
+                        help="Max |tempo - reference tempo| BPM counted as agreement (default: the BPM step).")
+    parser.add_argument("--min-correlation", type=float, default=0.98,
+                        help="Minimum energy-curve correlation with the reference.")
+    parser.add_argument("--matlab-min-correlation", type=float, default=0.3,
+                        help="Minimum energy-curve correlation of the MATLAB port with the reference "
+                             "(it runs at another rate with other band edges).")
+    parity_args, rest = parser.parse_known_args(argv)
+    args, file_paths = parse_benchmark_args(rest)
+    return parity_args, args, file_paths
+
+
+def corpus(parity_args):
+    """
+    Paths of the synthetic corpus (rendered on first use).
+    """
+    paths = []
+    for kind, bpm, fs, seconds in QUICK_SUITE:
+        path = os.path.join(parity_args.tracks_dir, f"{case_name(kind, bpm, fs, seconds)}.wav")
+        if not os.path.isfile(path):
+            render_track(path, kind, bpm, fs, seconds)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parity_args, args, file_paths = parse_parity_args(argv)
+    if args.search != "grid":
+        logger.error("Give the tempo range as a grid (--min-bpm/--max-bpm/--bpm-step); "
+                     "hierarchical combinations use --coarse-step")
+        return 2
+    tolerance = args.bpm_step if parity_args.tempo_tolerance is None else parity_args.tempo_tolerance
+    file_paths = file_paths or corpus(parity_args)
+    patterns = [p.strip() for p in parity_args.combos.split(",") if p.strip()]
+    combos = [parity_args.reference] + [combo for combo in COMBOS if combo != parity_args.reference
+                                        and any(fnmatch.fnmatch(combo, p) for p in patterns)]
+    if not parity_args.no_matlab:
+        combos.append(MATLAB)
+
+    print(f"reference {parity_args.reference}, tempo grid {args.min_bpm:g}..{args.max_bpm:g} step {args.bpm_step:g}, "
+          f"tolerance {tolerance:g} BPM, dtype={args.dtype} analysis_rate={args.analysis_rate}")
+    print(f"{'file':<30} {'combination':<32} {'tempo':>8} {'delta':>7} {'corr':>8} {'seconds':>8} {'speedup':>8}")
+
+    results = {combo: {} for combo in combos}
+    for filename in file_paths:
+        name = os.path.basename(filename)
+        for combo in combos:
+            if combo == MATLAB:
+                result = run_matlab_reference(filename, args, parity_args.matlab_rate, parity_args.coarse_step)
+            else:
+                result = measure(filename, args, trace_memory=False, keep_analysis=True,
+                                 **combo_overrides(combo, args, parity_args.coarse_step))
+                if "per_band_energies" in result:
+                    result["total"] = np.sum(result.pop("per_band_energies"), axis=0)
+            reference = results[parity_args.reference].get(filename, result)
+            result["delta"] = result["tempo"] - reference["tempo"]
+            result["correlation"] = float("nan")
+            if "total" in result and "total" in reference:
+                result["correlation"] = curve_correlation(result["tempo_range"], result["total"],
+                                                          reference["tempo_range"], reference["total"])
+            result["agreement"] = None
+            finite = [np.all(np.isfinite(r.get("total", np.nan))) for r in (result, reference)]
+            if all(finite):
+                result["agreement"] = tempo_agreement(result["tempo"], reference["tempo"], tolerance,
+                                                      octaves=combo == MATLAB)
+            elif combo == parity_args.reference:
+                logger.error("Reference %s gave non-finite energies on %s; compare with a valid combination "
+                             "(--reference)", combo, name)
+            results[combo][filename] = result
+            print(f"{name[:30]:<30} {combo:<32} {result['tempo']:8.2f} {result['delta']:+7.2f} "
+                  f"{result['correlation']:8.4f} {result['seconds']:8.2f} "
+                  f"{reference['seconds'] / result['seconds']:8.2f}", flush=True)
+
+    print(f"\n{'combination':<32} {'agree':>7} {'min corr':>9} {'mean corr':>9} {'seconds':>8} {'speedup':>8}  status")
+    reference_seconds = sum(r["seconds"] for r in results[parity_args.reference].values())
+    failures = []
+    for combo in combos:
+        runs = list(results[combo].values())
+        agree = sum(1 for r in runs if r["agreement"] is not None)
+        octaves = sum(1 for r in runs if r["agreement"] == "octave")
+        correlations = np.array([r["correlation"] for r in runs])
+        # A nan correlation (failed run, non-finite energies) is a failure, never skipped
+        min_corr = float(np.min(correlations)) if runs else float("nan")
+        finite = correlations[np.isfinite(correlations)]
+        mean_corr = float(np.mean(finite)) if finite.size else float("nan")
+        seconds = sum(r["seconds"] for r in runs)
+        problems = []
+        if agree < len(runs):
+            problems.append(f"no tempo agreement on {len(runs) - agree} file(s)")
+        if combo == parity_args.reference:
+            status = "reference" if agree == len(runs) else "INVALID: non-finite energies"
+        else:
+            threshold = parity_args.matlab_min_correlation if combo == MATLAB else parity_args.min_correlation
+            if not min_corr >= threshold:
+                problems.append(f"correlation {min_corr:.4f} < {threshold:g}")
+            status = "MISMATCH: " + "; ".join(problems) if problems else "ok"
+            if octaves:
+                status += f" ({octaves} octave)"
+        if not status.startswith(("ok", "reference")):
+            failures.append(f"{combo}: {status}")
+        print(f"{combo:<32} {agree:>3d}/{len(runs):<3d} {min_corr:9.4f} {mean_corr:9.4f} "
+              f"{seconds:8.2f} {reference_seconds / seconds:8.2f}  {status}")
+
+    for failure in failures:
+        logger.error("PARITY %s", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# pipeline_benchmark.py
+#
+# Synthetic benchmark suite of the in-memory tempo pipeline. Renders click and drum tracks at
+# known tempos, sample rates and durations (synthetic_tracks.py), analyzes each with the given
+# rythm_detection options and reports the detected tempo and its error, wall time per stage
+# and peak traced memory. Accuracy is always judged against the track's known tempo: a case
+# that misses it is a REGRESSION whatever the baseline says. Time and memory are compared with
+# a stored baseline (pipeline_baseline.json, one entry per analysis configuration); an increase
+# beyond the tolerances is a REGRESSION too, and any regression exits with 1.
+#
+# Octave allowance: the cases in OCTAVE_ALLOWED are known to resolve half the true tempo (on
+# the long 128 BPM tracks the 64 BPM comb, whose three impulses fall on every other beat,
+# collects slightly more energy). For those cases only, a tempo at half or twice the true tempo
+# is accepted and reported as "ok (octave)"; any other tempo is still a regression.
+#
+# Baselines are machine specific: record them with --update-baseline on the machine that runs
+# the comparison.
+#
+# Usage (from code/python_implementation):
+#   python benchmarks/pipeline_benchmark.py [--suite quick|full] [--only GLOB] [--update-baseline]
+#       [rythm_detection analysis options]
+# e.g.
+#   python benchmarks/pipeline_benchmark.py --filterbank fft
+#   python benchmarks/pipeline_benchmark.py --suite full --analysis-rate 11025 --dtype float32
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import tempfile
+import numpy as np
+import logging
+
+from bench_utils import measure, parse_benchmark_args
+from synthetic_tracks import TRACK_KINDS, render_track
+
+from rythm_detection import analysis_params
+from result_cache_module import params_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pipeline_baseline.json")
+STAGES = ("decode", "filterbank", "onsets", "tempo_search")
+
+# (kind, bpm, fs, seconds) of each case
+QUICK_SUITE = [(kind, bpm, fs, seconds) for kind in TRACK_KINDS for bpm in (97.0, 128.0)
+               for fs, seconds in ((44100, 10.0), (22050, 60.0))]
+FULL_SUITE = QUICK_SUITE + [(kind, 128.0, fs, seconds) for kind in TRACK_KINDS
+                            for fs, seconds in ((44100, 600.0), (22050, 3600.0))]
+SUITES = {"quick": QUICK_SUITE, "full": FULL_SUITE}
+# Cases allowed to resolve an octave of their true tempo (see the header)
+OCTAVE_ALLOWED = {"click_128bpm_22050hz_60s", "drum_128bpm_22050hz_60s"}
+
+
+def case_name(kind, bpm, fs, seconds):
+    return f"{kind}_{bpm:g}bpm_{fs}hz_{seconds:g}s"
+
+
+def parse_suite_args(argv=None):
+    """
+    Splits the suite's own options from rythm_detection's analysis options.
+    """
+    parser = argparse.ArgumentParser(description="Synthetic benchmark suite of the tempo pipeline.", add_help=False)
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick", help="Set of cases to run.")
+    parser.add_argument("--only", default=None, help="Only run cases whose name matches this glob.")
+    parser.add_argument("--tracks-dir", default=os.path.join(tempfile.gettempdir(), "rythm_synthetic_tracks"),
+                        help="Where the rendered tracks are kept (reused across runs).")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file (JSON).")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store this run's results as the baseline of its configuration.")
+    parser.add_argument("--tempo-tolerance", type=float, default=None,
+                        help="Max |detected - true| BPM counted as accurate (default: the BPM step, "
+                             "or the resolution of the hierarchical search).")
+    parser.add_argument("--time-tolerance", type=float, default=0.5,
+                        help="Allowed relative wall-time increase over the baseline.")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25,
+                        help="Allowed relative peak-memory increase over the baseline.")
+    suite_args, rest = parser.parse_known_args(argv)
+    args, _ = parse_benchmark_args(rest)
+    return suite_args, args
+
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {"version": 1, "configs": {}}
+
+
+def tempo_accuracy(name, tempo, bpm, tolerance):
+    """
+    "exact" if tempo is within tolerance of the true bpm, "octave" if the case is in
+    OCTAVE_ALLOWED and half or twice the tempo is, else None.
+    """
+    if not np.isfinite(tempo):
+        return None
+    if abs(tempo - bpm) <= tolerance:
+        return "exact"
+    if name in OCTAVE_ALLOWED and min(abs(2.0 * tempo - bpm), abs(tempo - 2.0 * bpm)) <= 2.0 * tolerance:
+        return "octave"
+    return None
+
+
+def compare(result, base, suite_args):
+    """
+    Returns the regressions of one case: a miss of the true tempo, and time or memory
+    increases over its baseline entry (if any).
+    """
+    problems = []
+    if not result["accurate"]:
+        problems.append(f"tempo {result['tempo']:.2f} BPM is off the true {result['bpm']:g} BPM by "
+                        f"{result['error']:.2f}")
+    if base is None:
+        return problems
+    # Small absolute slack so that sub-second cases do not flap on timer noise
+    if result["seconds"] > base["seconds"] * (1.0 + suite_args.time_tolerance) + 0.25:
+        problems.append(f"time {result['seconds']:.2f}s vs baseline {base['seconds']:.2f}s")
+    if result["peak_mb"] > base["peak_mb"] * (1.0 + suite_args.memory_tolerance) + 1.0:
+        problems.append(f"peak memory {result['peak_mb']:.1f} MB vs baseline {base['peak_mb']:.1f} MB")
+    return problems
+
+
+def main(argv=None):
+    suite_args, args = parse_suite_args(argv)
+    tolerance = suite_args.tempo_tolerance
+    if tolerance is None:
+        tolerance = args.resolution if args.search == "hierarchical" else args.bpm_step
+    params = analysis_params(args)
+    config = params_hash(params)[:12]
+    baseline = load_baseline(suite_args.baseline)
+    base_cases = baseline["configs"].get(config, {}).get("cases", {})
+    if not base_cases and not suite_args.update_baseline:
+        logger.warning("No baseline for this configuration (%s); reporting without comparison", config)
+
+    cases = [case for case in SUITES[suite_args.suite]
+             if suite_args.only is None or fnmatch.fnmatch(case_name(*case), suite_args.only)]
+    print(f"configuration {config}: filterbank={params['filterbank']} tempo_engine={params['tempo_engine']} "
+          f"search={params['search']} dtype={params['dtype']} analysis_rate={params['analysis_rate']}")
+    print(f"{'case':<30} {'tempo':>7} {'err':>6} {'x rt':>7} {'peak MB':>8} "
+          + " ".join(f"{stage[:10]:>10}" for stage in STAGES) + "  status")
+
+    results, regressions = {}, []
+    for kind, bpm, fs, seconds in cases:
+        name = case_name(kind, bpm, fs, seconds)
+        path = os.path.join(suite_args.tracks_dir, f"{name}.wav")
+        if not os.path.isfile(path):
+            render_track(path, kind, bpm, fs, seconds)
+        result = measure(path, args)
+        error = abs(result["tempo"] - bpm) if np.isfinite(result["tempo"]) else float("inf")
+        accuracy = tempo_accuracy(name, result["tempo"], bpm, tolerance)
+        entry = {"bpm": bpm, "tempo": result["tempo"], "error": error, "accurate": accuracy is not None,
+                 "octave": accuracy == "octave",
+                 "seconds": round(result["seconds"], 4), "peak_mb": round(result["peak_mb"], 2),
+                 "timings": {stage: round(value, 4) for stage, value in result["timings"].items()}}
+        results[name] = entry
+        problems = compare(entry, base_cases.get(name), suite_args)
+        regressions.extend(f"{name}: {problem}" for problem in problems)
+        status = "REGRESSION" if problems else ("ok (octave)" if entry["octave"] else "ok")
+        if name not in base_cases:
+            status += " (new)"
+        print(f"{name:<30} {result['tempo']:7.2f} {error:6.2f} {seconds / result['seconds']:7.1f} "
+              f"{result['peak_mb']:8.1f} "
+              + " ".join(f"{result['timings'].get(stage, float('nan')):10.3f}" for stage in STAGES)
+              + f"  {status}", flush=True)
+
+    accurate = sum(1 for entry in results.values() if entry["accurate"])
+    octaves = sum(1 for entry in results.values() if entry["octave"])
+    print(f"cases={len(results)} accurate={accurate}/{len(results)} ({octaves} allowed octave) "
+          f"(tolerance {tolerance:g} BPM) regressions={len(regressions)}")
+
+    misses = [name for name, entry in results.items() if not entry["accurate"]]
+    if suite_args.update_baseline and misses:
+        # A baseline never records a missed tempo; fix the case or extend OCTAVE_ALLOWED first
+        logger.error("Baseline not updated: %s miss the true tempo", ", ".join(misses))
+        return 1
+    if suite_args.update_baseline:
+        stored = baseline["configs"].setdefault(config, {"params": params, "cases": {}})
+        stored["cases"].update(results)
+        with open(suite_args.baseline, "w", encoding="utf-8") as fp:
+            json.dump(baseline, fp, indent=2, sort_keys=True, default=float)
+            fp.write("\n")
+        logger.warning("Baseline of configuration %s updated: %s", config, suite_args.baseline)
+        return 0
+
+    for regression in regressions:
+        logger.error("REGRESSION %s", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# precision_benchmark.py
+#
+# Compares the float32 analysis mode against float64 on a set of tracks:
+# detected tempo, tempo delta, peak memory and wall time per precision. Each run happens in a
+# fresh process and reports both its peak traced memory (every numpy array, the spectrum
+# cache's entries included; "cache" is what the cache still holds at the end) and its peak RSS,
+# whose ratio is also given above the process's resident memory before the run (imports).
+#
+# Usage (from code/python_implementation):
+#   python benchmarks/precision_benchmark.py <files/dirs/globs> [rythm_detection analysis options]
+# e.g.
+#   python benchmarks/precision_benchmark.py ../music_files --filterbank fft --tempo-engine autocorr
+
+import os
+import sys
+import numpy as np
+import logging
+
+from bench_utils import measure_isolated, parse_benchmark_args
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None):
+    args, file_paths = parse_benchmark_args(argv)
+    if not file_paths:
+        logger.error("No audio files found in the given inputs.")
+        return 2
+
+    print(f"{'file':<32} {'tempo64':>8} {'tempo32':>8} {'delta':>7} {'peak64 MB':>10} {'peak32 MB':>10} "
+          f"{'cache64':>8} {'cache32':>8} {'rss64 MB':>9} {'rss32 MB':>9} {'s64':>6} {'s32':>6}")
+    deltas, ratios, rss_ratios, growth_ratios = [], [], [], []
+    for filename in file_paths:
+        r64 = measure_isolated(filename, args, dtype="float64")
+        r32 = measure_isolated(filename, args, dtype="float32")
+        delta = r32["tempo"] - r64["tempo"]
+        deltas.append(abs(delta))
+        ratios.append(r32["peak_mb"] / r64["peak_mb"] if r64["peak_mb"] else float("nan"))
+        rss_ratios.append(r32["rss_mb"] / r64["rss_mb"])
+        growth_ratios.append((r32["rss_mb"] - r32["rss_base_mb"]) / (r64["rss_mb"] - r64["rss_base_mb"]))
+        print(f"{os.path.basename(filename)[:32]:<32} {r64['tempo']:8.2f} {r32['tempo']:8.2f} {delta:+7.2f} "
+              f"{r64['peak_mb']:10.1f} {r32['peak_mb']:10.1f} {r64['cache_mb']:8.1f} {r32['cache_mb']:8.1f} "
+              f"{r64['rss_mb']:9.1f} {r32['rss_mb']:9.1f} {r64['seconds']:6.2f} {r32['seconds']:6.2f}", flush=True)
+
+    print(f"files={len(file_paths)} max |delta|={np.nanmax(deltas):.3f} BPM "
+          f"mean |delta|={np.nanmean(deltas):.3f} BPM peak memory float32/float64={np.nanmean(ratios):.2f} "
+          f"(traced, cache included) {np.nanmean(rss_ratios):.2f} (process RSS), "
+          f"{np.nanmean(growth_ratios):.2f} (RSS above the pre-run baseline)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# startup_benchmark.py
+#
+# Checks the startup latency of the entry points against benchmarks/startup_budget.json:
+# the cumulative import time of each module (from `python -X importtime`), the set of modules
+# it pulls in (heavy ones are forbidden outright) and the wall time of commands like --help.
+# Exits with 1 when a budget is exceeded or a forbidden module is imported.
+#
+# Usage (from code/python_implementation):
+#   python benchmarks/startup_benchmark.py [--repeat N] [--budget PATH] [--verbose]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+        dict: Module name -> cumulative import time in microseconds.
+    """
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumul, name = line[len("import time:"):].split("|")
+        try:
+            cumulative[name.strip()] = int(cumul)
+        except ValueError:
+            continue  # the header line
+    return cumulative
+
+
+def measure_import(module, repeat):
+    """
+    Imports module in `repeat` fresh interpreters.
+
+    Returns:
+        (float, set[str]): Median cumulative import time (ms) and the modules it imported.
+    """
+    times, imported = [], set()
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        cumulative = parse_importtime(proc.stderr)
+        times.append(cumulative.get(module, 0) / 1000.0)
+        imported = set(cumulative)
+    return statistics.median(times), imported
+
+
+def measure_command(argv, repeat):
+    """
+    Median wall time (ms) of running a script with the current interpreter.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, *argv], cwd=ROOT, capture_output=True, text=True)
+        times.append((time.perf_counter() - start) * 1000.0)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv)} failed:\n{proc.stderr[-2000:]}")
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the startup latency budget of the entry points.")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET, help="Budget file (JSON).")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement (median).")
+    parser.add_argument("--verbose", action="store_true", help="List the slowest imports of each module.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    with open(args.budget, "r", encoding="utf-8") as fp:
+        budget = json.load(fp)
+
+    failures = []
+    print(f"{'entry point':<40} {'median ms':>10} {'budget ms':>10}  status")
+    for module, spec in budget.get("imports", {}).items():
+        median_ms, imported = measure_import(module, args.repeat)
+        forbidden = sorted(name for name in imported for banned in spec.get("forbidden", [])
+                           if name == banned or name.startswith(banned + "."))
+        over = median_ms > spec["budget_ms"]
+        status = "ok" if not (over or forbidden) else "FAIL"
+        print(f"{'import ' + module:<40} {median_ms:10.1f} {spec['budget_ms']:10.1f}  {status}", flush=True)
+        if over:
+            failures.append(f"import {module}: {median_ms:.1f} ms > {spec['budget_ms']} ms")
+        if forbidden:
+            failures.append(f"import {module} pulls in forbidden module(s): {', '.join(forbidden[:10])}")
+        if args.verbose:
+            proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                  cwd=ROOT, capture_output=True, text=True)
+            slowest = sorted(parse_importtime(proc.stderr).items(), key=lambda item: -item[1])[1:11]
+            for name, micros in slowest:
+                print(f"    {name:<36} {micros / 1000.0:10.1f}")
+
+    for label, spec in budget.get("commands", {}).items():
+        median_ms = measure_command(spec["argv"], args.repeat)
+        over = median_ms > spec["budget_ms"]
+        print(f"{label:<40} {median_ms:10.1f} {spec['budget_ms']:10.1f}  {'FAIL' if over else 'ok'}", flush=True)
+        if over:
+            failures.append(f"{label}: {median_ms:.1f} ms > {spec['budget_ms']} ms")
+
+    for failure in failures:
+        logger.error("Startup budget exceeded: %s", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# synthetic_tracks.py
+#
+# Synthetic test tracks with a known tempo: a click track (one tone burst per beat, accented
+# downbeat) and a drum loop (kick on every beat, snare on 2 and 4, hi-hat on eighths, plus a
+# low noise floor). Tracks are rendered chunk by chunk straight into 16-bit mono WAV files, so
+# even hour-long tracks never exist as one float array.
+
+import os
+import wave
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRACK_KINDS = ("click", "drum")
+
+
+def _decay(fs, seconds, tau):
+    t = np.arange(int(seconds * fs)) / float(fs)
+    return t, np.exp(-t / tau)
+
+
+def _voices(kind, bpm, fs, n_samples, rng):
+    """
+    Returns [(hit waveform, onset sample positions)] for every voice of the track.
+    """
+    beat = 60.0 * fs / bpm
+    beats = np.round(np.arange(0.0, n_samples, beat)).astype(np.int64)
+    if kind == "click":
+        t, env = _decay(fs, 0.02, 0.004)
+        click = np.sin(2 * np.pi * 1000.0 * t) * env
+        accent = np.sin(2 * np.pi * 1500.0 * t) * env
+        return [(0.6 * click, beats[np.arange(len(beats)) % 4 != 0]), (0.9 * accent, beats[::4])]
+    if kind == "drum":
+        t, env = _decay(fs, 0.3, 0.08)
+        kick = np.sin(2 * np.pi * (45.0 * t + 60.0 * 0.03 * (1.0 - np.exp(-t / 0.03)))) * env
+        t, env = _decay(fs, 0.2, 0.05)
+        snare = (0.7 * rng.standard_normal(len(t)) + 0.5 * np.sin(2 * np.pi * 185.0 * t)) * env
+        t, env = _decay(fs, 0.05, 0.01)
+        hat = np.diff(rng.standard_normal(len(t) + 1)) * env  # differenced noise: mostly highs
+        eighths = np.round(np.arange(0.0, n_samples, beat / 2.0)).astype(np.int64)
+        return [(0.9 * kick, beats), (0.5 * snare, beats[1::2]), (0.15 * hat, eighths)]
+    raise ValueError(f"Unknown track kind: {kind!r} (expected one of {TRACK_KINDS})")
+
+
+def render_track(path, kind, bpm, fs, duration, seed=0, chunk_seconds=30.0):
+    """
+    Renders a synthetic track to a 16-bit mono WAV file.
+
+    Parameters:
+        path (str): Output WAV path.
+        kind (str): "click" or "drum".
+        bpm (float): Tempo of the track.
+        fs (int): Sampling frequency (Hz).
+        duration (float): Length in seconds.
+        seed (int): Seed of the noise (drum voices and noise floor).
+        chunk_seconds (float): Length of the rendering chunks (bounds memory).
+
+    Returns:
+        str: The path.
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = int(round(duration * fs))
+    voices = _voices(kind, bpm, fs, n_samples, rng)
+    chunk = max(1, int(chunk_seconds * fs))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with wave.open(tmp_path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(int(fs))
+        for start in range(0, n_samples, chunk):
+            stop = min(n_samples, start + chunk)
+            block = np.zeros(stop - start)
+            if kind == "drum":
+                block += 0.003 * rng.standard_normal(len(block))
+            for hit, onsets in voices:
+                # Hits sounding in [start, stop): onset before stop and tail past start
+                first = np.searchsorted(onsets, start - len(hit), side="right")
+                last = np.searchsorted(onsets, stop, side="left")
+                for onset in onsets[first:last]:
+                    lo, hi = max(onset, start), min(onset + len(hit), stop)
+                    block[lo - start:hi - start] += hit[lo - onset:hi - onset]
+            # Headroom for overlapping hits (kick + snare + hi-hat); clipping is only a safety net
+            out.writeframes((np.clip(0.4 * block, -1.0, 1.0) * 32767.0).astype("<i2").tobytes())
+    os.replace(tmp_path, path)
+    logger.info("Rendered %s: %s at %g BPM, fs=%d, %.1fs", path, kind, bpm, fs, duration)
+    return path
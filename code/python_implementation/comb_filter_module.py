@@ -1,9 +1,14 @@
 # comb_filter_module.py
 
 import numpy as np
-from scipy.fft import rfft, next_fast_len  # real FFT for speed/memory
+from scipy.fft import rfft, irfft, next_fast_len  # real FFT for speed/memory
+from scipy.signal import fftconvolve
 import logging
 
+from functools import partial
+
+from profiling_module import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,61 +35,542 @@ def create_comb_filter(fs, tempo, num_impulses=3):
     return comb_filter
 
 
-def analyze_tempo(signal, fs, tempos, num_impulses=3):
+def comb_periods(fs, tempos):
+    """
+    Computes the comb period (in samples) for each tempo, exactly as create_comb_filter does.
+
+    Parameters:
+        fs (int): Sampling frequency.
+        tempos (np.ndarray): Array of tempos (in BPM).
+
+    Returns:
+        np.ndarray: Integer period in samples for each tempo.
+    """
+    tempos = np.asarray(tempos, dtype=float)
+    return np.maximum(1, (fs * 60.0 / tempos).astype(np.int64))
+
+
+def energies_from_autocorr(autocorr, periods, num_impulses=3):
+    """
+    Evaluates comb filter energies for many periods from a single autocorrelation.
+
+    A comb with impulses at 0, P, ..., (K-1)P has |H|^2 = sum_{i,j} exp(-jw(i-j)P), so the
+    energy of the filtered signal is K*R[0] + 2 * sum_{d=1}^{K-1} (K-d) * R[d*P].
+
+    Parameters:
+        autocorr (np.ndarray): Autocorrelation of the signal, indexed by lag (circular lags wrap).
+        periods (np.ndarray): Comb periods in samples (see comb_periods).
+        num_impulses (int): Number of impulses in the comb filters.
+
+    Returns:
+        np.ndarray: Energy for each period.
+    """
+    autocorr = np.asarray(autocorr)
+    periods = np.asarray(periods, dtype=np.int64)
+    energies = np.full(periods.shape, num_impulses * float(autocorr[0]), dtype=float)
+    for d in range(1, num_impulses):
+        energies += 2.0 * (num_impulses - d) * autocorr[(d * periods) % autocorr.size]
+    return energies
+
+
+def analyze_tempo(signal, fs, tempos, num_impulses=3, engine="fft"):
     """
     Analyzes the energy of a signal convolved with comb filters for different tempos.
 
     Parameters:
-        signal (np.ndarray): Input signal (differentiated and rectified).
+        signal (np.ndarray): Input signal (differentiated and rectified); float32 signals
+            are transformed in single precision.
         fs (int): Sampling frequency.
         tempos (np.ndarray): Array of tempos (in BPM) to analyze.
         num_impulses (int): Number of impulses in the comb filters.
+        engine (str): "fft" builds and transforms one comb filter per tempo;
+            "autocorr" computes the signal autocorrelation once and evaluates
+            every tempo with a vectorized lookup (same energies, far cheaper on fine grids).
 
     Returns:
         np.ndarray: Energy of the signal for each tempo.
     """
-    logger.info("analyze_tempo: start (len=%d, fs=%d, tempos=%d..%d BPM, step≈%.3f, num_impulses=%d)",
+    if engine not in ("fft", "autocorr"):
+        raise ValueError(f"Unknown tempo engine: {engine!r} (expected 'fft' or 'autocorr')")
+    logger.info("analyze_tempo: start (len=%d, fs=%d, tempos=%d..%d BPM, step≈%.3f, num_impulses=%d, engine=%s)",
                 np.asarray(signal).size, fs, int(np.min(tempos)), int(np.max(tempos)),
-                float(tempos[1] - tempos[0]) if len(tempos) > 1 else float('nan'), num_impulses)
+                float(tempos[1] - tempos[0]) if len(tempos) > 1 else float('nan'), num_impulses, engine)
+
+    energies = _band_sweeper(signal, fs, float(np.min(tempos)), num_impulses, engine)(tempos)
+
+    best_idx = int(np.argmax(energies)) if energies.size else -1
+    best_tempo = float(tempos[best_idx]) if best_idx >= 0 else float('nan')
+    logger.info("analyze_tempo: done (best_tempo=%.2f BPM, max_energy=%.6e)", best_tempo,
+                float(energies[best_idx]) if best_idx >= 0 else float('nan'))
+    return energies
+
+
+def analyze_tempo_bands(signals, fs, tempos, num_impulses=3, engine="fft"):
+    """
+    analyze_tempo for the band signals of one track (all of the same length).
+
+    With the fft engine the sweep runs tempo by tempo across the bands, so each comb power
+    spectrum is built once and applied to every band instead of once per band.
+
+    Parameters:
+        signals (Sequence[np.ndarray]): Differentiated and rectified signal of each band.
+        fs (int): Sampling frequency.
+        tempos (np.ndarray): Array of tempos (in BPM) to analyze.
+        num_impulses (int): Number of impulses in the comb filters.
+        engine (str): "fft" or "autocorr" (see analyze_tempo).
+
+    Returns:
+        list[np.ndarray]: Energy of each band's signal for each tempo.
+    """
+    if engine not in ("fft", "autocorr"):
+        raise ValueError(f"Unknown tempo engine: {engine!r} (expected 'fft' or 'autocorr')")
+    logger.info("analyze_tempo_bands: start (bands=%d, fs=%d, tempos=%d, num_impulses=%d, engine=%s)",
+                len(signals), fs, len(tempos), num_impulses, engine)
+    sweepers = _band_sweepers(signals, fs, float(np.min(tempos)), num_impulses, engine)
+    return [sweeper(tempos) for sweeper in sweepers]
+
+
+def hierarchical_tempo_search(signals, fs, min_tempo=40.0, max_tempo=240.0, coarse_step=2.0,
+                              resolution=0.05, top_k=3, refine_factor=5.0, num_impulses=3, engine="autocorr"):
+    """
+    Coarse-to-fine tempo search over several band signals (recursive timecomb.m scheme).
+
+    A coarse grid covers [min_tempo, max_tempo]; the top_k peaks of the total (all-band)
+    energy are then refined with a step reduced by refine_factor at each level, within
+    one previous step around each peak, until the step reaches resolution.
+
+    Parameters:
+        signals (Sequence[np.ndarray]): Differentiated and rectified signal of each band.
+        fs (int): Sampling frequency.
+        min_tempo (float): Lowest tempo of the coarse sweep (BPM).
+        max_tempo (float): Highest tempo of the coarse sweep (BPM).
+        coarse_step (float): Step of the coarse sweep (BPM).
+        resolution (float): Final tempo resolution (BPM).
+        top_k (int): Number of total-energy peaks refined at each level.
+        refine_factor (float): Step reduction between consecutive levels.
+        num_impulses (int): Number of impulses in the comb filters.
+        engine (str): Comb sweep engine, "fft" or "autocorr" (see analyze_tempo).
+
+    Returns:
+        (np.ndarray, list[np.ndarray]): Sorted tempos evaluated across all levels and the
+        energies of each band at those tempos.
+    """
+    if engine not in ("fft", "autocorr"):
+        raise ValueError(f"Unknown tempo engine: {engine!r} (expected 'fft' or 'autocorr')")
+    logger.info("hierarchical_tempo_search: start (bands=%d, fs=%d, range=%.2f..%.2f BPM, coarse_step=%.3f, "
+                "resolution=%.3f, top_k=%d, engine=%s)", len(signals), fs, min_tempo, max_tempo,
+                coarse_step, resolution, top_k, engine)
+    # Prepare every band once with the padding of the widest period; all levels reuse it
+    sweepers = _band_sweepers(signals, fs, min_tempo, num_impulses, engine)
+    return coarse_to_fine_search(sweepers, min_tempo, max_tempo, coarse_step, resolution, top_k, refine_factor)
+
+
+def coarse_to_fine_search(sweepers, min_tempo=40.0, max_tempo=240.0, coarse_step=2.0,
+                          resolution=0.05, top_k=3, refine_factor=5.0):
+    """
+    Coarse-to-fine refinement driver shared by the in-memory and streaming paths.
+
+    Parameters:
+        sweepers (Sequence[Callable[[np.ndarray], np.ndarray]]): One callable per band that
+            maps an array of tempos to the band's comb energies at those tempos.
+        min_tempo, max_tempo, coarse_step, resolution, top_k, refine_factor: See hierarchical_tempo_search.
+
+    Returns:
+        (np.ndarray, list[np.ndarray]): Sorted evaluated tempos and the energies of each band.
+    """
+    if resolution <= 0 or coarse_step <= 0 or refine_factor <= 1:
+        raise ValueError("coarse_step and resolution must be positive and refine_factor > 1")
+
+    tempos = np.zeros(0, dtype=float)
+    energies = np.zeros((len(sweepers), 0), dtype=float)
+
+    def evaluate(candidates):
+        nonlocal tempos, energies
+        candidates = np.unique(np.round(candidates, 6))
+        candidates = candidates[(candidates >= min_tempo) & (candidates <= max_tempo)]
+        candidates = candidates[~np.isin(candidates, tempos)]
+        if candidates.size == 0:
+            return
+        with span("search_level", candidates=int(candidates.size)):
+            level = np.array([sweeper(candidates) for sweeper in sweepers]).reshape(len(sweepers), -1)
+        tempos = np.concatenate([tempos, candidates])
+        energies = np.concatenate([energies, level], axis=1)
+        order = np.argsort(tempos)
+        tempos, energies = tempos[order], energies[:, order]
+
+    step = float(coarse_step)
+    evaluate(np.arange(min_tempo, max_tempo + step / 2, step))
+    logger.info("hierarchical_tempo_search: coarse level done (step=%.3f, tempos=%d)", step, tempos.size)
+
+    while step > resolution and tempos.size:
+        next_step = max(float(resolution), step / refine_factor)
+        peaks = _top_peaks(energies.sum(axis=0), top_k)
+        for peak in tempos[peaks]:
+            evaluate(np.arange(peak - step, peak + step + next_step / 2, next_step))
+        logger.info("hierarchical_tempo_search: refined %d peak(s) at step=%.3f (tempos=%d)",
+                    len(peaks), next_step, tempos.size)
+        step = next_step
+
+    total = energies.sum(axis=0)
+    best_tempo = float(tempos[int(np.argmax(total))]) if tempos.size else float('nan')
+    logger.info("hierarchical_tempo_search: done (best_tempo=%.2f BPM, evaluated=%d tempos)", best_tempo, tempos.size)
+    return tempos, list(energies)
+
+
+def accumulate_autocorr(block, autocorr, history):
+    """
+    Adds one block's contribution to a running linear autocorrelation.
+
+    Lags reach back into the previous blocks through history, so after the last block
+    autocorr[l] == sum_n x[n] * x[n + l] over the whole stream for every l < autocorr.size.
+
+    Parameters:
+        block (np.ndarray): Next block of the signal.
+        autocorr (np.ndarray): Running autocorrelation (updated in place), length max_lag + 1.
+        history (np.ndarray): Samples seen before this block (only the last max_lag are used).
+
+    Returns:
+        np.ndarray: Updated history (last max_lag samples including this block).
+    """
+    block = np.asarray(block, dtype=float)
+    max_lag = autocorr.size - 1
+    if block.size == 0:
+        return history
+    if history.size < max_lag:
+        # Before max_lag samples have been seen, missing history is zero (no contribution)
+        history = np.concatenate([np.zeros(max_lag - history.size), history])
+    extended = np.concatenate([history[history.size - max_lag:], block])
+    # correlate(extended, block, 'valid')[k] = sum_n extended[n + k] * block[n], i.e. lag max_lag - k
+    products = fftconvolve(extended, block[::-1], mode="valid")
+    autocorr += products[::-1]
+    return extended[extended.size - max_lag:] if max_lag else extended[:0]
+
+
+def linear_autocorr(signal, max_lag):
+    """
+    Linear (non-circular) autocorrelation of a signal for lags 0..max_lag, via one padded FFT.
+
+    Parameters:
+        signal (np.ndarray): Input signal.
+        max_lag (int): Largest lag to return.
+
+    Returns:
+        np.ndarray: autocorr[l] = sum_n x[n] * x[n + l] for l = 0..max_lag.
+    """
+    signal = np.asarray(signal, dtype=float).ravel()
+    n_fast = next_fast_len(signal.size + max_lag + 1)
+    autocorr = irfft(np.abs(rfft(signal, n=n_fast)) ** 2, n=n_fast)[:max_lag + 1]
+    if autocorr.size < max_lag + 1:
+        autocorr = np.concatenate([autocorr, np.zeros(max_lag + 1 - autocorr.size)])
+    return autocorr
+
+
+def autocorr_tempo_energies(autocorr, fs, tempos, num_impulses=3):
+    """
+    Comb energies at the given tempos from a linear autocorrelation (see accumulate_autocorr).
+
+    The result is scaled by 1/2 to follow the half-spectrum convention of analyze_tempo.
 
-    signal = np.asarray(signal, dtype=float)
+    Parameters:
+        autocorr (np.ndarray): Linear autocorrelation (accumulate_autocorr or linear_autocorr),
+            long enough for (num_impulses - 1) periods.
+        fs (int): Sampling frequency.
+        tempos (np.ndarray): Array of tempos (in BPM) to analyze.
+        num_impulses (int): Number of impulses in the comb filters.
+
+    Returns:
+        np.ndarray: Energy of the signal for each tempo.
+    """
+    periods = comb_periods(fs, tempos)
+    if (num_impulses - 1) * int(periods.max(initial=0)) >= autocorr.size:
+        raise ValueError("Autocorrelation is too short for the slowest tempo requested")
+    return 0.5 * energies_from_autocorr(autocorr, periods, num_impulses)
+
+
+def tempogram(signals, fs, tempos, window_seconds=8.0, hop_seconds=1.0, num_impulses=3):
+    """
+    Comb energies over overlapping windows (tempo over time), summed over bands.
+
+    The signals are cut into hops; for every hop and every lag a comb needs (0 and d*P), the
+    partial autocorrelation sum_{n in hop} x[n] * x[n + lag] is computed once, batched through
+    FFTs. A window's autocorrelation is then the sum of its hops' partial sums (a difference of
+    cumulative sums), so overlapping windows share all their work. Lags reach past the window
+    end into the following samples (as in accumulate_autocorr), so every sample of a window
+    contributes to every lag.
+
+    Parameters:
+        signals (Sequence[np.ndarray]): Differentiated and rectified signal of each band (same length).
+        fs (int): Sampling frequency.
+        tempos (np.ndarray): Array of tempos (in BPM) to analyze.
+        window_seconds (float): Window length, rounded to a whole number of hops.
+        hop_seconds (float): Step between windows.
+        num_impulses (int): Number of impulses in the comb filters.
+
+    Returns:
+        (np.ndarray, np.ndarray): Window centers in seconds and the (windows x tempos) energies,
+        scaled like analyze_tempo's.
+    """
+    signals = [np.asarray(signal, dtype=float).ravel() for signal in signals]
+    n = min(signal.size for signal in signals)
+    hop = max(1, int(round(hop_seconds * fs)))
+    n_hops = max(1, -(-n // hop))
+    hops_per_window = int(min(n_hops, max(1, round(window_seconds * fs / hop))))
+
+    periods = comb_periods(fs, tempos)
+    pulse_lags = np.arange(1, num_impulses)[:, None] * periods[None, :]  # (num_impulses - 1, tempos)
+    lags, lag_index = np.unique(np.concatenate([[0], pulse_lags.ravel()]), return_inverse=True)
+    logger.info("tempogram: start (bands=%d, fs=%d, hop=%d, window=%d hops, lags=%d, max_lag=%d)",
+                len(signals), fs, hop, hops_per_window, lags.size, int(lags[-1]))
+
+    with span("tempogram_hops", hops=n_hops, lags=int(lags.size)):
+        hop_sums = sum(_hop_lag_sums(signal[:n], hop, lags) for signal in signals)
+    # Window sums of the hop partial sums: w covers hops [w, w + hops_per_window)
+    cumulative = np.concatenate([np.zeros((1, lags.size)), np.cumsum(hop_sums, axis=0)])
+    window_autocorr = cumulative[hops_per_window:] - cumulative[:-hops_per_window]
+
+    energies = num_impulses * window_autocorr[:, [lag_index[0]]].repeat(len(periods), axis=1)
+    pulse_index = lag_index[1:].reshape(pulse_lags.shape)
+    for d in range(1, num_impulses):
+        energies += 2.0 * (num_impulses - d) * window_autocorr[:, pulse_index[d - 1]]
+    energies *= 0.5
+
+    times = (np.arange(energies.shape[0]) * hop + 0.5 * min(n, hops_per_window * hop)) / float(fs)
+    logger.info("tempogram: done (windows=%d)", energies.shape[0])
+    return times, energies
+
+
+def _hop_lag_sums(signal, hop, lags, chunk_bytes=32 * 1024 * 1024):
+    """
+    sums[h, j] = sum over n in hop h of signal[n] * signal[n + lags[j]] (zero past the end).
+    """
+    max_lag = int(lags[-1])
+    n_hops = max(1, -(-signal.size // hop))
+    padded = np.zeros(n_hops * hop + max_lag)
+    padded[:signal.size] = signal
+    # Row h: the hop itself followed by the max_lag samples its lags reach (a strided view, no copy)
+    segments = np.lib.stride_tricks.sliding_window_view(padded, hop + max_lag)[::hop]
+    n_fft = next_fast_len(hop + max_lag)
+    rows = max(1, chunk_bytes // (16 * n_fft))
+    sums = np.empty((n_hops, lags.size))
+    for start in range(0, n_hops, rows):
+        block = segments[start:start + rows]
+        # Linear cross-correlation of each hop with its extended segment (n_fft avoids wrap-around)
+        cross = np.conj(rfft(block[:, :hop], n=n_fft, axis=1)) * rfft(block, n=n_fft, axis=1)
+        sums[start:start + rows] = irfft(cross, n=n_fft, axis=1)[:, lags]
+    return sums
+
+
+def smooth_tempo_track(energies, tempos, transition_penalty=4.0):
+    """
+    Smoothed tempo track through a tempogram: the path maximizing the windows' normalized
+    energies minus transition_penalty per octave of tempo change between consecutive windows
+    (Viterbi with an L1 cost on log2 tempo, evaluated in linear time per window).
+
+    Parameters:
+        energies (np.ndarray): (windows x tempos) tempogram.
+        tempos (np.ndarray): Increasing tempos (BPM) of the columns.
+        transition_penalty (float): Cost of a one-octave jump; each window's energies are
+            scaled to [0, 1] first.
+
+    Returns:
+        np.ndarray: Tempo (BPM) of each window.
+    """
+    energies = np.asarray(energies, dtype=float)
+    tempos = np.asarray(tempos, dtype=float)
+    if energies.size == 0:
+        return np.zeros(energies.shape[0])
+    low = energies.min(axis=1, keepdims=True)
+    spread = energies.max(axis=1, keepdims=True) - low
+    scores = (energies - low) / np.where(spread > 0, spread, 1.0)
+    cost = transition_penalty * np.log2(tempos)
+
+    back = np.zeros(energies.shape, dtype=np.int64)
+    total = scores[0].copy()
+    for w in range(1, energies.shape[0]):
+        # best over i <= j of total[i] - cost[j] + cost[i], then over i >= j of total[i] + cost[j] - cost[i]
+        from_below, below_arg = _running_max(total + cost)
+        from_above, above_arg = _running_max((total - cost)[::-1])
+        from_above, above_arg = from_above[::-1], (tempos.size - 1 - above_arg)[::-1]
+        use_below = from_below - cost >= from_above + cost
+        back[w] = np.where(use_below, below_arg, above_arg)
+        total = np.where(use_below, from_below - cost, from_above + cost) + scores[w]
+
+    path = np.empty(energies.shape[0], dtype=np.int64)
+    path[-1] = int(np.argmax(total))
+    for w in range(energies.shape[0] - 1, 0, -1):
+        path[w - 1] = back[w, path[w]]
+    return tempos[path]
+
+
+def _running_max(values):
+    """
+    Running maximum of values and the index where each running maximum was reached.
+    """
+    running = np.maximum.accumulate(values)
+    arg = np.maximum.accumulate(np.where(values >= running, np.arange(values.size), 0))
+    return running, arg
+
+
+def _top_peaks(values, top_k):
+    """
+    Indices of the top_k local maxima of values (plateaus and edges included), highest first.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.size <= 2:
+        return np.argsort(values)[::-1][:top_k]
+    left = np.concatenate([[-np.inf], values[:-1]])
+    right = np.concatenate([values[1:], [-np.inf]])
+    peaks = np.flatnonzero((values >= left) & (values >= right))
+    return peaks[np.argsort(values[peaks])[::-1][:top_k]]
+
+
+def _signal_spectrum(signal, fs, min_tempo):
+    """
+    Real FFT of the signal, zero-padded to an efficient length that fits the widest comb period.
+
+    float32 signals stay in single precision (complex64 spectrum); anything else is float64.
+    """
+    signal = np.asarray(signal)
+    signal = signal.astype(np.float32 if signal.dtype == np.float32 else np.float64, copy=False)
     if signal.ndim != 1:
         signal = signal.ravel()
         logger.debug("analyze_tempo: signal reshaped to 1D (len=%d)", signal.size)
 
     # Determine an efficient FFT length:
-    min_tempo = float(np.min(tempos))
     max_period = max(1, int(fs * 60.0 / min_tempo))  # largest spacing among tempos
     n_desired = signal.size + max_period
     n_fast = next_fast_len(n_desired)
     logger.debug("analyze_tempo: n_desired=%d, n_fast=%d (max_period=%d)", n_desired, n_fast, max_period)
 
     # Compute real FFT of the signal once (reuse for all tempos)
-    signal_freq = rfft(signal, n=n_fast)
+    with span("comb_spectrum", n_fast=n_fast):
+        signal_freq = rfft(signal, n=n_fast)
     logger.debug("analyze_tempo: computed signal FFT (len=%d)", signal_freq.size)
+    return signal_freq, n_fast
+
+
+def _band_sweeper(signal, fs, min_tempo, num_impulses, engine):
+    """
+    Transforms one band signal and returns a callable mapping tempos -> comb energies.
+    """
+    if engine != "autocorr":
+        return _band_sweepers([signal], fs, min_tempo, num_impulses, engine)[0]
+    signal_freq, n_fast = _signal_spectrum(signal, fs, min_tempo)
+
+    with span("autocorr", n_fast=n_fast):
+        power = np.abs(signal_freq)
+        np.square(power, out=power)
+        autocorr = irfft(power, n=n_fast)
+    logger.debug("analyze_tempo: computed autocorrelation (len=%d)", autocorr.size)
+    dc_power, nyquist_power = float(power[0]), float(power[-1])
+    return lambda tempos: _autocorr_energies(autocorr, dc_power, nyquist_power, fs, tempos, num_impulses)
+
+
+def _band_sweepers(signals, fs, min_tempo, num_impulses, engine):
+    """
+    One tempos -> comb energies callable per band signal. The fft engine's callables share one
+    _CombSweep, so every comb spectrum is built once per track rather than once per band.
+    """
+    if engine == "autocorr":
+        return [_band_sweeper(signal, fs, min_tempo, num_impulses, engine) for signal in signals]
+    powers, n_fast = None, None
+    for band, signal in enumerate(signals):
+        signal_freq, n_fast = _signal_spectrum(signal, fs, min_tempo)
+        power = np.abs(signal_freq)
+        del signal_freq
+        if powers is None:
+            powers = np.empty((len(signals), power.size), dtype=power.dtype)  # float32 for complex64 spectra
+        powers[band] = np.square(power, out=power)
+    sweep = _CombSweep(powers, fs, num_impulses, n_fast)
+    return [partial(sweep.band_energies, band) for band in range(len(signals))]
+
+
+class _CombSweep:
+    """
+    Per-tempo comb sweep of several bands' power spectra, evaluated for all bands at once.
+
+    Callers ask band by band for the same tempos (grid sweep, or one refinement level), so the
+    energies of the last tempos asked for are kept and served to the other bands.
+    """
 
-    energies = []
+    def __init__(self, powers, fs, num_impulses, n_fast):
+        self.powers = powers
+        self.fs = fs
+        self.num_impulses = num_impulses
+        self.n_fast = n_fast
+        self._tempos = None
+        self._energies = None
+
+    def band_energies(self, band, tempos):
+        tempos = np.asarray(tempos, dtype=float)
+        if self._tempos is None or not np.array_equal(self._tempos, tempos):
+            self._energies = _sweep_comb_filters(self.powers, self.fs, tempos, self.num_impulses, self.n_fast)
+            self._tempos = tempos.copy()
+        return self._energies[band].copy()
+
+
+def _autocorr_energies(autocorr, dc_power, nyquist_power, fs, tempos, num_impulses):
+    """
+    Batched comb sweep: lookup of the circular autocorrelation at the sweep's FFT length.
+
+    The FFT sweep sums |X*H|^2 over the rfft half-spectrum only, i.e. half the full Parseval
+    energy plus half of the DC (and, for even lengths, Nyquist) terms. Those two bins are
+    added back here so both engines return the same energies.
+    """
+    n_fast = autocorr.size
+    periods = comb_periods(fs, tempos)
+    with span("autocorr_lookup", tempos=len(periods)):
+        energies = energies_from_autocorr(autocorr, periods, num_impulses)
+    energies += num_impulses ** 2 * dc_power / n_fast
+    if n_fast % 2 == 0:
+        # Comb response at Nyquist: sum of (-1)^(m*P) over the impulses
+        nyquist_gain = np.zeros(periods.shape, dtype=float)
+        for m in range(num_impulses):
+            nyquist_gain += np.where((m * periods) % 2 == 0, 1.0, -1.0)
+        energies += nyquist_gain ** 2 * nyquist_power / n_fast
+    return 0.5 * energies
+
+
+def _comb_power_spectrum(period, num_impulses, n_fast, dtype=np.float64):
+    """
+    |H[k]|^2 of a comb with num_impulses unit impulses spaced by period, on an n_fast rFFT grid.
+    """
+    comb_filter = np.zeros(period * (num_impulses - 1) + 1, dtype=dtype)
+    comb_filter[::period] = 1.0
+    comb_power = np.abs(rfft(comb_filter, n=n_fast))
+    return np.square(comb_power, out=comb_power)
+
+
+def _sweep_comb_filters(signal_powers, fs, tempos, num_impulses, n_fast):
+    """
+    Per-tempo comb sweep: measure the comb-filtered energy of every band for each tempo.
+
+    Each comb power spectrum is built once, applied to all bands (rows of signal_powers, the
+    |X[k]|^2 of their rFFTs) and dropped, so the sweep holds a single comb spectrum at a time.
+    Tempos sharing a period reuse the previous spectrum.
+
+    Returns:
+        np.ndarray: Energies, bands x tempos.
+    """
+    energies = np.empty((signal_powers.shape[0], len(tempos)), dtype=float)
     # We can compute the energy directly in the frequency domain using Parseval's theorem,
     # avoiding an inverse FFT for each tempo.
     scale = 1.0 / n_fast  # Parseval scaling for numpy/scipy FFT conventions
+    dtype = signal_powers.dtype  # float32 for complex64 spectra
 
-    for i, tempo in enumerate(tempos):
-        # Create comb filter and transform with the same FFT length
-        comb_filter = create_comb_filter(fs, float(tempo), num_impulses)
-        comb_filter_freq = rfft(comb_filter, n=n_fast)
+    periods = comb_periods(fs, np.asarray(tempos, dtype=float))
+    comb_power, comb_period = None, None
+    for i, (tempo, period) in enumerate(zip(tempos, periods)):
+        period = int(period)
+        with span("comb_tempo", cat="tempo", tempo=float(tempo), period=period):
+            if period != comb_period:
+                comb_power, comb_period = _comb_power_spectrum(period, num_impulses, n_fast, dtype), period
 
-        # Energy of the convolution in time domain equals (1/N) * sum |X[k]*H[k]|^2
-        yh_mag2 = np.abs(signal_freq * comb_filter_freq) ** 2
-        energy = float(np.sum(yh_mag2) * scale)
-        energies.append(energy)
+            # Energy of the convolution in time domain equals (1/N) * sum |X[k]|^2 |H[k]|^2
+            energies[:, i] = (signal_powers @ comb_power) * scale
 
         if i % max(1, len(tempos)//10) == 0 or i == len(tempos) - 1:
-            logger.debug("analyze_tempo: tempo=%.2f BPM -> energy=%.6e (%d/%d)",
-                         float(tempo), energy, i + 1, len(tempos))
+            logger.debug("analyze_tempo: tempo=%.2f BPM -> total energy=%.6e (%d/%d)",
+                         float(tempo), float(energies[:, i].sum()), i + 1, len(tempos))
 
-    energies = np.array(energies, dtype=float)
-    best_idx = int(np.argmax(energies)) if energies.size else -1
-    best_tempo = float(tempos[best_idx]) if best_idx >= 0 else float('nan')
-    logger.info("analyze_tempo: done (best_tempo=%.2f BPM, max_energy=%.6e)", best_tempo,
-                float(energies[best_idx]) if best_idx >= 0 else float('nan'))
     return energies
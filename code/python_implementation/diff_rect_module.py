@@ -14,7 +14,7 @@ def diff_rect(signal, fs):
         fs (int): Sampling frequency of the signal.
 
     Returns:
-        np.ndarray: The differentiated and half-wave rectified signal.
+        np.ndarray: The differentiated and half-wave rectified signal (same float precision as the input).
     """
     signal = np.asarray(signal)
     n = signal.size
@@ -25,9 +25,28 @@ def diff_rect(signal, fs):
     logger.debug("diff_rect: differentiated (len=%d)", differentiated_signal.size)
 
     # Half-wave rectification (keep only positive values)
-    half_wave_rectified_signal = np.maximum(differentiated_signal, 0)
+    half_wave_rectified_signal = np.maximum(differentiated_signal, 0, out=differentiated_signal)
     logger.debug("diff_rect: half-wave rectified (len=%d, nonzero=%d)",
                  half_wave_rectified_signal.size, int(np.count_nonzero(half_wave_rectified_signal)))
 
     logger.info("diff_rect: done (len=%d, fs=%d)", half_wave_rectified_signal.size, fs)
     return half_wave_rectified_signal
+
+def diff_rect_block(block, previous=None):
+    """
+    Differentiates and half-wave rectifies one block, carrying the last sample between blocks.
+
+    Concatenating the outputs over all blocks reproduces diff_rect on the whole signal.
+
+    Parameters:
+        block (np.ndarray): Next block of the input signal (envelope).
+        previous (float | None): Last sample of the previous block (None for the first block).
+
+    Returns:
+        (np.ndarray, float): Differentiated and rectified block, and its last input sample.
+    """
+    block = np.asarray(block)
+    if block.size == 0:
+        return block, previous
+    differentiated = np.diff(block, prepend=block[0] if previous is None else previous)
+    return np.maximum(differentiated, 0, out=differentiated), block[-1]
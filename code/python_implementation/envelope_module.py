@@ -1,18 +1,100 @@
 # envelope_module.py
 
 import numpy as np
-from scipy.signal import get_window
-from numpy.fft import fft, ifft
+from scipy.signal import get_window, fftconvolve
+from scipy.fft import rfft, irfft, next_fast_len
 import logging
 
+from functools import partial
+
+from spectrum_cache_module import SPECTRUM_CACHE
+
 logger = logging.getLogger(__name__)
 
+def half_hanning_window(fs, window_length=0.4):
+    """
+    Builds the rising half of a Hanning window of window_length seconds.
+
+    Parameters:
+        fs (int): Sampling frequency of the signal.
+        window_length (float): Length of the full Hanning window in seconds.
+
+    Returns:
+        np.ndarray: The half Hanning window.
+    """
+    window_samples = int(window_length * fs) // 2  # Use half-window length
+    if window_samples <= 0:
+        logger.warning("Computed window_samples <= 0 (window_length=%.3f, fs=%d). Forcing to 1.", window_length, fs)
+        window_samples = 1
+    hanning_window = get_window('hann', window_samples * 2)
+    half_window = hanning_window[:window_samples]
+    logger.debug("Half Hanning window created (samples=%d)", half_window.size)
+    return half_window
+
+def envelope_block(block, half_window, tail=None):
+    """
+    Envelope of one block (overlap-add), carrying the convolution tail into the next block.
+
+    Concatenating the outputs over all blocks reproduces get_envelope on the whole signal.
+
+    Parameters:
+        block (np.ndarray): Next block of the input signal.
+        half_window (np.ndarray): Window from half_hanning_window.
+        tail (np.ndarray | None): Tail returned by the previous call (None for the first block).
+
+    Returns:
+        (np.ndarray, np.ndarray): Envelope of the block and the tail for the next block.
+    """
+    rectified_block = np.abs(np.asarray(block))
+    convolved = fftconvolve(rectified_block, half_window)
+    if tail is not None:
+        convolved[:tail.size] += tail
+    return convolved[:rectified_block.size], convolved[rectified_block.size:]
+
+def get_envelope_from_spectrum(band_spectrum, n_fft, n, fs, window_length=0.4):
+    """
+    Envelope of a band given as an rfft spectrum (see filterbank_module.fft_band_spectra),
+    as in matlab_reference_codes/hwindow.m. The band is transformed back once for the
+    rectification; the window convolution reuses n_fft when it is long enough.
+
+    Parameters:
+        band_spectrum (np.ndarray): rfft of the band signal at length n_fft.
+        n_fft (int): Transform length of band_spectrum.
+        n (int): Length of the original signal.
+        fs (int): Sampling frequency of the signal.
+        window_length (float): Length of the Hanning window in seconds.
+
+    Returns:
+        np.ndarray: The envelope of the band (length n), equal to get_envelope on the band signal.
+    """
+    # irfft returns a fresh array (float32 for complex64 spectra): rectify it in place
+    band_signal = irfft(band_spectrum, n=n_fft)
+    rectified_signal = np.abs(band_signal, out=band_signal)[:n]
+    half_window = half_hanning_window(fs, window_length)
+
+    # Linear convolution needs n + len(window) - 1 points; keep the filterbank length when it fits
+    conv_len = n + half_window.size - 1
+    fft_len = n_fft if n_fft >= conv_len else next_fast_len(conv_len)
+    envelope_freq = rfft(rectified_signal, n=fft_len)
+    del band_signal, rectified_signal
+    envelope_freq *= _window_spectrum(half_window, fs, window_length, fft_len, envelope_freq.real.dtype)
+    envelope = irfft(envelope_freq, n=fft_len)[:n]
+    logger.debug("Envelope from spectrum done (len=%d, fft_len=%d)", envelope.size, fft_len)
+    return envelope
+
+def _window_spectrum(half_window, fs, window_length, fft_len, dtype):
+    """
+    rfft of the half window at fft_len and the given precision, shared across the bands of a file.
+    """
+    return SPECTRUM_CACHE.get_or_create(("half_hanning_rfft", fs, window_length, fft_len, np.dtype(dtype).name),
+                                        partial(rfft, half_window.astype(dtype), n=fft_len))
+
 def get_envelope(signal, fs, window_length=0.4):
     """
     Extracts the envelope of a signal using full-wave rectification and convolution with a Hanning window.
     
     Parameters:
-        signal (np.ndarray): The input signal.
+        signal (np.ndarray): The input signal (float32 input is processed in single precision).
         fs (int): Sampling frequency of the signal.
         window_length (float): Length of the Hanning window in seconds.
         
@@ -20,6 +102,8 @@ def get_envelope(signal, fs, window_length=0.4):
         np.ndarray: The envelope of the input signal.
     """
     signal = np.asarray(signal)
+    if signal.dtype != np.float32:
+        signal = signal.astype(np.float64, copy=False)
     n = signal.size
     logger.debug("get_envelope: start (len=%d, fs=%d, window_length=%.3fs)", n, fs, window_length)
 
@@ -28,25 +112,20 @@ def get_envelope(signal, fs, window_length=0.4):
     logger.debug("Rectified signal computed (len=%d)", rectified_signal.size)
 
     # Create half Hanning window
-    window_samples = int(window_length * fs) // 2  # Use half-window length
-    if window_samples <= 0:
-        logger.warning("Computed window_samples <= 0 (window_length=%.3f, fs=%d). Forcing to 1.", window_length, fs)
-        window_samples = 1
-    hanning_window = get_window('hann', window_samples * 2)
-    half_window = hanning_window[:window_samples]
-    logger.debug("Half Hanning window created (samples=%d)", half_window.size)
+    half_window = half_hanning_window(fs, window_length)
 
-    # Convolve in the frequency domain
-    fft_len = rectified_signal.size + half_window.size - 1
+    # Convolve in the frequency domain (real transforms: half the spectrum of a complex fft)
+    fft_len = next_fast_len(rectified_signal.size + half_window.size - 1)
     logger.debug("FFT length for convolution: %d", fft_len)
-    signal_freq = fft(rectified_signal, n=fft_len)
-    window_freq = fft(half_window, n=fft_len)
-    envelope_freq = signal_freq * window_freq
-    envelope = np.real(ifft(envelope_freq))
+    envelope_freq = rfft(rectified_signal, n=fft_len)
+    del rectified_signal
+    # The window spectrum only depends on (fs, window_length, fft_len, dtype): shared across bands
+    envelope_freq *= _window_spectrum(half_window, fs, window_length, fft_len, signal.dtype)
+    envelope = irfft(envelope_freq, n=fft_len)
     logger.debug("IFFT completed (len=%d)", envelope.size)
 
     # Trim the result to the original signal length
-    envelope = envelope[:len(rectified_signal)]
+    envelope = envelope[:n]
     logger.debug("Envelope trimmed to original length (len=%d)", envelope.size)
 
     logger.info("Envelope extraction done (len=%d, fs=%d, window_length=%.3fs)", envelope.size, fs, window_length)
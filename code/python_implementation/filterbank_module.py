@@ -1,46 +1,374 @@
+import os
+import subprocess
+import tempfile
+from fractions import Fraction
+from functools import lru_cache
 import numpy as np
-from scipy.signal import butter, lfilter
-from pydub import AudioSegment
+from scipy.fft import rfft, irfft, next_fast_len
+from scipy.io import wavfile
+from scipy.signal import butter, resample_poly, sosfilt
 import logging
 
+try:
+    import soundfile  # optional: native FLAC/OGG decoding through libsndfile (no subprocess)
+except ImportError:
+    soundfile = None
+
 logger = logging.getLogger(__name__)
 
-def butter_bandpass(lowcut, highcut, fs, order=5):
-    nyquist = 0.5 * fs
-    low = lowcut / nyquist
-    high = highcut / nyquist
-    b, a = butter(order, [low, high], btype='band')
-    logger.debug("Designed bandpass filter: low=%.3fHz high=%.3fHz fs=%d order=%d (normalized: [%.6f, %.6f])",
-                 lowcut, highcut, fs, order, low, high)
-    return b, a
+# Filter designs only depend on (lowcut, highcut, fs, order): design each one once per
+# process and share it across bands, blocks and files. Callers get copies of the cached
+# coefficients (a few dozen floats), so nothing can modify the shared design.
+# Bandpasses are only ever designed as second-order sections: the (b, a) form of the same
+# Butterworth design has poles outside the unit circle (after rounding) for the low bands.
+@lru_cache(maxsize=256)
+def _butter_bandpass_sos_design(lowcut, highcut, fs, order):
+    sos = butter(order, [lowcut, highcut], btype='band', fs=fs, output='sos')
+    logger.debug("Designed bandpass SOS filter: low=%.3fHz high=%.3fHz fs=%.3f order=%d sections=%d",
+                 lowcut, highcut, fs, order, len(sos))
+    return sos
 
 def bandpass_filter(data, lowcut, highcut, fs, order=5):
-    b, a = butter_bandpass(lowcut, highcut, fs, order=order)
-    y = lfilter(b, a, data)
+    y = sosfilt(butter_bandpass_sos(lowcut, highcut, fs, order), data)
     logger.debug("Applied bandpass filter: low=%.3fHz high=%.3fHz fs=%d order=%d len=%d",
                  lowcut, highcut, fs, order, len(y))
     return y
 
-def create_filterbank(signal, fs, bands, order=5):
-    logger.info("Creating filterbank with %d band(s), fs=%d, order=%d", len(bands), fs, order)
+def create_filterbank(signal, fs, bands, order=5, engine="iir", dtype=np.float64):
+    """
+    Splits a signal into bands. dtype=np.float32 runs every engine in single precision
+    (half the memory per band). The iir engine filters with second-order sections: the
+    (b, a) form of the same Butterworth design is unstable for the lowest band (non-finite
+    output at audio rates) and not usable at all in float32.
+    """
+    if engine == "fft":
+        return create_filterbank_fft(signal, fs, bands, dtype=dtype)
+    if engine == "multirate":
+        return create_filterbank_multirate(signal, fs, bands, order, dtype=dtype)
+    if engine != "iir":
+        raise ValueError(f"Unknown filterbank engine: {engine!r} (expected 'iir', 'fft' or 'multirate')")
+    logger.info("Creating filterbank with %d band(s), fs=%d, order=%d, dtype=%s", len(bands), fs, order,
+                np.dtype(dtype).name)
+    signal = np.asarray(signal, dtype=dtype)
     filtered_signals = []
     for idx, (lowcut, highcut) in enumerate(bands, start=1):
         logger.info("  Band %d/%d: %.3f-%.3f Hz", idx, len(bands), lowcut, highcut)
-        filtered_signal = bandpass_filter(signal, lowcut, highcut, fs, order)
+        filtered_signal = sosfilt(butter_bandpass_sos(lowcut, highcut, fs, order).astype(dtype, copy=False), signal)
         logger.debug("  Band %d output length: %d", idx, len(filtered_signal))
         filtered_signals.append(filtered_signal)
     logger.info("Filterbank created.")
     return filtered_signals
 
-def read_mp3(filename):
+def butter_bandpass_sos(lowcut, highcut, fs, order=5):
+    return _butter_bandpass_sos_design(lowcut, highcut, fs, order).copy()
+
+def create_filterbank_multirate(signal, fs, bands, order=5, oversampling=2.5, dtype=np.float64):
+    """
+    Drop-in alternative to create_filterbank that filters each band at a reduced rate.
+
+    The signal is decimated by successive factors of 2 (anti-aliased polyphase FIR) down to
+    the lowest rate still above oversampling * the band's upper edge. The band is filtered
+    there with second-order sections, which stay stable at low normalized cutoffs, and is
+    interpolated back to fs so the output matches create_filterbank in length and rate.
+
+    Parameters:
+        signal (np.ndarray): Input signal.
+        fs (int): Sampling frequency.
+        bands (list[tuple[float, float]]): (low, high) limits of each band in Hz.
+        order (int): Butterworth filter order.
+        oversampling (float): Minimum ratio between the reduced rate and the band's upper edge.
+        dtype (np.dtype): Working precision (np.float64 or np.float32).
+
+    Returns:
+        list[np.ndarray]: Band-filtered signals at the original rate.
+    """
+    logger.info("Creating multirate filterbank with %d band(s), fs=%d, order=%d", len(bands), fs, order)
+    n = len(signal)
+    decimated = {1: np.asarray(signal, dtype=dtype)}  # decimation factor -> signal at fs / factor
+    filtered_signals = []
+    for idx, (lowcut, highcut) in enumerate(bands, start=1):
+        factor = 1
+        while fs / (2 * factor) >= oversampling * highcut:
+            factor *= 2
+        for level in (2 ** k for k in range(1, factor.bit_length())):
+            if level not in decimated:
+                decimated[level] = resample_poly(decimated[level // 2], 1, 2)
+        sos = butter_bandpass_sos(lowcut, highcut, fs / factor, order).astype(dtype, copy=False)
+        band = sosfilt(sos, decimated[factor])
+        if factor > 1:
+            band = resample_poly(band, factor, 1)[:n]
+        logger.info("  Band %d/%d: %.3f-%.3f Hz at fs=%.1f (decimation %d)",
+                    idx, len(bands), lowcut, highcut, fs / factor, factor)
+        filtered_signals.append(band)
+    logger.info("Multirate filterbank created.")
+    return filtered_signals
+
+def fft_band_spectra(signal, fs, bands, n_fft=None, dtype=np.float64):
+    """
+    Splits a signal into bands with a single real FFT by zeroing bins outside each band
+    (port of matlab_reference_codes/filterbank.m). Band k keeps bins with low <= f < high;
+    the DC bin is always dropped.
+
+    Parameters:
+        signal (np.ndarray): Input signal.
+        fs (int): Sampling frequency.
+        bands (list[tuple[float, float]]): (low, high) limits of each band in Hz.
+        n_fft (int | None): Transform length (>= len(signal)); zero padding avoids wrap-around
+            in later frequency-domain stages. Defaults to next_fast_len(len(signal)).
+        dtype (np.dtype): Working precision; np.float32 yields complex64 spectra.
+
+    Returns:
+        (list[np.ndarray], int): rfft-domain spectrum of each band and the transform length.
+    """
+    signal = np.asarray(signal, dtype=dtype)
+    n_fft = next_fast_len(signal.size) if n_fft is None else int(n_fft)
+    logger.info("Creating FFT filterbank with %d band(s), fs=%d, n_fft=%d", len(bands), fs, n_fft)
+    spectrum = rfft(signal, n=n_fft)
+    band_spectra = []
+    for idx, (lowcut, highcut) in enumerate(bands, start=1):
+        lo_bin = max(1, int(np.floor(lowcut * n_fft / fs)))
+        hi_bin = min(spectrum.size, int(np.floor(highcut * n_fft / fs)))
+        band_spectrum = np.zeros_like(spectrum)
+        band_spectrum[lo_bin:hi_bin] = spectrum[lo_bin:hi_bin]
+        logger.debug("  FFT band %d: %.3f-%.3f Hz -> bins [%d, %d)", idx, lowcut, highcut, lo_bin, hi_bin)
+        band_spectra.append(band_spectrum)
+    return band_spectra, n_fft
+
+def create_filterbank_fft(signal, fs, bands, dtype=np.float64):
+    """
+    Drop-in alternative to create_filterbank built on fft_band_spectra (zero-phase, brick-wall bands).
+    """
+    n = len(signal)
+    band_spectra, n_fft = fft_band_spectra(signal, fs, bands, dtype=dtype)
+    filtered_signals = [irfft(band_spectrum, n=n_fft)[:n] for band_spectrum in band_spectra]
+    logger.info("FFT filterbank created.")
+    return filtered_signals
+
+def design_filterbank(fs, bands, order=5):
+    """
+    Designs the bandpass filter of every band once, for block-wise filtering, as second-order
+    sections: the (b, a) form of the lowest band is numerically unstable at audio rates.
+    """
+    return [butter_bandpass_sos(lowcut, highcut, fs, order=order) for lowcut, highcut in bands]
+
+def filterbank_block(block, designs, states=None):
+    """
+    Filters one block through every band, carrying the sosfilt state between blocks.
+
+    Parameters:
+        block (np.ndarray): Next block of the input signal.
+        designs (list[np.ndarray]): Second-order sections of each band (see design_filterbank).
+        states (list[np.ndarray] | None): Filter states returned by the previous call (None for the first block).
+
+    Returns:
+        (list[np.ndarray], list[np.ndarray]): Filtered block of each band and the updated states.
+    """
+    if states is None:
+        # Zero initial conditions (shaped like sosfilt_zi), as sosfilt uses on a whole signal
+        states = [np.zeros((sos.shape[0], 2)) for sos in designs]
+    outputs, new_states = [], []
+    for sos, zi in zip(designs, states):
+        y, zf = sosfilt(sos, block, zi=zi)
+        outputs.append(y)
+        new_states.append(zf)
+    return outputs, new_states
+
+def stream_audio_blocks(filename, block_size=65536, downmix=False, analysis_rate=None):
+    """
+    Decodes an audio file through ffmpeg in fixed-size blocks instead of loading it whole.
+
+    Like read_mp3, stereo input keeps only the left channel unless downmix is set. With
+    downmix and/or analysis_rate, ffmpeg itself mixes the channels and resamples while decoding.
+    WAV files that need no resampling are sliced straight from a memory map instead.
+
+    Returns:
+        (int, Iterator[np.ndarray]): Sampling frequency of the blocks and a generator of sample blocks.
+        The generator raises RuntimeError at the end of the stream if ffmpeg failed or decoded
+        nothing, so a corrupt or truncated file is not analyzed as silence or a prefix.
+    """
+    logger.info("Streaming audio: %s (block_size=%d)", filename, block_size)
+    if os.path.splitext(filename)[1].lower() == ".wav":
+        try:
+            fs, frames = wavfile.read(filename, mmap=True)
+        except ValueError:
+            frames = None  # not memory-mappable (e.g. 24-bit); let ffmpeg decode it
+        if frames is not None and not (analysis_rate and analysis_rate < fs):
+            logger.info("Streaming memory-mapped WAV: fs=%d samples=%d", fs, len(frames))
+            return fs, (_to_mono(frames[i:i + block_size], downmix) for i in range(0, len(frames), block_size))
+
+    from pydub import AudioSegment
+    from pydub.utils import mediainfo
+
+    info = mediainfo(filename)
+    if not info.get("sample_rate"):
+        raise ValueError(f"Could not determine the sample rate of: {filename}")
+    fs = int(info["sample_rate"])
+    channels = int(info.get("channels") or 1)
+    logger.info("Stream info: channels=%d fs=%d duration=%ss", channels, fs, info.get("duration", "?"))
+
+    cmd = [AudioSegment.converter, "-v", "error", "-i", filename]
+    if downmix and channels > 1:
+        cmd += ["-ac", "1"]
+        channels = 1
+    if analysis_rate and analysis_rate < fs:
+        cmd += ["-ar", str(int(analysis_rate))]
+        fs = int(analysis_rate)
+        logger.info("Stream resampled by ffmpeg to fs=%d", fs)
+    cmd += ["-f", "s16le", "-acodec", "pcm_s16le", "-"]
+    # stderr goes to a file rather than a pipe, so a flood of decoder errors cannot block ffmpeg
+    stderr = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+    frame_bytes = 2 * channels
+
+    def blocks():
+        n_samples = 0
+        finished = False
+        try:
+            while True:
+                raw = proc.stdout.read(block_size * frame_bytes)
+                if not raw:
+                    break
+                data = np.frombuffer(raw[:len(raw) - len(raw) % frame_bytes], dtype=np.int16)
+                n_samples += len(data) // channels
+                yield data.reshape((-1, channels))[:, 0]
+            finished = True
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            returncode = proc.wait()
+            stderr.seek(0)
+            message = stderr.read().decode("utf-8", errors="replace").strip()
+            stderr.close()
+            # Only a stream read to its end is checked; a consumer closing early kills ffmpeg on purpose
+            if finished and returncode != 0:
+                raise RuntimeError(f"ffmpeg failed to decode {filename} (exit code {returncode}): "
+                                   f"{message[-2000:] or 'no error output'}")
+            if finished and n_samples == 0:
+                raise RuntimeError(f"ffmpeg decoded no samples from {filename}: {message[-2000:] or 'empty stream'}")
+
+    return fs, blocks()
+
+def downmix_channels(frames):
+    """
+    Averages interleaved-channel frames of shape (samples, channels) to one float channel.
+    """
+    frames = np.asarray(frames)
+    if frames.ndim == 1:
+        return frames
+    return frames.mean(axis=1)
+
+def resample_to_rate(signal, fs, analysis_rate=None):
+    """
+    Resamples a signal to the analysis rate with an anti-aliased polyphase filter.
+
+    Every band of get_scheirer_bands lies below 5 kHz, so e.g. 11025 Hz keeps all of them
+    while the later stages process 4x fewer samples than at 44.1 kHz. Rates at or above fs
+    leave the signal unchanged (no upsampling).
+
+    Parameters:
+        signal (np.ndarray): Mono input signal.
+        fs (int): Sampling frequency of the input.
+        analysis_rate (int | None): Target rate in Hz (None keeps fs).
+
+    Returns:
+        (np.ndarray, int): The resampled signal and its sampling frequency.
+    """
+    if not analysis_rate or analysis_rate >= fs:
+        return signal, fs
+    ratio = Fraction(int(analysis_rate), int(fs)).limit_denominator(1000)
+    resampled = resample_poly(np.asarray(signal, dtype=float), ratio.numerator, ratio.denominator)
+    new_fs = int(round(fs * ratio.numerator / ratio.denominator))
+    logger.info("Resampled: fs=%d -> %d (up=%d, down=%d), samples=%d -> %d",
+                fs, new_fs, ratio.numerator, ratio.denominator, len(signal), resampled.size)
+    return resampled, new_fs
+
+def _to_mono(frames, downmix=False):
+    """
+    Mono view of (samples, channels) frames: the channel average with downmix, else the left
+    channel (a strided view, no copy). 1-D input is returned as is.
+    """
+    if frames.ndim == 1 or frames.shape[1] == 1:
+        return frames.reshape(-1)
+    if downmix:
+        logger.debug("Downmixed %d channels to mono, samples=%d", frames.shape[1], frames.shape[0])
+        return downmix_channels(frames)
+    logger.debug("Stereo to mono: took left channel, samples=%d", frames.shape[0])
+    return frames[:, 0]
+
+def _decode_with_pydub(audio, downmix=False):
+    data = np.array(audio.get_array_of_samples())
+    data = _to_mono(data.reshape((-1, audio.channels)), downmix)
+    return data, audio.frame_rate
+
+def read_mp3(filename, downmix=False):
+    from pydub import AudioSegment  # imported on first use: WAV/FLAC/OGG never need pydub
+
     logger.info("Reading MP3: %s", filename)
     audio = AudioSegment.from_mp3(filename)
-    data = np.array(audio.get_array_of_samples())
-    if audio.channels == 2:
-        data = data.reshape((-1, 2))
-        data = data[:, 0]
-        logger.debug("Stereo to mono: took left channel, samples=%d", len(data))
-    fs = audio.frame_rate
+    data, fs = _decode_with_pydub(audio, downmix)
     logger.info("MP3 loaded: channels=%d fs=%d samples=%d duration=%.2fs",
                 audio.channels, fs, len(data), len(data) / float(fs) if fs else -1.0)
     return data, fs
+
+def read_wav(filename, downmix=False):
+    """
+    Reads a PCM/float WAV file by memory-mapping its data chunk: mono (or left-channel)
+    output is a view of the file, so nothing is decoded or copied up front.
+    """
+    logger.info("Reading WAV: %s", filename)
+    try:
+        fs, frames = wavfile.read(filename, mmap=True)
+    except ValueError:
+        # e.g. 24-bit PCM, which scipy can only unpack into a new array
+        logger.debug("WAV cannot be memory-mapped, reading it into memory: %s", filename)
+        fs, frames = wavfile.read(filename)
+    data = _to_mono(frames, downmix)
+    logger.info("WAV loaded: channels=%d fs=%d samples=%d duration=%.2fs dtype=%s",
+                1 if frames.ndim == 1 else frames.shape[1], fs, len(data),
+                len(data) / float(fs) if fs else -1.0, frames.dtype)
+    return data, fs
+
+def read_soundfile(filename, downmix=False):
+    """
+    Decodes FLAC/OGG in-process with libsndfile (requires the optional soundfile package).
+    Samples are returned as int16, like the pydub decoders.
+    """
+    logger.info("Reading with libsndfile: %s", filename)
+    frames, fs = soundfile.read(filename, dtype="int16", always_2d=True)
+    data = _to_mono(frames, downmix)
+    logger.info("Audio loaded: channels=%d fs=%d samples=%d duration=%.2fs",
+                frames.shape[1], fs, len(data), len(data) / float(fs) if fs else -1.0)
+    return data, fs
+
+def read_audio(filename, downmix=False):
+    """
+    Reads any supported audio file, dispatching on the extension: WAV is memory-mapped,
+    FLAC/OGG are decoded natively when soundfile is installed, and everything else (or a
+    file the native readers reject) goes through pydub/ffmpeg.
+
+    Parameters:
+        filename (str): Path of the audio file.
+        downmix (bool): Average all channels instead of keeping the left one.
+
+    Returns:
+        (np.ndarray, int): Mono samples and the sampling frequency.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    try:
+        if ext == ".wav":
+            return read_wav(filename, downmix)
+        if ext in (".flac", ".ogg") and soundfile is not None:
+            return read_soundfile(filename, downmix)
+    except Exception:
+        logger.warning("Native reader failed for %s; falling back to ffmpeg", filename, exc_info=True)
+    if ext == ".mp3":
+        return read_mp3(filename, downmix)
+    from pydub import AudioSegment
+
+    logger.info("Reading with ffmpeg: %s", filename)
+    audio = AudioSegment.from_file(filename)
+    data, fs = _decode_with_pydub(audio, downmix)
+    logger.info("Audio loaded: channels=%d fs=%d samples=%d duration=%.2fs",
+                audio.channels, fs, len(data), len(data) / float(fs) if fs else -1.0)
+    return data, fs
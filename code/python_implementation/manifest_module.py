@@ -0,0 +1,145 @@
+# manifest_module.py
+
+import glob
+import itertools
+import json
+import os
+import tempfile
+import time
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+# Per-process sequence number of default manifest names (a --serve worker writes many per second)
+_MANIFEST_SEQUENCE = itertools.count(1)
+
+# Per-file arrays moved from the summaries into the .npz sidecar (the tempogram ones with --tempogram)
+ARRAY_FIELDS = ("tempo_range", "per_band_energies", "bands", "tempogram_times", "tempogram_tempos", "tempogram",
+                "tempo_track")
+
+
+def default_manifest_path(results_dir):
+    """
+    results/run_<local time>-<microseconds>_<pid>_<sequence>.json.
+
+    The pid and per-process sequence number make the name unique even for runs finishing within
+    the same microsecond in one persistent worker; the timestamp keeps the names sorting
+    chronologically (see prune_manifests).
+    """
+    now_ns = time.time_ns()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now_ns // 1_000_000_000))
+    micros = (now_ns // 1000) % 1_000_000
+    return os.path.join(results_dir, f"run_{stamp}-{micros:06d}_{os.getpid()}_{next(_MANIFEST_SEQUENCE)}.json")
+
+
+def prune_manifests(results_dir, keep):
+    """
+    Deletes all but the newest `keep` default-named manifests (run_*.json and their .npz sidecars)
+    in results_dir, so that the results directory does not grow with every run. Manifests
+    written to explicit paths are never touched.
+
+    Returns:
+        int: Number of manifests deleted.
+    """
+    manifests = sorted(glob.glob(os.path.join(glob.escape(results_dir), "run_*.json")))
+    stale = manifests[:max(0, len(manifests) - keep)]
+    for path in stale:
+        for stale_path in (path, os.path.splitext(path)[0] + ".npz"):
+            try:
+                os.remove(stale_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Could not delete old manifest file %s: %s", stale_path, e)
+    if stale:
+        logger.info("Pruned %d old manifest(s) from %s (keeping %d)", len(stale), results_dir, keep)
+    return len(stale)
+
+
+def write_manifest(path, summaries, params, run_info=None):
+    """
+    Writes the run manifest (JSON) and its array sidecar (.npz next to it, same stem).
+
+    The JSON holds everything small: parameters, and per file the tempo, status, duration,
+    rates, stage timings and artifact paths. Each file entry names its arrays (tempo grid,
+    per-band energies, band limits) as keys of the sidecar, so one np.load reads them all.
+
+    Parameters:
+        path (str): Path of the manifest JSON.
+        summaries (list[dict]): Per-file summaries (see rythm_detection.process_file).
+        params (dict): Analysis parameters of the run.
+        run_info (dict | None): Extra run-level fields (e.g. wall time, throughput).
+
+    Returns:
+        str: Absolute path of the manifest.
+    """
+    path = os.path.abspath(path)
+    sidecar = os.path.splitext(path)[0] + ".npz"
+    arrays = {}
+    files = []
+    for idx, summary in enumerate(summaries):
+        entry = {name: value for name, value in summary.items() if name not in ARRAY_FIELDS}
+        entry["arrays"] = {}
+        for name in ARRAY_FIELDS:
+            if summary.get(name) is not None:
+                key = f"file{idx}_{name}"
+                arrays[key] = np.asarray(summary[name], dtype=float)
+                entry["arrays"][name] = key
+        files.append(entry)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "params": params,
+        "arrays_file": os.path.basename(sidecar),
+        "files": files,
+        **(run_info or {}),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _atomic_write(sidecar, lambda fp: np.savez_compressed(fp, **arrays))
+    _atomic_write(path, lambda fp: fp.write(json.dumps(manifest, indent=2, default=_json_default).encode("utf-8")))
+    logger.info("Wrote manifest: %s (%d file(s), arrays: %s)", path, len(files), os.path.basename(sidecar))
+    return path
+
+
+def load_manifest(path):
+    """
+    Reads a manifest and attaches each file's arrays from the sidecar.
+
+    Returns:
+        dict: The manifest, with tempo_range / per_band_energies / bands set on every file
+        entry that has them.
+    """
+    with open(path, "r", encoding="utf-8") as fp:
+        manifest = json.load(fp)
+    sidecar = os.path.join(os.path.dirname(os.path.abspath(path)), manifest["arrays_file"])
+    with np.load(sidecar, allow_pickle=False) as data:
+        for entry in manifest["files"]:
+            for name, key in entry.get("arrays", {}).items():
+                entry[name] = data[key]
+    return manifest
+
+
+def _atomic_write(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            write(fp)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
@@ -1,5 +1,6 @@
+import hashlib
 import os
-from typing import Iterable, Sequence, Tuple
+from typing import Iterable, Optional, Sequence, Tuple
 
 # Use a non-interactive backend so figures can be saved in a subprocess without display
 import matplotlib
@@ -7,20 +8,90 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import numpy as np
 
+SAVE_DPI = 150
+
 
 def safe_basename(path: str) -> str:
     base = os.path.splitext(os.path.basename(path))[0]
     return "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in base)
 
 
+def plot_stem(path: str) -> str:
+    """
+    File name stem of a track's plots: its safe basename plus a short hash of its absolute path,
+    so same-named tracks from different directories (possibly rendered concurrently) do not collide.
+    """
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+    return f"{safe_basename(path)}_{digest}"
+
+
+def minmax_envelope(
+    signal: np.ndarray,
+    columns: int,
+    time_axis: Optional[np.ndarray] = None,
+    fs: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reduce a signal to the (min, max) of each of `columns` consecutive sample buckets.
+
+    With one bucket per output pixel column, a line through the envelope (or a band filled
+    between its limits) covers exactly the pixels a plot of every sample would.
+
+    Parameters:
+        signal: Samples to reduce
+        columns: Number of buckets (at least the plot width in pixels)
+        time_axis: Time of each sample, or None to derive it from fs
+        fs: Sampling frequency, used when time_axis is None
+
+    Returns:
+        (bucket_start_times, bucket_mins, bucket_maxs)
+    """
+    signal = np.asarray(signal)
+    starts = np.linspace(0, signal.size, columns + 1).astype(np.int64)[:-1]
+    starts = starts[np.concatenate([[True], np.diff(starts) > 0])]  # drop empty buckets
+    mins = np.minimum.reduceat(signal, starts)
+    maxs = np.maximum.reduceat(signal, starts)
+    times = np.asarray(time_axis)[starts] if time_axis is not None else starts / float(fs)
+    return times, mins, maxs
+
+
+def plot_waveform(ax, signal: np.ndarray, time_axis: Optional[np.ndarray] = None,
+                  fs: Optional[float] = None, mode: str = "minmax", columns: int = 1800) -> None:
+    """
+    Draw a waveform on ax.
+
+    Modes:
+        "minmax": per-column min/max envelope drawn as a line (looks like plotting every sample)
+        "band":   the same envelope drawn as a filled band
+        "full":   every sample (render time grows with the track length)
+    Signals with fewer than 2 * columns samples are always drawn in full.
+    """
+    if mode not in ("minmax", "band", "full"):
+        raise ValueError(f"Unknown waveform mode: {mode!r} (expected 'minmax', 'band' or 'full')")
+    if time_axis is None and fs is None:
+        raise ValueError("plot_waveform needs either time_axis or fs")
+    signal = np.asarray(signal)
+    if mode == "full" or signal.size < 2 * columns:
+        ax.plot(time_axis if time_axis is not None else np.arange(signal.size) / float(fs), signal)
+        return
+    times, mins, maxs = minmax_envelope(signal, columns, time_axis, fs)
+    if mode == "band":
+        ax.fill_between(times, mins, maxs, step="post", linewidth=0.5)
+    else:
+        ax.plot(np.repeat(times, 2), np.column_stack([mins, maxs]).ravel())
+
+
 def save_plots(
     input_filename: str,
-    time_axis: np.ndarray,
+    time_axis: Optional[np.ndarray],
     original_signal: np.ndarray,
     bands: Sequence[Tuple[float, float]],
     tempo_range: np.ndarray,
     per_band_energies: Sequence[np.ndarray],
     results_dir: str,
+    fs: Optional[float] = None,
+    waveform: str = "minmax",
+    announce: bool = True,
 ) -> Tuple[str, str, float]:
     """
     Create and save the analysis plots:
@@ -29,12 +100,16 @@ def save_plots(
 
     Parameters:
         input_filename: Path of the audio file being analyzed (used for titles and naming)
-        time_axis: Time vector for the original signal
+        time_axis: Time vector for the original signal, or None to derive it from fs
         original_signal: The raw audio signal
         bands: Sequence of (low, high) tuples for each band
         tempo_range: Array of tempos (BPM)
         per_band_energies: Sequence of arrays, one per band, energies vs tempo
         results_dir: Directory to save the figures
+        fs: Sampling frequency of original_signal (required when time_axis is None)
+        waveform: Rendering of the original signal, "minmax", "band" or "full" (see plot_waveform)
+        announce: Print a "SAVED: <path>" line per figure (callers rendering in another
+            process print them themselves once the job completes)
 
     Returns:
         (analysis_png_path, total_png_path, fundamental_tempo)
@@ -47,12 +122,14 @@ def save_plots(
         total_energies += np.asarray(e, dtype=float)
 
     # Figure 1: Original + per-band energies
-    fig1 = plt.figure(figsize=(12, 15))
+    fig_width = 12
+    fig1 = plt.figure(figsize=(fig_width, 15))
     fig1.suptitle(f"Analysis for {os.path.basename(input_filename)}", fontsize=16)
 
     # Original signal
     ax1 = fig1.add_subplot(len(bands) + 1, 1, 1)
-    ax1.plot(time_axis, original_signal)
+    # One min/max bucket per pixel of the figure width bounds the render time
+    plot_waveform(ax1, original_signal, time_axis, fs, mode=waveform, columns=fig_width * SAVE_DPI)
     ax1.set_title("Original Signal")
     ax1.set_xlabel("Time [s]")
     ax1.set_ylabel("Amplitude")
@@ -78,7 +155,7 @@ def save_plots(
     fundamental_tempo = float(tempo_range[int(np.argmax(total_energies))])
 
     # Paths
-    base = safe_basename(input_filename)
+    base = plot_stem(input_filename)
     analysis_path = os.path.join(results_dir, f"{base}_analysis.png")
     total_path = os.path.join(results_dir, f"{base}_total.png")
 
@@ -87,12 +164,14 @@ def save_plots(
         fig1.tight_layout(rect=[0, 0.03, 1, 0.95])
     except Exception:
         pass
-    fig1.savefig(analysis_path, dpi=150, bbox_inches="tight")
-    print(f"SAVED: {os.path.abspath(analysis_path)}")
+    fig1.savefig(analysis_path, dpi=SAVE_DPI, bbox_inches="tight")
+    if announce:
+        print(f"SAVED: {os.path.abspath(analysis_path)}", flush=True)
 
     fig2.tight_layout()
-    fig2.savefig(total_path, dpi=150, bbox_inches="tight")
-    print(f"SAVED: {os.path.abspath(total_path)}")
+    fig2.savefig(total_path, dpi=SAVE_DPI, bbox_inches="tight")
+    if announce:
+        print(f"SAVED: {os.path.abspath(total_path)}", flush=True)
 
     # Cleanup
     plt.close(fig1)
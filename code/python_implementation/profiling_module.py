@@ -0,0 +1,216 @@
+# profiling_module.py
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+import logging
+
+logger = logging.getLogger(__name__)
+
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    """
+    One timed region: wall time, process CPU time and traced memory (net allocation and peak).
+    """
+
+    __slots__ = ("profiler", "name", "cat", "args", "ts_us", "wall", "cpu", "mem", "peak")
+
+    def __init__(self, profiler: "Profiler", name: str, cat: str, args: dict) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.profiler._enter(self)
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.profiler._exit(self)
+        return False
+
+
+class Profiler:
+    """
+    Records nested spans as Chrome trace "complete" events (usable in chrome://tracing and
+    Perfetto), with the span's CPU time and memory in the event args.
+
+    Memory comes from tracemalloc, started on enable unless trace_memory is False: alloc_bytes is the net traced
+    allocation over the span (what it left allocated), peak_bytes the traced peak above the
+    span's start. Both are process wide, like CPU time (so they include helper threads).
+    Timestamps are epoch based so that events from worker processes line up on one timeline.
+    Disabled, span() returns a shared no-op context manager.
+    """
+
+    def __init__(self, enabled: bool = False, trace_memory: bool = True) -> None:
+        self.enabled = False
+        self.trace_memory = trace_memory
+        self._events: list[dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._tracemalloc = None
+        self._started_tracing = False
+        if enabled:
+            self.enable(trace_memory)
+
+    def enable(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        if trace_memory and self._tracemalloc is None:
+            import tracemalloc
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            self._tracemalloc = tracemalloc
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self._tracemalloc is not None and self._started_tracing:
+            self._tracemalloc.stop()
+        self._tracemalloc = None
+
+    def span(self, name: str, cat: str = "pipeline", **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, span: _Span) -> None:
+        stack = self._stack()
+        if self._tracemalloc is not None:
+            current, peak = self._tracemalloc.get_traced_memory()
+            if stack:
+                # The enclosing span keeps the peak reached so far; the counter restarts here
+                stack[-1].peak = max(stack[-1].peak, peak)
+            self._tracemalloc.reset_peak()
+            span.mem, span.peak = current, current
+        else:
+            span.mem = span.peak = 0
+        stack.append(span)
+        span.ts_us = time.time_ns() // 1000
+        span.cpu = time.process_time()
+        span.wall = time.perf_counter()
+
+    def _exit(self, span: _Span) -> None:
+        wall = time.perf_counter() - span.wall
+        cpu = time.process_time() - span.cpu
+        alloc = peak = 0
+        if self._tracemalloc is not None:
+            current, traced_peak = self._tracemalloc.get_traced_memory()
+            span.peak = max(span.peak, traced_peak)
+            alloc, peak = current - span.mem, span.peak - span.mem
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, span.peak)
+        event = {"name": span.name, "cat": span.cat, "ph": "X", "ts": span.ts_us,
+                 "dur": round(wall * 1e6, 3), "pid": os.getpid(), "tid": threading.get_native_id(),
+                 "args": {**span.args, "cpu_ms": round(cpu * 1e3, 3), "alloc_bytes": alloc, "peak_bytes": peak}}
+        with self._lock:
+            self._events.append(event)
+
+    def record(self, name: str, ts_us: int, seconds: float, cat: str = "pipeline", **args) -> None:
+        """
+        Adds an event timed elsewhere (e.g. a job run by another process); no CPU or memory data.
+        """
+        if not self.enabled:
+            return
+        event = {"name": name, "cat": cat, "ph": "X", "ts": ts_us, "dur": round(seconds * 1e6, 3),
+                 "pid": os.getpid(), "tid": threading.get_native_id(), "args": args}
+        with self._lock:
+            self._events.append(event)
+
+    def drain(self) -> list[dict]:
+        """
+        Returns the recorded events and forgets them (so a worker hands each file's events back once).
+        """
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+
+
+# Process-wide profiler (each worker process configures its own from the run's arguments)
+PROFILER = Profiler()
+
+
+def configure_profiler(enabled: bool, trace_memory: bool = True) -> None:
+    if PROFILER.enabled and (not enabled or PROFILER.trace_memory != trace_memory):
+        PROFILER.disable()
+    if enabled and not PROFILER.enabled:
+        PROFILER.enable(trace_memory)
+
+
+def span(name: str, cat: str = "pipeline", **args):
+    """
+    Context manager timing one stage (no-op unless profiling is enabled).
+    """
+    return PROFILER.span(name, cat, **args)
+
+
+def summarize_events(events: list[dict]) -> list[dict]:
+    """
+    Aggregates events by name: count, total/mean wall ms, CPU ms, net allocated and max peak bytes.
+
+    Rows are sorted by total wall time, descending (nested spans are counted in their parents too).
+    """
+    rows: dict[str, dict] = {}
+    for event in events:
+        if event.get("ph") != "X":
+            continue
+        row = rows.setdefault(event["name"], {"name": event["name"], "cat": event.get("cat", ""), "count": 0,
+                                              "wall_ms": 0.0, "cpu_ms": 0.0, "alloc_bytes": 0, "peak_bytes": 0})
+        args = event.get("args", {})
+        row["count"] += 1
+        row["wall_ms"] += event["dur"] / 1e3
+        row["cpu_ms"] += args.get("cpu_ms", 0.0)
+        row["alloc_bytes"] += args.get("alloc_bytes", 0)
+        row["peak_bytes"] = max(row["peak_bytes"], args.get("peak_bytes", 0))
+    for row in rows.values():
+        row["mean_ms"] = row["wall_ms"] / row["count"]
+    return sorted(rows.values(), key=lambda row: row["wall_ms"], reverse=True)
+
+
+def format_summary(rows: list[dict]) -> str:
+    mb = 1024.0 * 1024.0
+    lines = [f"{'span':<24} {'cat':<9} {'count':>7} {'wall ms':>11} {'mean ms':>10} {'cpu ms':>11} "
+             f"{'cpu %':>6} {'alloc MB':>9} {'peak MB':>8}"]
+    for row in rows:
+        cpu_pct = 100.0 * row["cpu_ms"] / row["wall_ms"] if row["wall_ms"] > 0 else 0.0
+        lines.append(f"{row['name']:<24} {row['cat']:<9} {row['count']:>7d} {row['wall_ms']:>11.1f} "
+                     f"{row['mean_ms']:>10.3f} {row['cpu_ms']:>11.1f} {cpu_pct:>6.0f} "
+                     f"{row['alloc_bytes'] / mb:>9.1f} {row['peak_bytes'] / mb:>8.1f}")
+    return "\n".join(lines)
+
+
+def write_trace(path: str, events: list[dict], metadata: dict | None = None) -> tuple[str, str]:
+    """
+    Writes events as a Chrome trace JSON file and the summary table next to it (<stem>_summary.txt).
+
+    Returns:
+        tuple[str, str]: Absolute paths of the trace and of the summary.
+    """
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    events = sorted(events, key=lambda event: (event["pid"], event["ts"]))
+    names = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": f"rythm_detection {pid}"}}
+             for pid in sorted({event["pid"] for event in events})]
+    trace = {"traceEvents": names + events, "displayTimeUnit": "ms", "otherData": metadata or {}}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fp:
+        json.dump(trace, fp, default=str)
+    os.replace(tmp_path, path)
+
+    summary_path = os.path.splitext(path)[0] + "_summary.txt"
+    with open(summary_path, "w", encoding="utf-8") as fp:
+        fp.write(format_summary(summarize_events(events)) + "\n")
+    return path, summary_path
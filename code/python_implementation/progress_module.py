@@ -0,0 +1,87 @@
+# progress_module.py
+
+import json
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the progress event lines on stdout (next to the SAVED:/MANIFEST: lines)
+PROGRESS_PREFIX = "PROGRESS:"
+
+# Pipeline stages in order (the keys of the per-file timings); streaming runs report "stream"
+# for decode + filterbank + onsets, and every file ends with a "done" event.
+STAGES = ("decode", "filterbank", "onsets", "tempo_search", "plots")
+
+
+class ProgressReporter:
+    """
+    Emits structured progress events as single "PROGRESS: {json}" lines on stdout.
+
+    Each event names the file and stage and carries the stage's fraction complete and the
+    seconds elapsed since the stage's first event, plus optional details (e.g. band / bands).
+    Intermediate updates of a stage are throttled to one per min_interval seconds; the first
+    (fraction 0) and last (fraction 1) event of a stage are always emitted. Disabled, an update
+    costs one attribute check.
+
+    A file's "done" event forgets the start times of its stages, including stages that failed
+    before reaching fraction 1, so a later run of the same file (e.g. in --serve) starts afresh.
+    Stages started with background=True (plots rendered after "done") are kept until they finish.
+    """
+
+    def __init__(self, enabled: bool = False, min_interval: float = 0.1, stream=None) -> None:
+        self.enabled = enabled
+        self.min_interval = min_interval
+        self.stream = stream
+        self._started: dict[tuple[str, str], float] = {}
+        self._last_emit: dict[tuple[str, str], float] = {}
+        self._background: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def update(self, filename: str, stage: str, fraction: float, **detail) -> None:
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        key = (filename, stage)
+        with self._lock:
+            started = self._started.setdefault(key, now)
+            if 0.0 < fraction < 1.0 and now - self._last_emit.get(key, started) < self.min_interval:
+                return
+            self._last_emit[key] = now
+            if detail.get("background"):
+                self._background.add(key)
+            if stage == "done":
+                for stale in [k for k in self._started if k[0] == filename and k not in self._background]:
+                    del self._started[stale]
+                    self._last_emit.pop(stale, None)
+            elif fraction >= 1.0:
+                del self._started[key]
+                self._last_emit.pop(key, None)
+                self._background.discard(key)
+        event = {"file": filename, "stage": stage, "fraction": round(min(max(fraction, 0.0), 1.0), 4),
+                 "elapsed": round(now - started, 3), **detail}
+        try:
+            stream = self.stream or sys.stdout
+            # One write per event, so lines from concurrent workers do not interleave
+            stream.write(f"{PROGRESS_PREFIX} {json.dumps(event, default=str)}\n")
+            stream.flush()
+        except Exception:
+            logger.debug("Could not emit a progress event", exc_info=True)
+
+
+# Process-wide reporter (each worker process configures its own from the run's arguments)
+PROGRESS = ProgressReporter()
+
+
+def configure_progress(enabled: bool, min_interval: float = 0.1) -> None:
+    PROGRESS.enabled = enabled
+    PROGRESS.min_interval = min_interval
+
+
+def report_progress(filename: str, stage: str, fraction: float, **detail) -> None:
+    """
+    Reports that a stage of one file is `fraction` complete (no-op unless enabled).
+    """
+    PROGRESS.update(filename, stage, fraction, **detail)
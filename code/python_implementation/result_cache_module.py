@@ -0,0 +1,137 @@
+# result_cache_module.py
+
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def file_content_hash(path, chunk_size=1 << 20):
+    """
+    SHA-256 of a file's bytes (the encoded audio, read without decoding).
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def params_hash(params):
+    """
+    Stable hash of the analysis parameters (any JSON-serializable mapping).
+    """
+    encoded = json.dumps(params, sort_keys=True, separators=(",", ":"), default=float)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of analysis results.
+
+    Entries are .npz files named <audio hash>_<params hash>.npz, so an entry is reused only
+    for identical audio bytes analyzed with identical parameters. Reads refresh the entry's
+    mtime, and writes evict the least recently used entries beyond max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, audio_path: str, params: dict) -> str:
+        return f"{file_content_hash(audio_path)}_{params_hash(params)}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key: str) -> dict | None:
+        """
+        Returns the stored arrays as a dict, or None on a miss (or an unreadable entry).
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                entry = {name: data[name] for name in data.files}
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            logger.debug("Cache miss: %s", key)
+            return None
+        except Exception:
+            logger.warning("Dropping unreadable cache entry: %s", path, exc_info=True)
+            self._remove(path)
+            return None
+        logger.info("Cache hit: %s", key)
+        return entry
+
+    def put(self, key: str, arrays: dict) -> None:
+        """
+        Stores a dict of arrays/scalars atomically, then enforces the size limit.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                np.savez(fp, **{name: np.asarray(value) for name, value in arrays.items()})
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        logger.info("Cached result: %s", key)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            logger.info("Evicted cache entry: %s", os.path.basename(path))
+
+    def invalidate(self, audio_path: str) -> int:
+        """
+        Removes every entry of the given audio file (all parameter sets). Returns the count.
+        """
+        prefix = f"{file_content_hash(audio_path)}_"
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name.endswith(".npz"):
+                self._remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        logger.info("Invalidated %d cache entr%s for: %s", removed, "y" if removed == 1 else "ies", audio_path)
+        return removed
+
+    def clear(self) -> int:
+        """
+        Removes every entry. Returns the count.
+        """
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                self._remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        logger.info("Cleared %d cache entr%s from: %s", removed, "y" if removed == 1 else "ies", self.cache_dir)
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
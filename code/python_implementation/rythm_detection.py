@@ -1,14 +1,25 @@
 # rythm_detection.py
 
+import argparse
+import glob
+import json
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
 import numpy as np
 import logging
 
-from comb_filter_module import analyze_tempo
-from diff_rect_module import diff_rect
-from envelope_module import get_envelope
-from filterbank_module import read_mp3, create_filterbank
+# Only numpy-level modules are imported eagerly. The DSP stages (scipy.signal, pydub, ffmpeg
+# probing) are imported by the functions that run them, so --help, --serve startup and cache
+# hits do not pay for them; benchmarks/startup_benchmark.py checks this against a budget.
+from manifest_module import default_manifest_path, prune_manifests, write_manifest
+from profiling_module import PROFILER, configure_profiler, format_summary, span, summarize_events, write_trace
+from progress_module import configure_progress, report_progress
+from result_cache_module import ResultCache
+from spectrum_cache_module import configure_spectrum_cache, release_spectrum_cache, spectrum_cache_stats
 
 # Configure logging
 logging.basicConfig(
@@ -17,6 +28,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger("rythm_detection")
 
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".ogg", ".m4a")
+TEMPOGRAM_FIELDS = ("tempogram_times", "tempogram_tempos", "tempogram", "tempo_track")
+
 def get_scheirer_bands(fs: int) -> list[tuple[int, int]]:
     """
     Define the frequency bands for analysis (can be expanded as needed).
@@ -31,97 +45,839 @@ def get_scheirer_bands(fs: int) -> list[tuple[int, int]]:
         (3200, min(nyquist, 5000))
     ]
 
-def main() -> int:
-    # Determine input files: use CLI args if two provided, else fallback
-    cli_files = [p for p in sys.argv[1:] if p.strip()]
-    if len(cli_files) == 2:
-        file_paths = cli_files
-        logger.info("Using CLI-provided files:\n  1) %s\n  2) %s", file_paths[0], file_paths[1])
-    else:
-        file_paths = [
-            os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "music_files", "pathfinder.mp3")),
-            os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "music_files", "celebration.mp3")),
-        ]
-        logger.warning("CLI did not provide exactly 2 files; falling back to defaults:\n  1) %s\n  2) %s",
-                       file_paths[0], file_paths[1])
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Detect the tempo of audio files with a comb filterbank.")
+    parser.add_argument("files", nargs="*",
+                        help="Audio files, directories or glob patterns to analyze (defaults to the bundled tracks).")
+    parser.add_argument("--file-list", default=None, help="Text file with one audio path per line.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for batch runs (1 processes files sequentially in-process).")
+    parser.add_argument("--tempo-engine", choices=("fft", "autocorr"), default="fft",
+                        help="Comb sweep engine: one FFT per tempo, or one autocorrelation per band.")
+    parser.add_argument("--filterbank", choices=("iir", "fft", "multirate"), default="iir",
+                        help="Filterbank engine: per-band Butterworth IIR, a single FFT split into bands, "
+                             "or decimated per-band second-order sections.")
+    parser.add_argument("--search", choices=("grid", "hierarchical"), default="grid",
+                        help="Dense tempo grid, or a coarse sweep refined around the top peaks.")
+    parser.add_argument("--min-bpm", type=float, default=None,
+                        help="Lowest tempo to test (default: 60 for grid, 40 for hierarchical).")
+    parser.add_argument("--max-bpm", type=float, default=None,
+                        help="Highest tempo to test (default: 180 for grid, 240 for hierarchical).")
+    parser.add_argument("--bpm-step", type=float, default=None,
+                        help="Grid step, or the coarse step of the hierarchical search (default: 1 / 2).")
+    parser.add_argument("--resolution", type=float, default=0.05,
+                        help="Final tempo resolution of the hierarchical search (BPM).")
+    parser.add_argument("--top-k", type=int, default=3,
+                        help="Number of peaks refined at each level of the hierarchical search.")
+    parser.add_argument("--num-impulses", type=int, default=3, help="Number of impulses in each comb filter.")
+    parser.add_argument("--window-length", type=float, default=0.4,
+                        help="Length of the envelope Hanning window in seconds.")
+    parser.add_argument("--filter-order", type=int, default=5, help="Butterworth order of the band filters.")
+    parser.add_argument("--analysis-rate", type=int, default=None,
+                        help="Downsample to this rate (Hz) before the filterbank, e.g. 11025; "
+                             "all bands lie below 5 kHz. Default: the file's own rate.")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64",
+                        help="Working precision of the in-memory pipeline (float32 halves memory and bandwidth).")
+    parser.add_argument("--manifest", default=None,
+                        help="Path of the run manifest (JSON; arrays go to a .npz with the same stem). "
+                             "Default: results/run_<time>_<pid>_<sequence>.json (unique per run).")
+    parser.add_argument("--no-manifest", action="store_true", help="Do not write a run manifest.")
+    parser.add_argument("--keep-manifests", type=int, default=20,
+                        help="Default-named manifests (and their .npz) kept in results/; older ones are "
+                             "deleted after each run (minimum 1).")
+    parser.add_argument("--progress", action="store_true",
+                        help="Print per-stage progress events as PROGRESS: {json} lines on stdout (used by the GUI).")
+    parser.add_argument("--profile", default=None, metavar="TRACE_JSON",
+                        help="Record wall time, CPU time and allocations of every stage (per file and band) "
+                             "and write them as a Chrome trace / Perfetto JSON file plus a summary table.")
+    parser.add_argument("--no-profile-memory", action="store_true",
+                        help="Profile times only: skip allocation tracing (tracemalloc slows allocation-heavy "
+                             "stages such as plotting and imports).")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="Only report the tempo; skip plotting (matplotlib is never imported).")
+    parser.add_argument("--plot-workers", type=int, default=0,
+                        help="Render plots in this many background processes while the next file is "
+                             "analyzed (default 0: render inline).")
+    parser.add_argument("--waveform", choices=["minmax", "band", "full"], default="minmax",
+                        help="Rendering of the original signal: per-pixel min/max envelope (default), "
+                             "filled band, or every sample.")
+    parser.add_argument("--tempogram", action="store_true",
+                        help="Also compute a tempogram (comb energies over sliding windows) and a smoothed "
+                             "tempo track, for tracks whose tempo drifts (in-memory pipeline only).")
+    parser.add_argument("--tempogram-window", type=float, default=8.0, help="Tempogram window length in seconds.")
+    parser.add_argument("--tempogram-hop", type=float, default=1.0, help="Step between tempogram windows in seconds.")
+    parser.add_argument("--tempogram-rate", type=int, default=1000,
+                        help="Rate (Hz) the onset signals are resampled to for the tempogram.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Decode and filter in fixed-size blocks (bounded memory for long recordings).")
+    parser.add_argument("--block-size", type=int, default=65536,
+                        help="Samples per block in streaming mode.")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Directory of the result cache (default: results/cache next to this script).")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the result cache.")
+    parser.add_argument("--cache-max-mb", type=float, default=512.0,
+                        help="Size limit of the result cache; least recently used entries are evicted.")
+    parser.add_argument("--clear-cache", action="store_true", help="Remove every cache entry before running.")
+    parser.add_argument("--invalidate-cache", action="store_true",
+                        help="Remove the cache entries of the given input files before running.")
+    parser.add_argument("--spectrum-cache-mb", type=float, default=64.0,
+                        help="In-memory budget for the envelope window spectra shared by the bands of a file "
+                             "(released after each file).")
+    parser.add_argument("--online", action="store_true",
+                        help="Track the tempo of a live raw PCM stream (s16le) from stdin, or from the "
+                             "single path given (e.g. a FIFO). Example: ffmpeg -i IN -ac 1 -f s16le - | ...")
+    parser.add_argument("--sample-rate", type=int, default=44100, help="Sample rate of the online PCM stream.")
+    parser.add_argument("--channels", type=int, default=1, help="Interleaved channels in the online PCM stream.")
+    parser.add_argument("--update-ms", type=int, default=500, help="Audio time between online tempo updates.")
+    parser.add_argument("--window-seconds", type=float, default=8.0,
+                        help="Length of the onset history used by each online update.")
+    parser.add_argument("--serve", action="store_true",
+                        help="Stay resident and run one job per stdin line (a JSON list of arguments), "
+                             "ending each with a JOB_DONE: line on stdout and stderr (used by the GUI).")
+    return parser
 
-    # Prepare output directory next to this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    results_dir = os.path.join(script_dir, "results")
-    os.makedirs(results_dir, exist_ok=True)
-    logger.info("Results directory: %s", results_dir)
+def _search_tempos(sweepers, args) -> tuple[np.ndarray, list[np.ndarray]]:
+    """
+    Evaluate per-band sweepers (tempos -> energies) on the grid or hierarchically, per args.
+    """
+    if args.search == "hierarchical":
+        from comb_filter_module import coarse_to_fine_search
+        return coarse_to_fine_search(sweepers, min_tempo=args.min_bpm, max_tempo=args.max_bpm,
+                                     coarse_step=args.bpm_step, resolution=args.resolution, top_k=args.top_k)
+    tempo_range = np.arange(args.min_bpm, args.max_bpm, args.bpm_step, dtype=float)
+    return tempo_range, [sweeper(tempo_range) for sweeper in sweepers]
 
-    # Import plot handler only when needed (keeps plotting concerns separate)
-    from plot_handler import save_plots
-    logger.info("Plot handler loaded.")
+def analyze_in_memory(filename: str, args: argparse.Namespace):
+    """
+    Decode the whole file, then run filterbank -> envelope -> diff-rect -> comb energies.
 
-    # Tempo search range
-    tempo_range = np.arange(60, 180, 1, dtype=float)
-    logger.info("Tempo range: %d to %d BPM (step 1)", int(tempo_range.min()), int(tempo_range.max()))
+    Returns a dict with fs, source_fs, duration, time_axis (None: uniform at fs), signal,
+    bands, tempo_range, per_band_energies and timings (seconds per stage), or None on failure.
+    """
+    with span("imports"):
+        from scipy.fft import next_fast_len
+        from comb_filter_module import analyze_tempo_bands, hierarchical_tempo_search
+        from diff_rect_module import diff_rect
+        from envelope_module import get_envelope, get_envelope_from_spectrum, half_hanning_window
+        from filterbank_module import read_audio, create_filterbank, fft_band_spectra, resample_to_rate
+
+    timings = {}
+    stage_start = time.perf_counter()
+    report_progress(filename, "decode", 0.0)
+    # Read audio, downmix all channels and resample to the analysis rate
+    try:
+        with span("read", file=filename):
+            signal, source_fs = read_audio(filename, downmix=True)
+        logger.info("Read audio: fs=%d Hz, samples=%d", source_fs, len(signal))
+        with span("resample", source_fs=source_fs, analysis_rate=args.analysis_rate):
+            signal, fs = resample_to_rate(signal, source_fs, args.analysis_rate)
+    except Exception as e:
+        logger.exception("Failed to read audio file: %s", filename)
+        return None
+    timings["decode"] = time.perf_counter() - stage_start
+    report_progress(filename, "decode", 1.0)
+    stage_start = time.perf_counter()
+    report_progress(filename, "filterbank", 0.0)
 
-    for idx, filename in enumerate(file_paths, start=1):
-        logger.info("(%d/%d) Processing file: %s", idx, len(file_paths), filename)
+    # Frequency bands
+    bands = get_scheirer_bands(fs)
+    logger.info("Bands: %s", ", ".join([f"{lo}-{hi} Hz" for (lo, hi) in bands]))
 
-        # Read audio
+    # Filterbank (the FFT engine hands band spectra straight to the envelope stage)
+    try:
+        with span("filterbank", engine=args.filterbank, bands=len(bands)):
+            if args.filterbank == "fft":
+                n_fft = next_fast_len(len(signal) + len(half_hanning_window(fs, args.window_length)))
+                band_inputs, n_fft = fft_band_spectra(signal, fs, bands, n_fft=n_fft, dtype=args.dtype)
+                band_envelope = partial(get_envelope_from_spectrum, n_fft=n_fft, n=len(signal), fs=fs,
+                                        window_length=args.window_length)
+            else:
+                band_inputs = create_filterbank(signal, fs, bands, order=args.filter_order,
+                                                engine=args.filterbank, dtype=args.dtype)
+                band_envelope = partial(get_envelope, fs=fs, window_length=args.window_length)
+        logger.info("Created filterbank: %d band(s) (engine=%s, dtype=%s)", len(band_inputs), args.filterbank,
+                    args.dtype)
+    except Exception as e:
+        logger.exception("Failed to create filterbank for: %s", filename)
+        return None
+    timings["filterbank"] = time.perf_counter() - stage_start
+    report_progress(filename, "filterbank", 1.0)
+    stage_start = time.perf_counter()
+    report_progress(filename, "onsets", 0.0)
+
+    # Per-band onset signals: envelope -> diff-rect
+    onset_signals: list[np.ndarray | None] = []
+    for b_idx in range(1, len(band_inputs) + 1):
+        lo, hi = bands[b_idx - 1]
+        logger.info("Band %d/%d (%d-%d Hz): envelope -> diff-rect",
+                    b_idx, len(band_inputs), lo, hi)
         try:
-            signal, fs = read_mp3(filename)
-            logger.info("Read audio: fs=%d Hz, samples=%d", fs, len(signal))
+            with span("envelope", band=b_idx, lo=lo, hi=hi):
+                envelope = band_envelope(band_inputs[b_idx - 1])
+            with span("diff_rect", band=b_idx, lo=lo, hi=hi):
+                onset_signals.append(diff_rect(envelope, fs))
         except Exception as e:
-            logger.exception("Failed to read audio file: %s", filename)
-            continue
+            logger.exception("Failed processing band %d (%d-%d Hz)", b_idx, lo, hi)
+            onset_signals.append(None)
+        band_inputs[b_idx - 1] = None  # release the band as soon as it is consumed
+        report_progress(filename, "onsets", b_idx / len(band_inputs), band=b_idx, bands=len(band_inputs))
+    timings["onsets"] = time.perf_counter() - stage_start
+    stage_start = time.perf_counter()
+    report_progress(filename, "tempo_search", 0.0)
+
+    # Per-band energies collection (for plotting)
+    if args.search == "hierarchical":
+        valid = [s for s in onset_signals if s is not None]
+        try:
+            with span("tempo_search", search="hierarchical", engine=args.tempo_engine, bands=len(valid)):
+                tempo_range, valid_energies = hierarchical_tempo_search(
+                    valid, fs, min_tempo=args.min_bpm, max_tempo=args.max_bpm, coarse_step=args.bpm_step,
+                    resolution=args.resolution, top_k=args.top_k, num_impulses=args.num_impulses,
+                    engine=args.tempo_engine)
+        except Exception as e:
+            logger.exception("Failed hierarchical tempo search for: %s", filename)
+            return None
+        report_progress(filename, "tempo_search", 1.0)
+        valid_iter = iter(valid_energies)
+        per_band_energies = [next(valid_iter) if onset_signal is not None else np.zeros_like(tempo_range)
+                             for onset_signal in onset_signals]
+    else:
+        tempo_range = np.arange(args.min_bpm, args.max_bpm, args.bpm_step, dtype=float)
+        valid = [s for s in onset_signals if s is not None]
+        try:
+            # All bands in one sweep: the fft engine builds each comb spectrum once for every band
+            with span("comb_sweep", engine=args.tempo_engine, bands=len(valid), tempos=len(tempo_range)):
+                valid_energies = analyze_tempo_bands(valid, fs, tempo_range, num_impulses=args.num_impulses,
+                                                     engine=args.tempo_engine)
+        except Exception as e:
+            logger.exception("Failed comb energies for: %s", filename)
+            return None
+        report_progress(filename, "tempo_search", 1.0)
+        valid_iter = iter(valid_energies)
+        per_band_energies = [next(valid_iter) if onset_signal is not None else np.zeros_like(tempo_range)
+                             for onset_signal in onset_signals]
+    timings["tempo_search"] = time.perf_counter() - stage_start
+
+    tempogram = None
+    if args.tempogram:
+        stage_start = time.perf_counter()
+        try:
+            with span("tempogram", window=args.tempogram_window, hop=args.tempogram_hop):
+                tempogram = compute_tempogram([s for s in onset_signals if s is not None], fs, args)
+        except Exception as e:
+            logger.exception("Failed to compute the tempogram for: %s", filename)
+        timings["tempogram"] = time.perf_counter() - stage_start
+
+    return {
+        "fs": fs,
+        "source_fs": source_fs,
+        "duration": len(signal) / float(fs),
+        "time_axis": None,  # the plots derive sample times from fs
+        "signal": signal,
+        "bands": bands,
+        "tempo_range": tempo_range,
+        "per_band_energies": per_band_energies,
+        "tempogram": tempogram,
+        "timings": timings,
+    }
+
+def compute_tempogram(onset_signals: list[np.ndarray], fs: int, args: argparse.Namespace) -> dict:
+    """
+    Tempogram of the bands' onset signals on the run's tempo grid, at --tempogram-rate.
 
-        # Frequency bands
+    Returns a dict with tempogram_times (window centers, s), tempogram_tempos, tempogram
+    (windows x tempos energies) and tempo_track (smoothed tempo per window).
+    """
+    from comb_filter_module import smooth_tempo_track, tempogram
+    from filterbank_module import resample_to_rate
+
+    resampled = [resample_to_rate(signal, fs, args.tempogram_rate) for signal in onset_signals]
+    onset_fs = resampled[0][1]
+    tempos = np.arange(args.min_bpm, args.max_bpm, args.bpm_step, dtype=float)
+    times, energies = tempogram([signal for signal, _ in resampled], onset_fs, tempos,
+                                window_seconds=args.tempogram_window, hop_seconds=args.tempogram_hop,
+                                num_impulses=args.num_impulses)
+    track = smooth_tempo_track(energies, tempos)
+    logger.info("Tempo track: %d window(s), %.2f to %.2f BPM (median %.2f)", len(track), float(track.min()),
+                float(track.max()), float(np.median(track)))
+    return {"tempogram_times": times, "tempogram_tempos": tempos, "tempogram": energies, "tempo_track": track}
+
+def analyze_streaming(filename: str, args: argparse.Namespace):
+    """
+    Decode and process the file block by block with carried filter/envelope state, so peak
+    memory depends on the block size rather than the track length.
+
+    Returns the same dict as analyze_in_memory (signal is a min/max waveform overview), or None on failure.
+    """
+    with span("imports"):
+        from comb_filter_module import autocorr_tempo_energies
+        from filterbank_module import stream_audio_blocks
+        from streaming_module import stream_band_autocorrs
+
+    timings = {}
+    stage_start = time.perf_counter()
+    report_progress(filename, "stream", 0.0)
+    try:
+        fs, blocks = stream_audio_blocks(filename, args.block_size, downmix=True, analysis_rate=args.analysis_rate)
         bands = get_scheirer_bands(fs)
         logger.info("Bands: %s", ", ".join([f"{lo}-{hi} Hz" for (lo, hi) in bands]))
+        with span("stream", block_size=args.block_size, bands=len(bands)):
+            autocorrs, overview, n_samples = stream_band_autocorrs(
+                blocks, fs, bands, args.min_bpm, order=args.filter_order, window_length=args.window_length,
+                num_impulses=args.num_impulses)
+        logger.info("Streamed audio: fs=%d Hz, samples=%d", fs, n_samples)
+    except Exception as e:
+        logger.exception("Failed to stream audio file: %s", filename)
+        return None
+    timings["stream"] = time.perf_counter() - stage_start  # decode, filterbank and onsets, interleaved
+    report_progress(filename, "stream", 1.0)
+    stage_start = time.perf_counter()
+    report_progress(filename, "tempo_search", 0.0)
+
+    try:
+        sweepers = [partial(autocorr_tempo_energies, autocorr, fs, num_impulses=args.num_impulses)
+                    for autocorr in autocorrs]
+        with span("tempo_search", search=args.search, engine="autocorr", bands=len(sweepers)):
+            tempo_range, per_band_energies = _search_tempos(sweepers, args)
+    except Exception as e:
+        logger.exception("Failed tempo search for: %s", filename)
+        return None
+    timings["tempo_search"] = time.perf_counter() - stage_start
+    report_progress(filename, "tempo_search", 1.0)
+
+    t, waveform = overview.xy(fs)
+    return {
+        "fs": fs,
+        "source_fs": None,  # ffmpeg resamples while decoding; the source rate is only logged
+        "duration": n_samples / float(fs),
+        "time_axis": t,
+        "signal": waveform,
+        "bands": bands,
+        "tempo_range": tempo_range,
+        "per_band_energies": per_band_energies,
+        "timings": timings,
+    }
+
+def expand_inputs(inputs: list[str], file_list: str | None = None) -> list[str]:
+    """
+    Expand files, directories (searched recursively for audio files) and glob patterns,
+    plus an optional text file with one path per line, into a de-duplicated file list.
+    """
+    entries = [p for p in inputs if p.strip()]
+    if file_list:
+        with open(file_list, "r", encoding="utf-8") as fp:
+            entries.extend(line.strip() for line in fp if line.strip() and not line.lstrip().startswith("#"))
+
+    file_paths: list[str] = []
+    for entry in entries:
+        if os.path.isdir(entry):
+            for dirpath, _, filenames in os.walk(entry):
+                file_paths.extend(os.path.join(dirpath, name) for name in sorted(filenames)
+                                  if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS)
+        elif glob.has_magic(entry):
+            file_paths.extend(sorted(p for p in glob.glob(entry, recursive=True) if os.path.isfile(p)))
+        else:
+            file_paths.append(entry)
+    return list(dict.fromkeys(os.path.normpath(p) for p in file_paths))
+
+def process_file(filename: str, args: argparse.Namespace, results_dir: str, plot_pool=None) -> dict:
+    """
+    Analyze one file and save its plots. Failures are logged and reported in the summary,
+    never raised, so one bad track does not stop a batch.
+
+    With plot_pool (an executor), rendering is submitted to it and the summary is completed
+    when the job finishes; with args.no_plots nothing is rendered (matplotlib is never imported).
 
-        # Filterbank
+    Returns a summary dict: file, ok, tempo, duration (audio seconds), fs (analysis rate),
+    seconds (wall time), error, cached, timings (seconds per stage), artifacts (saved files)
+    and, on success, the bands, tempo_range and per_band_energies (see manifest_module).
+    With args.profile, summary["profile"] holds the file's trace events (see profiling_module).
+    """
+    configure_profiler(bool(args.profile), trace_memory=not args.no_profile_memory)
+    with span("file", cat="file", file=filename):
         try:
-            filtered_signals = create_filterbank(signal, fs, bands)
-            logger.info("Created filterbank: %d band(s)", len(filtered_signals))
-        except Exception as e:
-            logger.exception("Failed to create filterbank for: %s", filename)
-            continue
+            summary = _process_file(filename, args, results_dir, plot_pool)
+        finally:
+            # Cached spectra have this track's length: do not keep them resident for the next file
+            release_spectrum_cache()
+    if PROFILER.enabled:
+        summary["profile"] = PROFILER.drain()
+    return summary
+
+def _process_file(filename: str, args: argparse.Namespace, results_dir: str, plot_pool=None) -> dict:
+    file_start = time.perf_counter()
+    summary = {"file": filename, "ok": False, "tempo": None, "duration": 0.0, "fs": None, "error": None,
+               "cached": False, "timings": {}, "artifacts": {}}
+    configure_spectrum_cache(int(args.spectrum_cache_mb * 1024 * 1024))
+    configure_progress(args.progress)
 
-        # Build time axis for original signal
-        t = np.arange(len(signal)) / fs
+    cache, cache_key, analysis = None, None, None
+    if not args.no_cache:
+        try:
+            with span("cache_lookup"):
+                cache = open_result_cache(args, results_dir)
+                cache_key = cache.key(filename, analysis_params(args))
+                cached = cache.get(cache_key)
+            if cached is not None and not energies_finite(cached["per_band_energies"]):
+                logger.warning("Ignoring a cached result with non-finite energies for %s", filename)
+            elif cached is not None:
+                analysis = analysis_from_cache(cached)
+                summary["cached"] = True
+                logger.info("Serving %s from the result cache (no decoding)", filename)
+        except Exception as e:
+            logger.warning("Result cache unavailable for %s: %s", filename, e)
+            cache = None
+        summary["timings"]["cache_lookup"] = time.perf_counter() - file_start
 
-        # Per-band energies collection (for plotting)
-        per_band_energies: list[np.ndarray] = []
-        for b_idx, filtered_signal in enumerate(filtered_signals, start=1):
-            lo, hi = bands[b_idx - 1]
-            logger.info("Band %d/%d (%d-%d Hz): envelope -> diff-rect -> comb energies",
-                        b_idx, len(filtered_signals), lo, hi)
+    if analysis is None:
+        analyze = analyze_streaming if args.stream else analyze_in_memory
+        analysis = analyze(filename, args)
+        if analysis is not None and not energies_finite(analysis["per_band_energies"]):
+            # e.g. an unstable filter: argmax would silently pick the first tempo of the grid
+            logger.error("Non-finite tempo energies for: %s", filename)
+            analysis = None
+        if analysis is None:
+            summary["error"] = "analysis failed"
+            summary["seconds"] = time.perf_counter() - file_start
+            report_progress(filename, "done", 1.0, ok=False)
+            return summary
+        if cache is not None:
             try:
-                envelope = get_envelope(filtered_signal, fs)
-                diff_rect_signal = diff_rect(envelope, fs)
-                energies = analyze_tempo(diff_rect_signal, fs, tempo_range)
-                per_band_energies.append(energies)
-                logger.info("Band %d energies computed (len=%d)", b_idx, len(energies))
+                cache.put(cache_key, analysis_to_cache(analysis))
             except Exception as e:
-                logger.exception("Failed processing band %d (%d-%d Hz)", b_idx, lo, hi)
-                per_band_energies.append(np.zeros_like(tempo_range))
+                logger.warning("Failed to cache the result for %s: %s", filename, e)
+        logger.debug("Spectrum cache after %s: %s", filename, spectrum_cache_stats())
+        summary["timings"].update(analysis["timings"])
+    summary.update(duration=analysis["duration"], fs=analysis["fs"], source_fs=analysis.get("source_fs"),
+                   bands=analysis["bands"], tempo_range=np.asarray(analysis["tempo_range"]),
+                   per_band_energies=np.asarray(analysis["per_band_energies"], dtype=float))
+    if analysis.get("tempogram"):
+        summary.update(analysis["tempogram"])
+    logger.info("Analysis rate: %d Hz%s", analysis["fs"],
+                f" (source {analysis['source_fs']} Hz)" if analysis.get("source_fs") else "")
 
+    fundamental_tempo = get_fundamental_tempo(analysis["tempo_range"], analysis["per_band_energies"])
+    if args.no_plots:
+        summary.update(ok=True, tempo=fundamental_tempo)
+    elif plot_pool is not None:
+        # Render in the background (SAVED: lines follow when the job completes) and move on
+        time_axis, signal = waveform_overview(analysis)
+        plot_analysis = dict(analysis, time_axis=time_axis, signal=signal)
+        report_progress(filename, "plots", 0.0, background=True)
+        future = plot_pool.submit(render_plots, filename, plot_analysis, results_dir, args.waveform, False)
+        future.add_done_callback(partial(_background_plots_done, summary, time.perf_counter()))
+        summary.update(ok=True, tempo=fundamental_tempo)
+    else:
         # Delegate plotting and saving to the plot handler
+        plot_start = time.perf_counter()
+        report_progress(filename, "plots", 0.0)
         try:
-            analysis_path, total_path, fundamental_tempo = save_plots(
-                input_filename=filename,
-                time_axis=t,
-                original_signal=signal,
-                bands=bands,
-                tempo_range=tempo_range,
-                per_band_energies=per_band_energies,
-                results_dir=results_dir,
-            )
-            logger.info("Saved plots:\n  analysis: %s\n  total: %s", analysis_path, total_path)
-            # Keep the plain prints for GUI auto-detection if needed (SAVED: lines printed by plot_handler)
-            logger.info("Fundamental Tempo: %.2f BPM", fundamental_tempo)
-            print(f"Fundamental Tempo: {fundamental_tempo} BPM")
+            with span("plots", waveform=args.waveform):
+                analysis_path, total_path = render_plots(filename, analysis, results_dir, args.waveform)
+            report_progress(filename, "plots", 1.0)
+            summary["artifacts"].update(analysis_png=os.path.abspath(analysis_path),
+                                        total_png=os.path.abspath(total_path))
+            summary["timings"]["plots"] = time.perf_counter() - plot_start
+            summary.update(ok=True, tempo=fundamental_tempo)
         except Exception as e:
             logger.exception("Failed to save plots for: %s", filename)
+            summary["error"] = repr(e)
+
+    if summary["ok"]:
+        logger.info("Fundamental Tempo: %.2f BPM", fundamental_tempo)
+        print(f"Fundamental Tempo: {fundamental_tempo} BPM", flush=True)
+
+    summary["seconds"] = time.perf_counter() - file_start
+    report_progress(filename, "done", 1.0, ok=summary["ok"], cached=summary["cached"], tempo=summary["tempo"],
+                    seconds=round(summary["seconds"], 3))
+    return summary
+
+def get_fundamental_tempo(tempo_range: np.ndarray, per_band_energies) -> float:
+    """
+    Tempo with the highest total energy across bands (as reported by save_plots).
+
+    Raises ValueError if the energies are not finite, since argmax would then return an arbitrary tempo.
+    """
+    if not energies_finite(per_band_energies):
+        raise ValueError("Tempo energies are not finite")
+    return float(tempo_range[int(np.argmax(np.sum(per_band_energies, axis=0)))])
+
+def energies_finite(per_band_energies) -> bool:
+    energies = np.asarray(per_band_energies, dtype=float)
+    return energies.size > 0 and bool(np.all(np.isfinite(energies)))
+
+def render_plots(filename: str, analysis: dict, results_dir: str, waveform: str = "minmax",
+                 announce: bool = True) -> tuple[str, str]:
+    """
+    Save the analysis figures of one file (runs inline or in a plot worker process).
+    """
+    # Import plot handler only when needed (keeps plotting concerns and matplotlib out of --no-plots runs)
+    from plot_handler import save_plots
+    analysis_path, total_path, _ = save_plots(
+        input_filename=filename,
+        time_axis=analysis["time_axis"],
+        original_signal=analysis["signal"],
+        bands=analysis["bands"],
+        tempo_range=analysis["tempo_range"],
+        per_band_energies=analysis["per_band_energies"],
+        results_dir=results_dir,
+        fs=analysis["fs"],
+        waveform=waveform,
+        announce=announce,
+    )
+    logger.info("Saved plots:\n  analysis: %s\n  total: %s", analysis_path, total_path)
+    return analysis_path, total_path
+
+def _background_plots_done(summary: dict, submitted: float, future) -> None:
+    """
+    Completion callback of a background plot job: keep the SAVED: output contract and
+    record the artifacts (or a rendering failure) in the file's summary.
+    """
+    try:
+        analysis_path, total_path = future.result()
+    except Exception as e:
+        logger.error("Failed to save plots for: %s (%r)", summary["file"], e)
+        summary.update(ok=False, error=repr(e))
+        report_progress(summary["file"], "plots", 1.0, ok=False)
+        return
+    report_progress(summary["file"], "plots", 1.0)
+    summary["timings"]["plots_background"] = time.perf_counter() - submitted  # includes queueing
+    # Rendered in a plot worker: only the submit-to-done wall time is known here
+    PROFILER.record("plots_background", time.time_ns() // 1000 - int(summary["timings"]["plots_background"] * 1e6),
+                    summary["timings"]["plots_background"], file=summary["file"])
+    summary["artifacts"].update(analysis_png=os.path.abspath(analysis_path), total_png=os.path.abspath(total_path))
+    for path in (analysis_path, total_path):
+        print(f"SAVED: {os.path.abspath(path)}", flush=True)
+    logger.info("Saved plots for %s in the background", summary["file"])
+
+def analysis_params(args: argparse.Namespace) -> dict:
+    """
+    Every parameter that changes the analysis result (the result cache key besides the audio hash).
+    """
+    params = {
+        "bands": get_scheirer_bands(float("inf")),
+        "search": args.search,
+        "min_bpm": args.min_bpm,
+        "max_bpm": args.max_bpm,
+        "bpm_step": args.bpm_step,
+        "resolution": args.resolution if args.search == "hierarchical" else None,
+        "top_k": args.top_k if args.search == "hierarchical" else None,
+        "num_impulses": args.num_impulses,
+        "window_length": args.window_length,
+        "filter_order": args.filter_order,
+        "filterbank": "iir-stream" if args.stream else args.filterbank,
+        "tempo_engine": "autocorr-stream" if args.stream else args.tempo_engine,
+        "dtype": "float64" if args.stream else args.dtype,
+        "analysis_rate": args.analysis_rate,
+        "downmix": "mean",
+    }
+    if args.stream or args.filterbank == "iir":
+        # The iir bands moved from (b, a) to second-order sections; older entries hold non-finite energies
+        params["iir_form"] = "sos"
+    if args.tempogram and not args.stream:
+        # Only present when requested, so the keys of runs without a tempogram do not change
+        params["tempogram"] = {"window": args.tempogram_window, "hop": args.tempogram_hop,
+                               "rate": args.tempogram_rate}
+    return params
+
+def open_result_cache(args: argparse.Namespace, results_dir: str) -> ResultCache:
+    cache_dir = args.cache_dir or os.path.join(results_dir, "cache")
+    return ResultCache(cache_dir, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+def analysis_to_cache(analysis: dict) -> dict:
+    """
+    Arrays stored per cache entry: energies, tempo grid, bands, duration and a bounded
+    waveform overview, so plots can be redrawn from a hit without decoding.
+    """
+    overview_t, overview_signal = waveform_overview(analysis)
+    entry = {
+        "fs": analysis["fs"],
+        "source_fs": analysis["source_fs"] or 0,
+        "duration": analysis["duration"],
+        "bands": np.asarray(analysis["bands"], dtype=float),
+        "tempo_range": analysis["tempo_range"],
+        "per_band_energies": np.asarray(analysis["per_band_energies"], dtype=float),
+        "fundamental_tempo": get_fundamental_tempo(analysis["tempo_range"], analysis["per_band_energies"]),
+        "time_axis": overview_t,
+        "signal": overview_signal,
+    }
+    if analysis.get("tempogram"):
+        entry.update(analysis["tempogram"])
+    return entry
+
+def waveform_overview(analysis: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Bounded (time_axis, signal) min/max overview of the analyzed waveform, for caching or
+    for shipping to a plot worker without copying the whole track.
+    """
+    from streaming_module import WaveformOverview
+
+    overview_t, overview_signal = analysis["time_axis"], analysis["signal"]
+    if len(overview_signal) > 2 * WaveformOverview().max_points:
+        overview = WaveformOverview()
+        overview.update(overview_signal)
+        return overview.xy(analysis["fs"])
+    if overview_t is None:
+        overview_t = np.arange(len(overview_signal)) / float(analysis["fs"])
+    return overview_t, np.asarray(overview_signal)
+
+def analysis_from_cache(entry: dict) -> dict:
+    return {
+        "fs": int(entry["fs"]),
+        "source_fs": int(entry["source_fs"]) or None,
+        "duration": float(entry["duration"]),
+        "time_axis": entry["time_axis"],
+        "signal": entry["signal"],
+        "bands": [(float(lo), float(hi)) for lo, hi in entry["bands"]],
+        "tempo_range": entry["tempo_range"],
+        "per_band_energies": list(entry["per_band_energies"]),
+        "tempogram": {name: entry[name] for name in TEMPOGRAM_FIELDS} if "tempogram" in entry else None,
+    }
+
+def report_throughput(summaries: list[dict], wall_seconds: float) -> None:
+    """
+    Log the batch outcome and aggregate throughput (tracks/min and audio-hours per hour).
+    """
+    ok = [s for s in summaries if s["ok"]]
+    audio_seconds = sum(s["duration"] for s in ok)
+    wall_seconds = max(wall_seconds, 1e-9)
+    logger.info("Batch done: %d/%d file(s) succeeded in %.2fs", len(ok), len(summaries), wall_seconds)
+    for failed in (s for s in summaries if not s["ok"]):
+        logger.warning("Failed: %s (%s)", failed["file"], failed["error"])
+    logger.info("Throughput: %.2f tracks/min, %.2f audio-hours/hour (%.1f s of audio)",
+                len(ok) * 60.0 / wall_seconds, audio_seconds / wall_seconds, audio_seconds)
+
+def write_profile(path: str, summaries: list[dict], args: argparse.Namespace, wall_seconds: float) -> None:
+    """
+    Merge the per-file trace events (from every worker) and write the trace and its summary table.
+    """
+    events = [event for s in summaries for event in s.pop("profile", None) or []] + PROFILER.drain()
+    try:
+        trace_path, summary_path = write_trace(path, events, metadata={"params": analysis_params(args),
+                                                                       "wall_seconds": wall_seconds})
+    except OSError as e:
+        logger.error("Failed to write the profile %s: %s", path, e)
+        return
+    logger.info("Profile by stage (wall/CPU time, traced allocations):\n%s", format_summary(summarize_events(events)))
+    logger.info("Wrote profile: %s (%d event(s); summary: %s)", trace_path, len(events), summary_path)
+
+def _resolve_tempo_defaults(args: argparse.Namespace) -> None:
+    hierarchical = args.search == "hierarchical"
+    if args.min_bpm is None:
+        args.min_bpm = 40.0 if hierarchical else 60.0
+    if args.max_bpm is None:
+        args.max_bpm = 240.0 if hierarchical else 180.0
+    if args.bpm_step is None:
+        args.bpm_step = 2.0 if hierarchical else 1.0
+
+def run_online(args: argparse.Namespace) -> int:
+    """
+    Online mode: read raw PCM, print an updated tempo estimate every --update-ms of audio.
+    """
+    from streaming_module import OnlineTempoTracker, read_pcm_blocks
+
+    if len(args.files) > 1:
+        logger.error("Online mode reads a single stream (stdin, '-' or one path); got %d", len(args.files))
+        return 2
+    fs = args.sample_rate
+    bands = get_scheirer_bands(fs)
+    tracker = OnlineTempoTracker(
+        fs, bands, np.arange(args.min_bpm, args.max_bpm, args.bpm_step, dtype=float),
+        window_seconds=args.window_seconds, update_seconds=args.update_ms / 1000.0, order=args.filter_order,
+        window_length=args.window_length, num_impulses=args.num_impulses, search=partial(_search_tempos, args=args),
+    )
+    source = args.files[0] if args.files and args.files[0] != "-" else None
+    logger.info("Online mode: reading s16le PCM (fs=%d, channels=%d) from %s", fs, args.channels, source or "stdin")
+
+    stream = open(source, "rb") if source else sys.stdin.buffer
+    try:
+        # Read one update worth of audio at a time to keep the latency to a single hop
+        for block in read_pcm_blocks(stream, tracker.update_samples, args.channels):
+            for stream_time, tempo, cpu_seconds in tracker.push(block):
+                print(f"Tempo: {tempo:.2f} BPM (t={stream_time:.2f}s, update={cpu_seconds * 1000.0:.1f} ms)",
+                      flush=True)
+    except KeyboardInterrupt:
+        logger.info("Online mode interrupted.")
+    finally:
+        if source:
+            stream.close()
+    logger.info("Online mode finished after %.2fs of audio.", tracker.samples_seen / float(fs))
+    return 0
+
+def serve(stream) -> int:
+    """
+    Worker mode: runs main() once per input line, keeping imports and in-process caches warm.
+
+    Each line is a JSON list of command-line arguments. A job that fails (including argparse
+    errors) only fails that job; its exit code is reported in the JOB_DONE: line printed on both
+    stdout and stderr, so a reader of either stream knows where the job's output ends.
+    """
+    sys.stdout.reconfigure(line_buffering=True)
+    try:
+        # Warm the stages that the CLI imports lazily, before the first job
+        import plot_handler, pydub, streaming_module  # noqa: F401
+    except Exception:
+        logger.exception("Could not preload the analysis modules")
+    logger.info("Serving analysis jobs from stdin (pid %d)", os.getpid())
+    for job_id, line in enumerate(stream, start=1):
+        if not line.strip():
             continue
+        try:
+            job_argv = json.loads(line)
+            if not isinstance(job_argv, list) or "--serve" in job_argv:
+                raise ValueError(f"expected a JSON list of arguments without --serve, got: {line.strip()!r}")
+            code = main([str(arg) for arg in job_argv])
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            logger.exception("Job %d failed", job_id)
+            code = 1
+        done = json.dumps({"job": job_id, "code": code})
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+        print(f"JOB_DONE: {done}", flush=True)
+        print(f"JOB_DONE: {done}", file=sys.stderr, flush=True)
+    logger.info("Input closed; analysis worker exiting.")
+    return 0
+
+def process_in_pool(file_paths: list[str], args: argparse.Namespace, results_dir: str, workers: int) -> list[dict]:
+    """
+    Process files in worker processes; returns their summaries in completion order.
+
+    A worker that dies (e.g. killed or out of memory) breaks the whole pool and fails every
+    unfinished file with it. Those files are resubmitted to a fresh pool; a file caught in two
+    broken pools is then run alone, so the file that kills its worker is the only one reported failed.
+    """
+    summaries = []
+    attempts = {filename: 0 for filename in file_paths}
+    pending = list(file_paths)
+    while pending:
+        shared = [filename for filename in pending if attempts[filename] < 2]
+        groups = ([(shared, workers)] if shared else []) + [([filename], 1) for filename in pending
+                                                            if attempts[filename] >= 2]
+        pending = []
+        for group, group_workers in groups:
+            with ProcessPoolExecutor(max_workers=min(group_workers, len(group))) as pool:
+                futures = {pool.submit(process_file, filename, args, results_dir): filename for filename in group}
+                for future in as_completed(futures):
+                    filename = futures[future]
+                    try:
+                        summary = future.result()
+                    except BrokenProcessPool as e:
+                        attempts[filename] += 1
+                        if len(group) > 1:
+                            logger.warning("Worker pool broke; resubmitting file: %s", filename)
+                            pending.append(filename)
+                            continue
+                        logger.error("Worker died processing file: %s", filename)
+                        summary = {"file": filename, "ok": False, "error": repr(e), "duration": 0.0}
+                    except Exception as e:
+                        logger.exception("Worker failed for file: %s", filename)
+                        summary = {"file": filename, "ok": False, "error": repr(e), "duration": 0.0}
+                    summaries.append(summary)
+                    logger.info("(%d/%d) Finished file: %s (%s)", len(summaries), len(file_paths), filename,
+                                "ok" if summary["ok"] else "failed")
+    return summaries
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    _resolve_tempo_defaults(args)
+    if args.serve:
+        return serve(sys.stdin)
+    if args.stream and args.dtype != "float64":
+        logger.warning("--dtype only applies to the in-memory pipeline; streaming runs in float64")
+    if args.stream and args.tempogram:
+        logger.warning("--tempogram needs the in-memory pipeline and is ignored with --stream "
+                       "(use --analysis-rate to bound the memory of long tracks)")
+    if args.online:
+        return run_online(args)
+
+    # Determine input files: files, directories, globs and/or a file list
+    if args.files or args.file_list:
+        file_paths = expand_inputs(args.files, args.file_list)
+        if not file_paths:
+            logger.error("No audio files found in the given inputs.")
+            return 2
+        logger.info("Using %d CLI-provided file(s):\n%s", len(file_paths),
+                    "\n".join(f"  {i}) {p}" for i, p in enumerate(file_paths, start=1)))
+    else:
+        file_paths = [
+            os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "music_files", "pathfinder.mp3")),
+            os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "music_files", "celebration.mp3")),
+        ]
+        logger.warning("CLI did not provide any input files; falling back to defaults:\n  1) %s\n  2) %s",
+                       file_paths[0], file_paths[1])
+
+    # Prepare output directory next to this script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    results_dir = os.path.join(script_dir, "results")
+    os.makedirs(results_dir, exist_ok=True)
+    logger.info("Results directory: %s", results_dir)
+
+    # Result cache maintenance
+    if not args.no_cache and (args.clear_cache or args.invalidate_cache):
+        cache = open_result_cache(args, results_dir)
+        if args.clear_cache:
+            cache.clear()
+        else:
+            for filename in file_paths:
+                try:
+                    cache.invalidate(filename)
+                except OSError as e:
+                    logger.warning("Could not invalidate cache entries for %s: %s", filename, e)
+
+    # Tempo search range
+    if args.search == "hierarchical":
+        logger.info("Tempo search: hierarchical %.2f to %.2f BPM (coarse step %.3f, resolution %.3f, top-k %d)",
+                    args.min_bpm, args.max_bpm, args.bpm_step, args.resolution, args.top_k)
+    else:
+        tempo_range = np.arange(args.min_bpm, args.max_bpm, args.bpm_step, dtype=float)
+        logger.info("Tempo range: %g to %g BPM (step %g)", tempo_range.min(), tempo_range.max(), args.bpm_step)
+    if args.stream:
+        logger.info("Streaming mode: block size %d samples (comb energies from running autocorrelations)",
+                    args.block_size)
+    else:
+        logger.info("Filterbank engine: %s, tempo engine: %s", args.filterbank, args.tempo_engine)
+
+    start_time = time.perf_counter()
+    summaries = []
+    workers = max(1, min(args.workers, len(file_paths)))
+    if workers == 1:
+        plot_workers = 0 if args.no_plots else args.plot_workers
+        plot_pool = ProcessPoolExecutor(max_workers=plot_workers) if plot_workers > 0 else None
+        if plot_pool is not None:
+            logger.info("Rendering plots in %d background process(es)", plot_workers)
+        try:
+            for idx, filename in enumerate(file_paths, start=1):
+                logger.info("(%d/%d) Processing file: %s", idx, len(file_paths), filename)
+                summaries.append(process_file(filename, args, results_dir, plot_pool))
+        finally:
+            if plot_pool is not None:
+                plot_pool.shutdown(wait=True)  # outstanding renders complete their summaries
+    else:
+        if args.plot_workers > 0:
+            logger.warning("--plot-workers is ignored with --workers > 1 (each worker already overlaps "
+                           "its plots with the other workers' analysis)")
+        logger.info("Processing %d file(s) with %d worker process(es)", len(file_paths), workers)
+        summaries = process_in_pool(file_paths, args, results_dir, workers)
 
+    wall_seconds = time.perf_counter() - start_time
+    report_throughput(summaries, wall_seconds)
+    if args.profile:
+        write_profile(args.profile, summaries, args, wall_seconds)
+    if not args.no_manifest:
+        try:
+            manifest_path = write_manifest(
+                args.manifest or default_manifest_path(results_dir), summaries, analysis_params(args),
+                run_info={"results_dir": os.path.abspath(results_dir), "wall_seconds": wall_seconds,
+                          "files_ok": sum(1 for s in summaries if s["ok"]), "files_total": len(summaries)})
+            print(f"MANIFEST: {manifest_path}", flush=True)
+            if not args.manifest:
+                prune_manifests(results_dir, max(1, args.keep_manifests))
+        except Exception as e:
+            logger.exception("Failed to write the run manifest")
     logger.info("Processing completed.")
-    return 0
+    return 0 if all(s["ok"] for s in summaries) else 1
 
 if __name__ == "__main__":
     raise SystemExit(main())
\ No newline at end of file
@@ -0,0 +1,115 @@
+# spectrum_cache_module.py
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedCache:
+    """
+    Thread-safe LRU cache of numpy arrays bounded by total bytes.
+
+    Cached arrays are made read-only so that a caller cannot corrupt a shared entry.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def fits(self, nbytes: int) -> bool:
+        """
+        Whether nbytes of entries can be held at once (used to avoid LRU thrashing on cyclic scans).
+        """
+        return nbytes <= self.max_bytes
+
+    def get(self, key: tuple) -> np.ndarray | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: np.ndarray, evict: bool = True) -> np.ndarray:
+        """
+        Stores value under key and returns it. With evict=False the entry is only admitted
+        if it fits in the free space, so existing entries are never displaced.
+        """
+        value.setflags(write=False)
+        with self._lock:
+            if key in self._entries or value.nbytes > self.max_bytes:
+                return value
+            if not evict and self._nbytes + value.nbytes > self.max_bytes:
+                return value
+            while self._nbytes + value.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+            self._entries[key] = value
+            self._nbytes += value.nbytes
+            return value
+
+    def get_or_create(self, key: tuple, factory, evict: bool = True) -> np.ndarray:
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, factory(), evict=evict)
+        return value
+
+    def resize(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            while self._nbytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+# Process-wide cache of signal-independent spectra (envelope windows), shared by the bands of
+# one file. Entries have the track's padded length, so consecutive files almost never share
+# them: rythm_detection releases the cache after each file (release_spectrum_cache) rather
+# than keeping up to max_bytes resident in long-lived worker processes.
+SPECTRUM_CACHE = BoundedCache(max_bytes=64 * 1024 * 1024)
+
+
+def configure_spectrum_cache(max_bytes: int) -> None:
+    """
+    Sets the memory budget of the process-wide spectrum cache (evicting if it shrinks).
+    """
+    SPECTRUM_CACHE.resize(max_bytes)
+    logger.debug("Spectrum cache limit set to %.1f MB", max_bytes / (1024.0 * 1024.0))
+
+
+def release_spectrum_cache() -> None:
+    """
+    Drops every cached spectrum (the limit and hit/miss counters are kept).
+    """
+    SPECTRUM_CACHE.clear()
+
+
+def spectrum_cache_stats() -> dict:
+    return {
+        "entries": len(SPECTRUM_CACHE),
+        "bytes": SPECTRUM_CACHE.nbytes,
+        "max_bytes": SPECTRUM_CACHE.max_bytes,
+        "hits": SPECTRUM_CACHE.hits,
+        "misses": SPECTRUM_CACHE.misses,
+    }
@@ -0,0 +1,254 @@
+# streaming_module.py
+
+import time
+import numpy as np
+import logging
+
+from functools import partial
+
+from comb_filter_module import accumulate_autocorr, autocorr_tempo_energies, linear_autocorr
+from diff_rect_module import diff_rect_block
+from envelope_module import envelope_block, half_hanning_window
+from filterbank_module import design_filterbank, filterbank_block
+
+logger = logging.getLogger(__name__)
+
+
+class WaveformOverview:
+    """
+    Bounded min/max summary of a signal that arrives block by block (for plotting).
+
+    Samples are reduced to (min, max) pairs per bucket; whenever more than 2 * max_points
+    buckets accumulate, adjacent buckets are merged and the bucket size doubles.
+    """
+
+    def __init__(self, max_points: int = 4096, bucket: int = 256) -> None:
+        self.max_points = max_points
+        self.bucket = bucket
+        self._mins = np.zeros(0)
+        self._maxs = np.zeros(0)
+        self._pending = np.zeros(0)
+
+    def update(self, block: np.ndarray) -> None:
+        data = np.concatenate([self._pending, np.asarray(block, dtype=float)])
+        n_full = data.size - data.size % self.bucket
+        chunks = data[:n_full].reshape(-1, self.bucket)
+        self._mins = np.concatenate([self._mins, chunks.min(axis=1)])
+        self._maxs = np.concatenate([self._maxs, chunks.max(axis=1)])
+        self._pending = data[n_full:]
+        while self._mins.size > 2 * self.max_points:
+            self._merge_pairs()
+
+    def _merge_pairs(self) -> None:
+        if self._mins.size % 2:
+            # Pad an odd count with a copy of the last bucket; min/max are unaffected
+            self._mins = np.append(self._mins, self._mins[-1])
+            self._maxs = np.append(self._maxs, self._maxs[-1])
+        self._mins = self._mins.reshape(-1, 2).min(axis=1)
+        self._maxs = self._maxs.reshape(-1, 2).max(axis=1)
+        self.bucket *= 2
+
+    def xy(self, fs: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (time_axis, values) with interleaved min/max points, ready for a line plot.
+        """
+        mins, maxs = self._mins, self._maxs
+        if self._pending.size:
+            mins = np.append(mins, self._pending.min())
+            maxs = np.append(maxs, self._pending.max())
+        starts = np.arange(mins.size) * self.bucket / float(fs)
+        time_axis = np.repeat(starts, 2) + np.tile([0.0, 0.5 * self.bucket / float(fs)], mins.size)
+        values = np.column_stack([mins, maxs]).ravel()
+        return time_axis, values
+
+
+def stream_band_autocorrs(blocks, fs, bands, min_tempo, order=5, window_length=0.4, num_impulses=3):
+    """
+    Runs filterbank -> envelope -> diff-rect block by block and accumulates, per band, the
+    autocorrelation needed by the comb filters, so memory depends on the block size and the
+    slowest tempo, not on the track length.
+
+    Parameters:
+        blocks (Iterable[np.ndarray]): Blocks of the input signal (see stream_audio_blocks).
+        fs (int): Sampling frequency.
+        bands (list[tuple[float, float]]): (low, high) limits of each band.
+        min_tempo (float): Slowest tempo that will be evaluated (sets the longest lag kept).
+        order (int): Butterworth filter order.
+        window_length (float): Envelope Hanning window length in seconds.
+        num_impulses (int): Number of impulses in the comb filters.
+
+    Returns:
+        (list[np.ndarray], WaveformOverview, int): Linear autocorrelation of each band's
+        onset signal (use autocorr_tempo_energies), a waveform overview, and the sample count.
+    """
+    max_lag = (num_impulses - 1) * max(1, int(fs * 60.0 / min_tempo))
+    logger.info("stream_band_autocorrs: start (fs=%d, bands=%d, max_lag=%d)", fs, len(bands), max_lag)
+
+    designs = design_filterbank(fs, bands, order)
+    half_window = half_hanning_window(fs, window_length)
+    filter_states = None
+    envelope_tails = [None] * len(bands)
+    previous_samples = [None] * len(bands)
+    autocorrs = [np.zeros(max_lag + 1) for _ in bands]
+    histories = [np.zeros(0) for _ in bands]
+    overview = WaveformOverview()
+
+    n_samples = 0
+    n_blocks = 0
+    for block in blocks:
+        overview.update(block)
+        band_blocks, filter_states = filterbank_block(block, designs, filter_states)
+        for i, band_block in enumerate(band_blocks):
+            envelope, envelope_tails[i] = envelope_block(band_block, half_window, envelope_tails[i])
+            onset, previous_samples[i] = diff_rect_block(envelope, previous_samples[i])
+            histories[i] = accumulate_autocorr(onset, autocorrs[i], histories[i])
+        n_samples += len(block)
+        n_blocks += 1
+        logger.debug("stream_band_autocorrs: block %d done (samples=%d)", n_blocks, n_samples)
+
+    logger.info("stream_band_autocorrs: done (blocks=%d, samples=%d, duration=%.2fs)",
+                n_blocks, n_samples, n_samples / float(fs) if fs else -1.0)
+    return autocorrs, overview, n_samples
+
+
+def read_pcm_blocks(stream, block_size, channels=1):
+    """
+    Reads raw signed 16-bit little-endian PCM (ffmpeg "-f s16le") from a binary stream.
+
+    Channels are averaged to mono. Blocks are exactly block_size samples except the last.
+
+    Parameters:
+        stream (BinaryIO): Stream to read from (e.g. sys.stdin.buffer or a FIFO).
+        block_size (int): Samples (frames) per block.
+        channels (int): Interleaved channels in the stream.
+
+    Yields:
+        np.ndarray: Mono float blocks.
+    """
+    frame_bytes = 2 * channels
+    pending = b""
+    while True:
+        chunk = stream.read(block_size * frame_bytes - len(pending))
+        if not chunk:
+            break
+        pending += chunk
+        if len(pending) < block_size * frame_bytes:
+            continue  # short read from a pipe; wait for the rest of the block
+        yield np.frombuffer(pending, dtype="<i2").reshape((-1, channels)).mean(axis=1)
+        pending = b""
+    usable = len(pending) - len(pending) % frame_bytes
+    if usable:
+        yield np.frombuffer(pending[:usable], dtype="<i2").reshape((-1, channels)).mean(axis=1)
+
+
+class OnlineTempoTracker:
+    """
+    Real-time tempo tracker over a live PCM stream.
+
+    Incoming blocks go through the same filterbank -> envelope -> diff-rect chain as the
+    file pipeline (with carried state), and each band's onset signal is written into a
+    ring buffer holding the last window_seconds. Every update_seconds of audio the comb
+    energies are recomputed from the ring buffer alone, so the cost of an update is fixed
+    by the window length and never grows with the stream duration.
+    """
+
+    def __init__(self, fs, bands, tempos, window_seconds=8.0, update_seconds=0.5, order=5,
+                 window_length=0.4, num_impulses=3, search=None) -> None:
+        """
+        Parameters:
+            fs (int): Sampling frequency of the stream.
+            bands (list[tuple[float, float]]): (low, high) limits of each band.
+            tempos (np.ndarray): Tempos (BPM) evaluated at each update (the slowest sets the longest lag).
+            window_seconds (float): Length of the onset ring buffer in seconds.
+            update_seconds (float): Audio time between two tempo estimates.
+            order (int): Butterworth filter order.
+            window_length (float): Envelope Hanning window length in seconds.
+            num_impulses (int): Number of impulses in the comb filters.
+            search (Callable | None): Maps per-band sweepers (tempos -> energies) to
+                (tempos, per_band_energies); defaults to evaluating tempos directly.
+        """
+        self.fs = fs
+        self.bands = bands
+        self.tempos = np.asarray(tempos, dtype=float)
+        self.num_impulses = num_impulses
+        self.search = search
+        self.max_lag = (num_impulses - 1) * max(1, int(fs * 60.0 / float(self.tempos.min())))
+        self.ring_size = max(int(window_seconds * fs), self.max_lag + 1)
+        self.update_samples = max(1, int(update_seconds * fs))
+
+        self._designs = design_filterbank(fs, bands, order)
+        self._half_window = half_hanning_window(fs, window_length)
+        self._filter_states = None
+        self._envelope_tails = [None] * len(bands)
+        self._previous_samples = [None] * len(bands)
+        self._rings = np.zeros((len(bands), self.ring_size))
+        self._write_pos = 0
+        self._filled = 0
+        self._since_update = 0
+        self.samples_seen = 0
+        logger.info("OnlineTempoTracker: fs=%d, bands=%d, window=%.2fs (%d samples), update every %d samples",
+                    fs, len(bands), self.ring_size / float(fs), self.ring_size, self.update_samples)
+
+    def push(self, block):
+        """
+        Feeds one block of audio; returns the list of (stream_time_s, tempo_bpm, update_seconds_cpu)
+        estimates that became due within this block (usually zero or one).
+        """
+        estimates = []
+        block = np.asarray(block, dtype=float)
+        start = 0
+        while start < block.size:
+            # Split so that an update boundary always falls at the end of a piece
+            stop = min(block.size, start + self.update_samples - self._since_update)
+            self._process(block[start:stop])
+            self._since_update += stop - start
+            if self._since_update >= self.update_samples:
+                self._since_update = 0
+                t0 = time.perf_counter()
+                tempo = self.estimate()
+                estimates.append((self.samples_seen / float(self.fs), tempo, time.perf_counter() - t0))
+            start = stop
+        return estimates
+
+    def _process(self, piece):
+        band_pieces, self._filter_states = filterbank_block(piece, self._designs, self._filter_states)
+        for i, band_piece in enumerate(band_pieces):
+            envelope, self._envelope_tails[i] = envelope_block(band_piece, self._half_window, self._envelope_tails[i])
+            onset, self._previous_samples[i] = diff_rect_block(envelope, self._previous_samples[i])
+            self._write(i, onset)
+        self._write_pos = (self._write_pos + piece.size) % self.ring_size
+        self._filled = min(self.ring_size, self._filled + piece.size)
+        self.samples_seen += piece.size
+
+    def _write(self, band, onset):
+        skipped = max(0, onset.size - self.ring_size)  # older samples would be overwritten anyway
+        onset = onset[skipped:]
+        pos = (self._write_pos + skipped) % self.ring_size
+        first = min(onset.size, self.ring_size - pos)
+        self._rings[band, pos:pos + first] = onset[:first]
+        self._rings[band, :onset.size - first] = onset[first:]
+
+    def recent_onsets(self):
+        """
+        Onset signal of every band over the ring buffer, oldest sample first.
+        """
+        rings = np.roll(self._rings, -self._write_pos, axis=1)
+        return rings[:, self.ring_size - self._filled:]
+
+    def estimate(self):
+        """
+        Tempo (BPM) with the highest total comb energy over the ring buffer, or nan if empty.
+        """
+        onsets = self.recent_onsets()
+        if onsets.shape[1] == 0:
+            return float("nan")
+        sweepers = [partial(autocorr_tempo_energies, linear_autocorr(onset, self.max_lag), self.fs,
+                            num_impulses=self.num_impulses) for onset in onsets]
+        if self.search is None:
+            tempos, energies = self.tempos, [sweeper(self.tempos) for sweeper in sweepers]
+        else:
+            tempos, energies = self.search(sweepers)
+        total = np.sum(energies, axis=0)
+        best = float(tempos[int(np.argmax(total))])
+        logger.debug("OnlineTempoTracker: t=%.2fs tempo=%.2f BPM", self.samples_seen / float(self.fs), best)
+        return best